@@ -0,0 +1,332 @@
+'''
+Micro-benchmarks for the engine's game tree, logging and protocol, and for the Python skeleton.
+
+Usage: python3 benchmark.py [--save FILE] [--compare FILE] [--only NAME ...]
+
+Run it from the engine's directory, since the engine reads config.py from there.
+Each benchmark reports the median time per operation over several repeats, along with
+the spread of the repeats. Results can be saved as a JSON baseline, and compared against
+one to flag regressions. Timings depend on the machine, so no baseline is shipped: save
+one on the machine that will run the comparison.
+'''
+import statistics
+import tempfile
+import platform
+import argparse
+import random
+import time
+import json
+import sys
+import os
+
+import eval7
+
+import engine
+from engine import RoundState, Table, Game, LocalPlayer, round_rank_masks
+from engine import FoldAction, CallAction, CheckAction, RaiseAction
+from engine import SMALL_BLIND, BIG_BLIND, STARTING_STACK
+from gamelog import GameLog
+import wire
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python_skeleton'))
+from skeleton.runner import Runner
+from skeleton.bot import Bot
+from skeleton import actions as skeleton_actions
+
+# a slowdown beyond this fraction of the baseline counts as a regression
+REGRESSION_THRESHOLD = 0.2
+# nor does a slowdown count unless it exceeds this many times the spread of either run's repeats
+NOISE_MULTIPLIER = 3
+REPEATS = 11
+# when comparing, a benchmark which looks slower is measured up to this many more times, keeping its fastest run
+CONFIRMATIONS = 2
+# the fixed line played by the round benchmarks: limp, check down to the turn, bet and call, check the river
+ROUND_LINE = [CallAction(), CheckAction(), CheckAction(), CheckAction(), RaiseAction(10), CallAction(),
+              CheckAction(), CheckAction()]
+
+
+class NullBot(Bot):
+    '''
+    Checks or calls every decision, so that a match measures only the engine and protocol.
+    '''
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        if skeleton_actions.CheckAction in round_state.legal_actions():
+            return skeleton_actions.CheckAction()
+        return skeleton_actions.CallAction()
+
+
+class NullPlayer(LocalPlayer):
+    '''
+    Plays a NullBot in the engine process, recording every message it is sent.
+    '''
+
+    def __init__(self, name, path, log_dir='.'):
+        super().__init__(name, path, log_dir)
+        self.messages = []
+
+    def run(self):
+        self.runner = Runner(NullBot(), None)
+
+    def request(self, message):
+        self.messages.append(message)
+        return super().request(message)
+
+    def save_log(self):
+        pass
+
+
+class NullPool():
+    '''
+    Stands in for an engine PlayerPool, handing Game.run a pair of NullPlayers.
+    '''
+
+    def __init__(self):
+        self.players = []
+
+    def acquire(self, name, path, log_dir='.'):
+        player = NullPlayer(name, path, log_dir)
+        player.run()
+        self.players.append(player)
+        return player
+
+    def release(self, player):
+        pass
+
+
+class Seat():
+    '''
+    The part of a Player that the log_* methods read.
+    '''
+
+    def __init__(self, name):
+        self.name = name
+
+
+def deal(seed=0):
+    '''
+    Returns the first RoundState of a seeded round.
+    '''
+    deck = eval7.Deck()
+    random.Random(seed).shuffle(deck.cards)
+    hands = [deck.deal(2), deck.deal(2)]
+    bounties = ['A', 'K']
+    return RoundState(0, 0, [SMALL_BLIND, BIG_BLIND], [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND],
+                      hands, deck, bounties, None, round_rank_masks(hands, deck, bounties))
+
+
+def play_line(round_state, line):
+    '''
+    Applies a sequence of actions, returning every state reached including the first.
+    '''
+    states = [round_state]
+    for action in line:
+        states.append(states[-1].proceed(action))
+    return states
+
+
+def play_match():
+    '''
+    Plays a full match between NullBots with the configured number of rounds.
+
+    Returns the messages the first bot was sent, in order.
+    '''
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as log_dir:
+        os.chdir(log_dir)  # bots and logs write relative to the working directory
+        try:
+            pool = NullPool()
+            Game(('A', 'B'), ('.', '.'), seed=0, log_dir=log_dir).run(pool)
+        finally:
+            os.chdir(cwd)
+    return pool.players[0].messages
+
+
+def benchmarks():
+    '''
+    Returns the benchmarks as (name, operation, operations per call) tuples.
+    '''
+    preflop = deal()
+    states = play_line(preflop, ROUND_LINE)
+    river = states[-2]
+    seats = [Seat('A'), Seat('B')]
+    table = Table(0, GameLog(None), ['A', 'B'])
+    flop = states[2]
+
+    def log_round():
+        for state in states[:-1]:
+            table.log_round_state(seats, state)
+        for state, action in zip(states, ROUND_LINE):
+            table.log_action(seats[state.button % 2].name, action, state.pips == [0, 0])
+        table.player_messages = [[], []]
+
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            messages = play_match()[:200]
+        finally:
+            sys.stdout = stdout
+    packets = [message.encode().split() for message in messages]
+    payloads = [wire.encode(message)[wire.LENGTH.size:] for message in messages]
+
+    def parse_packets():
+        runner = Runner(NullBot(), None)
+        for packet in packets:
+            runner.update(packet)
+
+    def parse_payloads():
+        runner = Runner(NullBot(), None)
+        for payload in payloads:
+            runner.update_binary(payload)
+
+    def full_match():
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                play_match()
+            finally:
+                sys.stdout = stdout
+
+    return [
+        ('proceed', lambda: flop.proceed(CheckAction()), 1),
+        ('proceed_street', lambda: states[3].proceed(CheckAction()), 1),
+        ('legal_actions', preflop.legal_actions, 1),
+        ('raise_bounds', preflop.raise_bounds, 1),
+        ('get_delta', lambda: river.get_delta(0), 1),
+        ('showdown', river.showdown, 1),
+        ('fold', lambda: preflop.proceed(FoldAction()), 1),
+        ('play_round', lambda: play_line(preflop, ROUND_LINE), 1),
+        ('log_round', log_round, len(ROUND_LINE)),
+        ('runner_parse', parse_packets, len(packets)),
+        ('runner_binary', parse_payloads, len(payloads)),
+        ('wire_encode', lambda: [wire.encode(message) for message in messages], len(messages)),
+        ('match', full_match, engine.NUM_ROUNDS),
+    ]
+
+
+def measure(operation, per_call):
+    '''
+    Times an operation, returning the median seconds per operation over REPEATS runs and
+    their spread, the interquartile range as a fraction of the median.
+
+    Each run calls the operation enough times to take about 0.2 seconds.
+    '''
+    calls = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            operation()
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= 0.2:
+            break
+        calls *= 2 if elapsed > 0.02 else 10
+    times = [elapsed]
+    for _ in range(REPEATS - 1):
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            operation()
+        times.append(time.perf_counter() - start_time)
+    median = statistics.median(times)
+    quartiles = statistics.quantiles(times, n=4)
+    return median / (calls * per_call), (quartiles[2] - quartiles[0]) / median
+
+
+def regressed(name, seconds, spread, baseline, threshold):
+    '''
+    Returns whether a benchmark slowed down against its baseline.
+
+    It has if it slowed down by more than the threshold, and by more than NOISE_MULTIPLIER
+    times the spread of its repeats in either run, so that noisy nanosecond-scale
+    benchmarks are not flagged for jitter alone.
+    '''
+    if name not in baseline['benchmarks']:
+        return False
+    noise = max(spread, baseline.get('spreads', {}).get(name, 0.))
+    return seconds / baseline['benchmarks'][name] - 1 > max(threshold, NOISE_MULTIPLIER * noise)
+
+
+def compare(results, baseline, threshold):
+    '''
+    Prints each benchmark against its baseline and returns the names of the regressions.
+    '''
+    regressions = []
+    print('{:<16}{:>14}{:>14}{:>10}'.format('Benchmark', 'Baseline', 'Current', 'Change'))
+    for name, seconds in results['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            print('{:<16}{:>14}{:>14}{:>10}'.format(name, '-', format_seconds(seconds), 'new'))
+            continue
+        base_seconds = baseline['benchmarks'][name]
+        change = seconds / base_seconds - 1
+        flag = '  REGRESSION' if regressed(name, seconds, results['spreads'][name], baseline, threshold) else ''
+        if flag:
+            regressions.append(name)
+        print('{:<16}{:>14}{:>14}{:>+9.1f}%{}'.format(name, format_seconds(base_seconds), format_seconds(seconds),
+                                                      100 * change, flag))
+    return regressions
+
+
+def format_seconds(seconds):
+    '''
+    Formats a time per operation with a readable unit.
+    '''
+    for unit, scale in (('s', 1.), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3f} {}'.format(seconds / scale, unit)
+    return '{:.1f} ns'.format(seconds / 1e-9)
+
+
+def parse_args():
+    '''
+    Parses the benchmark's command line arguments.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 benchmark.py')
+    parser.add_argument('--save', type=str, default=None, metavar='FILE', help='Save the results as a JSON baseline')
+    parser.add_argument('--compare', type=str, default=None, metavar='FILE',
+                        help='Compare against a JSON baseline, exiting with status 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Slowdown counted as a regression, defaults to {}'.format(REGRESSION_THRESHOLD))
+    parser.add_argument('--only', nargs='+', default=None, metavar='NAME', help='Run only these benchmarks')
+    return parser.parse_args()
+
+
+def main():
+    '''
+    Runs the benchmarks, then saves or compares the results.
+
+    When comparing, a benchmark which looks slower than its baseline is measured again up to
+    CONFIRMATIONS times, so a passing slowdown of the machine is not reported as a regression.
+    '''
+    args = parse_args()
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    results = {'python': platform.python_version(), 'machine': platform.machine(),
+               'num_rounds': engine.NUM_ROUNDS, 'benchmarks': {}, 'spreads': {}}
+    for name, operation, per_call in benchmarks():
+        if args.only is None or name in args.only:
+            seconds, spread = measure(operation, per_call)
+            for _ in range(CONFIRMATIONS if baseline is not None else 0):
+                if not regressed(name, seconds, spread, baseline, args.threshold):
+                    break
+                seconds, spread = min((seconds, spread), measure(operation, per_call))
+            results['benchmarks'][name], results['spreads'][name] = seconds, spread
+            if args.compare is None:
+                print('{:<16}{:>14}{:>12}'.format(name, format_seconds(results['benchmarks'][name]),
+                                                  'IQR {:.1f}%'.format(100 * results['spreads'][name])))
+    if args.save is not None:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+    if baseline is not None:
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
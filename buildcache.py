@@ -0,0 +1,158 @@
+'''
+A content-addressed cache of pokerbot build outputs.
+'''
+import tempfile
+import fnmatch
+import hashlib
+import shutil
+import json
+import os
+
+OUTPUTS_DIR = 'outputs'
+BUILD_LOG = 'build.txt'
+RESTORED_DIR = 'restored'
+
+
+class BuildCache():
+    '''
+    Stores the outputs of successful builds, keyed on a hash of everything that went into them.
+
+    A pokerbot's files are split by the exclude patterns, which are matched against every
+    path component: matching files are build outputs (build directories, class files and
+    so on), and all other files are sources. The key hashes the pokerbot's absolute path
+    and build command with the path and contents of every source, so an unchanged pokerbot
+    can have its outputs copied back instead of being rebuilt. The absolute path is part of
+    the key because outputs such as CMakeCache.txt record where they were built, and are
+    wrong in a copy of the pokerbot elsewhere.
+
+    Each restore is recorded under the pokerbot's path, so that if a later build of
+    changed sources fails, the restored outputs can be removed rather than run.
+    '''
+
+    def __init__(self, cache_dir, exclude):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.exclude = exclude
+
+    def is_output(self, relpath):
+        '''
+        Returns whether a file, given by its path relative to the pokerbot, is a build output.
+        '''
+        return any(fnmatch.fnmatch(part, pattern) for part in relpath.split(os.sep) for pattern in self.exclude)
+
+    def files(self, path):
+        '''
+        Lists the relative paths of every file under a pokerbot's directory, in a fixed order.
+        '''
+        relpaths = []
+        for root, dirs, filenames in os.walk(path):
+            dirs.sort()
+            for filename in sorted(filenames):
+                full_path = os.path.join(root, filename)
+                if os.path.isfile(full_path):
+                    relpaths.append(os.path.relpath(full_path, path))
+        return relpaths
+
+    def key(self, path, build_command):
+        '''
+        Hashes a pokerbot's absolute path, build command and sources.
+        '''
+        digest = hashlib.sha256(json.dumps([os.path.abspath(path), build_command]).encode())
+        for relpath in self.files(path):
+            if self.is_output(relpath):
+                continue
+            digest.update(relpath.encode() + b'\0')
+            with open(os.path.join(path, relpath), 'rb') as source:
+                for block in iter(lambda: source.read(1 << 20), b''):
+                    digest.update(block)
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def restore(self, key, path):
+        '''
+        Copies the cached outputs of a build into a pokerbot's directory.
+
+        Returns the build's captured output, or None if the key is not cached.
+        '''
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry):
+            return None
+        outputs = os.path.join(entry, OUTPUTS_DIR)
+        relpaths = self.files(outputs)
+        # recorded first, so that an interrupted restore can still be discarded
+        record = self.restore_record(path)
+        os.makedirs(os.path.dirname(record), exist_ok=True)
+        with open(record, 'w') as record_file:
+            json.dump(relpaths, record_file)
+        for relpath in relpaths:
+            cached = os.path.join(outputs, relpath)
+            target = os.path.join(path, relpath)
+            if os.path.isfile(target):
+                cached_stat, target_stat = os.stat(cached), os.stat(target)
+                if (cached_stat.st_size, cached_stat.st_mtime_ns) == (target_stat.st_size, target_stat.st_mtime_ns):
+                    continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(cached, target)
+        with open(os.path.join(entry, BUILD_LOG), 'rb') as build_log:
+            return build_log.read()
+
+    def restore_record(self, path):
+        '''
+        Returns the file listing the outputs last restored into a pokerbot's directory.
+        '''
+        name = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, RESTORED_DIR, name + '.json')
+
+    def discard(self, path):
+        '''
+        Removes the outputs last restored into a pokerbot's directory, after a failed build.
+
+        Returns whether anything had been restored.
+        '''
+        record = self.restore_record(path)
+        try:
+            with open(record, 'r') as record_file:
+                relpaths = json.load(record_file)
+        except FileNotFoundError:
+            return False
+        for relpath in relpaths:
+            try:
+                os.remove(os.path.join(path, relpath))
+            except FileNotFoundError:
+                pass
+        os.remove(record)
+        return True
+
+    def forget(self, path):
+        '''
+        Drops the record of a restore, once a pokerbot's outputs have been rebuilt.
+        '''
+        try:
+            os.remove(self.restore_record(path))
+        except FileNotFoundError:
+            pass
+
+    def store(self, key, path, build_output):
+        '''
+        Saves the outputs of a successful build under its key.
+
+        The entry is assembled in a temporary directory and renamed into place, so concurrent
+        builds of the same sources never leave a partial entry behind.
+        '''
+        entry = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            for relpath in self.files(path):
+                if self.is_output(relpath):
+                    target = os.path.join(staging, OUTPUTS_DIR, relpath)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copy2(os.path.join(path, relpath), target)
+            with open(os.path.join(staging, BUILD_LOG), 'wb') as build_log:
+                build_log.write(build_output or b'')
+            os.rename(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(entry):
+                raise
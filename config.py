@@ -7,13 +7,53 @@ PLAYER_2_NAME = "B"
 PLAYER_2_PATH = "./python_skeleton"  # Change this to './player_chatbot' to interact with your own bot!
 # GAME PROGRESS IS RECORDED HERE
 GAME_LOG_FILENAME = "gamelog"
-# PLAYER_LOG_SIZE_LIMIT IS IN BYTES
+# ANY OF "text" (GAME_LOG_FILENAME.txt), "jsonl" (.jsonl) AND "binary" (.bin), READ THE LAST TWO WITH gamelog.RecordReader
+GAME_LOG_FORMATS = ["text"]
+# THE TEXT GAME LOG IS STREAMED TO DISK: None, "gzip" OR "zstd" (NEEDS pip install zstandard) COMPRESSION
+GAME_LOG_COMPRESSION = None
+# LOG LINES ARE FLUSHED ONCE GAME_LOG_BUFFER_SIZE CHARACTERS ARE PENDING OR EVERY GAME_LOG_FLUSH_INTERVAL SECONDS
+GAME_LOG_BUFFER_SIZE = 65536
+GAME_LOG_FLUSH_INTERVAL = 5.0
+# WRITE THE RESPONSE LATENCIES AND GAME CLOCK OF EACH BOT TO GAME_LOG_FILENAME.metrics.json
+TELEMETRY = False
+# THE TELEMETRY FILE IS ALSO REWRITTEN EVERY TELEMETRY_INTERVAL SECONDS DURING A GAME (None ONLY WRITES IT AT THE END)
+TELEMETRY_INTERVAL = 5.0
+# BOT OUTPUT IS STREAMED TO A.txt AND B.txt, PLAYER_LOG_SIZE_LIMIT IS IN BYTES PER FILE
 PLAYER_LOG_SIZE_LIMIT = 524288
+# 0 KEEPS THE FIRST PLAYER_LOG_SIZE_LIMIT BYTES (WITH ANY STARTUP ERRORS) AND DROPS THE REST, MORE KEEPS THE NEWEST OUTPUT, ROTATING A FULL LOG TO A.1.txt, A.2.txt... UP TO PLAYER_LOG_BACKUPS OLDER FILES
+PLAYER_LOG_BACKUPS = 0
 # STARTING_GAME_CLOCK AND TIMEOUTS ARE IN SECONDS
 ENFORCE_GAME_CLOCK = True
 STARTING_GAME_CLOCK = 60.0
 BUILD_TIMEOUT = 10.0
+# BUILD OUTPUTS ARE CACHED UNDER BUILD_CACHE_DIR, KEYED ON A HASH OF THE BUILD COMMAND AND SOURCES (None DISABLES THE CACHE)
+BUILD_CACHE_DIR = ".build_cache"
+# FILES OR DIRECTORIES MATCHING THESE PATTERNS ARE BUILD OUTPUTS, ANYTHING ELSE IN A BOT'S DIRECTORY IS A SOURCE
+BUILD_CACHE_EXCLUDE = ["build", "target", "__pycache__", "*.pyc", "*.class", "*.jsa", "*.o"]
 CONNECT_TIMEOUT = 10.0
+# BOTS CONNECT OVER "tcp" OR "unix" (UNIX DOMAIN SOCKETS, WHICH ARE FASTER BUT NEED THE LATEST SKELETONS)
+TRANSPORT = "tcp"
+# RUN PYTHON BOTS INSIDE THE ENGINE PROCESS INSTEAD OF OVER SOCKETS (FOR FAST SELF-PLAY), IN THE ENGINE'S WORKING DIRECTORY,
+# SO THEY MUST OPEN THEIR FILES BY PATHS BUILT FROM __file__ (AS THE PYTHON SKELETON DOES)
+IN_PROCESS_BOTS = False
+# OFFER BOTS A COMPACT BINARY FRAMING OF THE PROTOCOL, WHICH BOTS WITH OLDER SKELETONS DECLINE
+BINARY_PROTOCOL = False
+# PLAY UP TO NUM_TABLES ROUNDS AT ONCE, BATCHING EACH BOT'S DECISIONS INTO ONE MESSAGE IF IT SUPPORTS IT
+NUM_TABLES = 1
+# SEED FIXES THE CARDS AND BOUNTIES OF EVERY ROUND (None PICKS A RANDOM SEED, RECORDED IN THE GAME LOG)
+SEED = None
+# DUPLICATE_MODE REPLAYS EVERY DEAL WITH THE SEATS SWAPPED
+DUPLICATE_MODE = False
+# EARLY_STOP ENDS A GAME ONCE A SEQUENTIAL PROBABILITY RATIO TEST ON PLAYER 1'S BANKROLL IS DECIDED, INSTEAD OF PLAYING ALL NUM_ROUNDS
+EARLY_STOP = False
+# THE TEST WEIGHS H0: PLAYER 1 WINS SPRT_H0 CHIPS PER ROUND ON AVERAGE AGAINST H1: PLAYER 1 WINS SPRT_H1 CHIPS PER ROUND
+# AND H2: PLAYER 2 WINS BY AS MUCH (PLAYER 1 WINS 2 * SPRT_H0 - SPRT_H1), SO IT STOPS WHICHEVER PLAYER IS BETTER
+SPRT_H0 = 0.0
+SPRT_H1 = 5.0
+# SPRT_ALPHA IS THE CHANCE OF NAMING A WINNER OF AN EVEN MATCH AND SPRT_BETA OF MISSING A WINNER, NO DECISION IS TAKEN BEFORE SPRT_MIN_ROUNDS
+SPRT_ALPHA = 0.05
+SPRT_BETA = 0.05
+SPRT_MIN_ROUNDS = 100
 # THE GAME VARIANT FIXES THE PARAMETERS BELOW
 # CHANGE ONLY FOR TRAINING OR EXPERIMENTATION
 NUM_ROUNDS = 1000
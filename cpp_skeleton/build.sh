@@ -1,7 +1,48 @@
 #!/bin/bash
+# Usage: bash build.sh [release|debug|lto|pgo|instrument]
+#   release     optimized, the default
+#   debug       unoptimized, with debug symbols
+#   lto         release with link-time optimization
+#   pgo         lto, optimized with the profile recorded in pgo/ (lto if there is none)
+#   instrument  lto, instrumented to record a profile in pgo/ as it runs, for pgo-train.sh
+# To ship a profile, record it by hand with bash pgo-train.sh, commit pgo/ with the bot, and add
+# the profile to "build" in commands.json, like ["bash", "build.sh", "pgo"].
+set -e
+
+PROFILE=${1:-release}
+BOT_DIR=$PWD
+
+configure() {
+    cmake -DCMAKE_BUILD_TYPE="$1" -DPOKERBOT_LTO="$2" -DPOKERBOT_PGO="$3" -DPOKERBOT_PGO_DIR="$BOT_DIR/pgo" ..
+    make
+}
 
 mkdir -p build
 cd build
-cmake -DCMAKE_BUILD_TYPE=Debug ..
-make
+case "$PROFILE" in
+    release)
+        configure Release OFF OFF
+        ;;
+    debug)
+        configure Debug OFF OFF
+        ;;
+    lto)
+        configure Release ON OFF
+        ;;
+    pgo)
+        if [ -n "$(find ../pgo -name '*.gcda' -o -name default.profdata 2> /dev/null)" ]; then
+            configure Release ON USE
+        else
+            echo "No profile in pgo/, building without it (record one with bash pgo-train.sh)" >&2
+            configure Release ON OFF
+        fi
+        ;;
+    instrument)
+        configure Release ON GENERATE
+        ;;
+    *)
+        echo "Unknown build profile $PROFILE, expected release, debug, lto, pgo or instrument" >&2
+        exit 1
+        ;;
+esac
 cd ..
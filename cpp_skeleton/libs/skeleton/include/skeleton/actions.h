@@ -1,6 +1,11 @@
 #pragma once
 
+#include <algorithm>
+#include <array>
+#include <cstddef>
+#include <initializer_list>
 #include <iostream>
+#include <unordered_set>
 
 #include "constants.h"
 
@@ -17,4 +22,46 @@ struct Action {
   friend std::ostream &operator<<(std::ostream &os, const Action &a);
 };
 
+// a set of action types held inline, used like std::unordered_set<Action::Type> but never allocating
+class ActionSet {
+private:
+  std::array<Action::Type, 4> types{};
+  std::size_t length = 0;
+
+public:
+  using const_iterator = const Action::Type *;
+  using iterator = const_iterator;
+
+  ActionSet() = default;
+
+  ActionSet(std::initializer_list<Action::Type> init) {
+    for (auto type : init) {
+      insert(type);
+    }
+  }
+
+  void insert(Action::Type type) {
+    if (!contains(type)) {
+      types[length++] = type;
+    }
+  }
+
+  const_iterator begin() const { return types.data(); }
+
+  const_iterator end() const { return types.data() + length; }
+
+  const_iterator find(Action::Type type) const { return std::find(begin(), end(), type); }
+
+  std::size_t count(Action::Type type) const { return find(type) != end() ? 1 : 0; }
+
+  bool contains(Action::Type type) const { return find(type) != end(); }
+
+  std::size_t size() const { return length; }
+
+  bool empty() const { return length == 0; }
+
+  // for code written against the std::unordered_set which legalActions() used to return
+  operator std::unordered_set<Action::Type>() const { return {begin(), end()}; }
+};
+
 } // namespace pokerbots::skeleton
@@ -0,0 +1,67 @@
+#pragma once
+
+#include <cstdint>
+#include <iostream>
+#include <string>
+#include <string_view>
+
+namespace pokerbots::skeleton {
+
+inline constexpr char RANKS[] = "23456789TJQKA";
+inline constexpr char SUITS[] = "cdhs";
+
+// a card packed into one byte as rank * 4 + suit, the same encoding as the engine's binary framing
+struct Card {
+  static constexpr std::uint8_t NONE = 0xFF;
+
+  std::uint8_t code = NONE;
+
+  constexpr Card() = default;
+
+  constexpr explicit Card(std::uint8_t code) : code(code) {}
+
+  constexpr Card(int rank, int suit) : code(static_cast<std::uint8_t>(rank * 4 + suit)) {}
+
+  // parses a card like "As", returning an empty card if the text is not one
+  static constexpr Card parse(std::string_view text) {
+    if (text.size() < 2) {
+      return {};
+    }
+    auto rank = std::string_view(RANKS).find(text[0]);
+    auto suit = std::string_view(SUITS).find(text[1]);
+    if (rank == std::string_view::npos || suit == std::string_view::npos) {
+      return {};
+    }
+    return {static_cast<int>(rank), static_cast<int>(suit)};
+  }
+
+  // true for an unknown card, such as the opponent's hole cards before a showdown
+  constexpr bool empty() const { return code == NONE; }
+
+  // the index of the rank in RANKS, from 0 for a two to 12 for an ace
+  constexpr int rank() const { return code >> 2; }
+
+  // the index of the suit in SUITS
+  constexpr int suit() const { return code & 3; }
+
+  // the rank as a character like 'A', comparable with a bounty, or '\0' for an empty card
+  constexpr char rankName() const { return empty() ? '\0' : RANKS[rank()]; }
+
+  constexpr char suitName() const { return empty() ? '\0' : SUITS[suit()]; }
+
+  // the card's name like "As", or "" for an empty card
+  std::string str() const { return empty() ? std::string() : std::string{rankName(), suitName()}; }
+
+  constexpr bool operator==(Card other) const { return code == other.code; }
+
+  constexpr bool operator!=(Card other) const { return code != other.code; }
+
+  friend std::ostream &operator<<(std::ostream &os, Card card) {
+    if (!card.empty()) {
+      os << card.rankName() << card.suitName();
+    }
+    return os;
+  }
+};
+
+} // namespace pokerbots::skeleton
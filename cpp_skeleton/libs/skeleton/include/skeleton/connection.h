@@ -0,0 +1,13 @@
+#pragma once
+
+#include <iostream>
+#include <memory>
+#include <string>
+
+namespace pokerbots::skeleton {
+
+// connects to the engine at host:port, or at the Unix domain socket port if it is not a number,
+// returning nullptr if that fails
+std::unique_ptr<std::iostream> connectToEngine(const std::string &host, const std::string &port);
+
+} // namespace pokerbots::skeleton
@@ -0,0 +1,87 @@
+#pragma once
+
+#include <cstddef>
+#include <memory>
+#include <new>
+#include <utility>
+
+namespace pokerbots::skeleton {
+
+// a free list of blocks of one size, carved from chunks which are kept for the life of the thread
+template <std::size_t Size> class BlockPool {
+private:
+  static constexpr std::size_t BLOCKS_PER_CHUNK = 256;
+  static constexpr std::size_t BLOCK_SIZE =
+      (Size + alignof(std::max_align_t) - 1) / alignof(std::max_align_t) * alignof(std::max_align_t);
+
+  struct Block {
+    Block *next;
+  };
+
+  static Block *&head() {
+    thread_local Block *free = nullptr;
+    return free;
+  }
+
+  static void grow() {
+    auto chunk = static_cast<char *>(::operator new(BLOCK_SIZE * BLOCKS_PER_CHUNK));
+    for (std::size_t i = 0; i < BLOCKS_PER_CHUNK; ++i) {
+      release(chunk + i * BLOCK_SIZE);
+    }
+  }
+
+public:
+  static void *acquire() {
+    auto &free = head();
+    if (free == nullptr) {
+      grow();
+    }
+    auto block = free;
+    free = block->next;
+    return block;
+  }
+
+  // a block may be released on another thread than the one it was acquired on
+  static void release(void *pointer) {
+    auto &free = head();
+    auto block = static_cast<Block *>(pointer);
+    block->next = free;
+    free = block;
+  }
+};
+
+// an allocator handing out pooled blocks, so that states stop going to the heap once the pool has warmed up
+template <typename T> struct PoolAllocator {
+  using value_type = T;
+
+  PoolAllocator() = default;
+
+  template <typename U> PoolAllocator(const PoolAllocator<U> &) {}
+
+  T *allocate(std::size_t n) {
+    static_assert(alignof(T) <= alignof(std::max_align_t), "pooled types must not be over-aligned");
+    if (n != 1) {
+      return std::allocator<T>().allocate(n);
+    }
+    return static_cast<T *>(BlockPool<sizeof(T)>::acquire());
+  }
+
+  void deallocate(T *pointer, std::size_t n) {
+    if (n != 1) {
+      std::allocator<T>().deallocate(pointer, n);
+      return;
+    }
+    BlockPool<sizeof(T)>::release(pointer);
+  }
+
+  template <typename U> bool operator==(const PoolAllocator<U> &) const { return true; }
+
+  template <typename U> bool operator!=(const PoolAllocator<U> &) const { return false; }
+};
+
+// std::make_shared from the pool, for states and other objects made once or more per action
+template <typename T, typename... Args> std::shared_ptr<T> makePooled(Args &&... args) {
+  return std::allocate_shared<T>(PoolAllocator<T>(), std::forward<Args>(args)...);
+}
+
+} // namespace pokerbots::skeleton
@@ -1,214 +1,436 @@
 #pragma once
 
+#include <algorithm>
+#include <cctype>
 #include <charconv>
+#include <cstdint>
+#include <cstdlib>
 #include <iostream>
 #include <optional>
 #include <string>
+#include <type_traits>
 #include <utility>
 #include <map>
 
-#include <boost/algorithm/string.hpp>
-#include <boost/asio/ip/tcp.hpp>
-
 #include "actions.h"
+#include "cards.h"
+#include "connection.h"
 #include "constants.h"
 #include "game.h"
+#include "pool.h"
 #include "states.h"
 
 namespace pokerbots::skeleton {
 
-template <typename BotType> class Runner {
+// whether BotType has an optional handleNewGame() hook
+template <typename BotType, typename = void> struct HasHandleNewGame : std::false_type {};
+template <typename BotType>
+struct HasHandleNewGame<BotType, std::void_t<decltype(std::declval<BotType &>().handleNewGame())>>
+    : std::true_type {};
+
+// the engine's offer of the binary framing, see wire.py in the engine for the format
+inline const std::string WIRE_OFFER = "W1";
+
+template <typename BotType, typename Stream = std::iostream> class Runner {
 private:
   BotType pokerbot;
-  boost::asio::ip::tcp::iostream &stream;
+  Stream &stream;
+  GameInfoPtr gameInfo;
+  StatePtr roundState;
+  int active = 0;
+  bool roundFlag = true;
+  bool binary = false;
+  // reused for every message, so that reading one does not allocate once they have grown
+  std::string line;
+  std::string payload;
 
   template <typename Action> void send(Action const& action) {
     stream << action << '\n';
   }
 
-  std::vector<std::string> receive() {
-    std::string line;
-    std::getline(stream, line);
-    boost::algorithm::trim(line);
+  void sendBinary(const char *data, std::size_t size) {
+    char header[2] = {static_cast<char>(size & 0xFF), static_cast<char>(size >> 8)};
+    stream.write(header, 2);
+    stream.write(data, size);
+    stream.flush();
+  }
+
+  void sendBinary(Action const& action) {
+    switch (action.actionType) {
+      case Action::Type::FOLD:
+        return sendBinary("F", 1);
+      case Action::Type::CALL:
+        return sendBinary("C", 1);
+      case Action::Type::CHECK:
+        return sendBinary("K", 1);
+      default: {
+        char raise[3] = {'R', static_cast<char>(action.amount & 0xFF), static_cast<char>((action.amount >> 8) & 0xFF)};
+        return sendBinary(raise, 3);
+      }
+    }
+  }
+
+  // reads one line into line without its trailing whitespace, returning false if the engine disconnected
+  bool receive() {
+    if (!std::getline(stream, line)) {
+      return false;
+    }
+    while (!line.empty() && std::isspace(static_cast<unsigned char>(line.back()))) {
+      line.pop_back();
+    }
+    return true;
+  }
+
+  // reads one framed payload into payload, returning false if the engine disconnected
+  bool receiveBinary() {
+    unsigned char header[2];
+    if (!stream.read(reinterpret_cast<char *>(header), 2)) {
+      return false;
+    }
+    payload.resize(header[0] | (header[1] << 8));
+    return static_cast<bool>(stream.read(payload.data(), payload.size()));
+  }
+
+  static int parseInt(const char *begin, const char *end) {
+    int value = 0;
+    std::from_chars(begin, end, value);
+    return value;
+  }
+
+  // parses comma separated cards like "As,Kd", leaving the rest of cards empty
+  template <std::size_t N> static std::array<Card, N> parseCards(const char *begin, const char *end) {
+    std::array<Card, N> cards;
+    std::size_t count = 0;
+    for (auto position = begin; position + 1 < end && count < N; position += 3) {
+      cards[count++] = Card::parse({position, 2});
+    }
+    return cards;
+  }
+
+  void newGame() {
+    // the engine reuses this connection for another game
+    gameInfo = makePooled<GameInfo>(0, 0.0, 1);
+    roundFlag = true;
+    if constexpr (HasHandleNewGame<BotType>::value) {
+      pokerbot.handleNewGame();
+    }
+  }
+
+  void onTime(double gameClock) {
+    gameInfo = makePooled<GameInfo>(gameInfo->bankroll, gameClock, gameInfo->roundNum);
+  }
+
+  void onHand(std::array<Card, 2> cards) {
+    std::array<std::array<Card, 2>, 2> hands;
+    hands[active] = cards;
+    std::array<Card, 5> deck;
+    std::array<int, 2> pips = {SMALL_BLIND, BIG_BLIND};
+    std::array<int, 2> stacks = {
+        STARTING_STACK - SMALL_BLIND,
+        STARTING_STACK - BIG_BLIND};
+    std::array<char, 2> bounties;
+    roundState = makePooled<RoundState>(
+        0, 0, std::move(pips), std::move(stacks), std::move(hands), std::move(bounties),
+            std::move(deck), nullptr);
+  }
+
+  void onBounty(char bounty) {
+    std::array<char, 2> bounties = {' ', ' '};
+    bounties[active] = bounty;
+    auto maker = std::static_pointer_cast<const RoundState>(roundState);
+    roundState = makePooled<RoundState>(maker->button, maker->street, maker->pips, maker->stacks,
+                                        maker->hands, bounties, maker->deck, maker->previousState);
+    if (roundFlag) {
+      pokerbot.handleNewRound(
+          gameInfo,
+          std::static_pointer_cast<const RoundState>(roundState), active);
+      roundFlag = false;
+    }
+  }
 
-    std::vector<std::string> packet;
-    boost::split(packet, line, boost::is_any_of(" "));
-    return packet;
+  void onAction(Action action) {
+    roundState = std::static_pointer_cast<const RoundState>(roundState)->proceed(action);
+  }
+
+  void onBoard(std::array<Card, 5> revisedDeck) {
+    auto maker = std::static_pointer_cast<const RoundState>(roundState);
+    roundState = makePooled<RoundState>(maker->button, maker->street, maker->pips, maker->stacks,
+                                        maker->hands, maker->bounties, revisedDeck, maker->previousState);
+  }
+
+  void onOpponent(std::array<Card, 2> cards) {
+    // backtrack
+    roundState = std::static_pointer_cast<const TerminalState>(roundState)->previousState;
+    auto maker = std::static_pointer_cast<const RoundState>(roundState);
+    auto revisedHands = maker->hands;
+    revisedHands[1 - active] = cards;
+    // rebuild history
+    roundState = makePooled<RoundState>(maker->button, maker->street, maker->pips, maker->stacks,
+                                        revisedHands, maker->bounties, maker->deck, maker->previousState);
+    roundState = makePooled<TerminalState>(std::array<int, 2>{0, 0}, std::array<bool, 2>{false, false}, roundState);
+  }
+
+  void onDelta(int delta) {
+    std::array<int, 2> deltas;
+    deltas[active] = delta;
+    deltas[1 - active] = -1 * delta;
+    roundState = makePooled<TerminalState>(
+        std::move(deltas),
+        std::array<bool, 2>{false, false},
+        std::static_pointer_cast<const TerminalState>(roundState)
+            ->previousState);
+    gameInfo = makePooled<GameInfo>(
+        gameInfo->bankroll + delta, gameInfo->gameClock, gameInfo->roundNum);
+  }
+
+  void onBountyHits(std::array<bool, 2> bounty_hits) {
+    if(active == 1) std::swap(bounty_hits[0], bounty_hits[1]);
+    roundState = makePooled<TerminalState>(
+        std::static_pointer_cast<const TerminalState>(roundState)->deltas,
+        bounty_hits,
+        std::static_pointer_cast<const TerminalState>(roundState)->previousState);
+    pokerbot.handleRoundOver(
+        gameInfo,
+        std::static_pointer_cast<const TerminalState>(roundState),
+        active);
+    gameInfo = makePooled<GameInfo>(
+        gameInfo->bankroll, gameInfo->gameClock, gameInfo->roundNum + 1);
+    roundFlag = true;
+  }
+
+  // applies one text clause, the code followed by its fields in [begin, end)
+  bool updateClause(char code, const char *begin, const char *end) {
+    switch (code) {
+      case 'T': {
+        // the line is null terminated, so strtod stops at the following space at the latest
+        onTime(std::strtod(begin, nullptr));
+        break;
+      }
+      case 'P': {
+        active = parseInt(begin, end);
+        break;
+      }
+      case 'H': {
+        onHand(parseCards<2>(begin, end));
+        break;
+      }
+      case 'G': {
+        onBounty(begin < end ? *begin : ' ');
+        break;
+      }
+      case 'F': {
+        onAction({Action::Type::FOLD});
+        break;
+      }
+      case 'C': {
+        onAction({Action::Type::CALL});
+        break;
+      }
+      case 'K': {
+        onAction({Action::Type::CHECK});
+        break;
+      }
+      case 'R': {
+        onAction({Action::Type::RAISE, parseInt(begin, end)});
+        break;
+      }
+      case 'B': {
+        onBoard(parseCards<5>(begin, end));
+        break;
+      }
+      case 'O': {
+        onOpponent(parseCards<2>(begin, end));
+        break;
+      }
+      case 'D': {
+        onDelta(parseInt(begin, end));
+        break;
+      }
+      case 'Y': {
+        onBountyHits({end - begin > 0 && begin[0] == '1', end - begin > 1 && begin[1] == '1'});
+        break;
+      }
+      case 'Q': {
+        return false;
+      }
+      default: {
+        break;
+      }
+    }
+    return true;
+  }
+
+  // applies a text line of space separated clauses, returning false once the engine ends the game
+  bool update(const char *begin, const char *end) {
+    while (begin < end) {
+      auto clauseEnd = std::find(begin, end, ' ');
+      if (clauseEnd != begin && !updateClause(*begin, begin + 1, clauseEnd)) {
+        return false;
+      }
+      if (clauseEnd == end) {
+        break;
+      }
+      begin = clauseEnd + 1;
+    }
+    return true;
+  }
+
+  // applies a binary payload, returning false once the engine ends the game
+  bool updateBinary(std::string const& payload) {
+    auto byte = [&payload](std::size_t i) { return static_cast<unsigned char>(payload[i]); };
+    auto card = [&byte](std::size_t i) { return Card(byte(i)); };
+    auto int16 = [&byte](std::size_t i) { return static_cast<int>(static_cast<std::int16_t>(byte(i) | (byte(i + 1) << 8))); };
+    std::size_t i = 0;
+    while (i < payload.size()) {
+      switch (payload[i++]) {
+        case 'T': {
+          auto milliseconds = static_cast<std::int32_t>(static_cast<std::uint32_t>(byte(i)) | (byte(i + 1) << 8) |
+                                                        (byte(i + 2) << 16) | (static_cast<std::uint32_t>(byte(i + 3)) << 24));
+          onTime(milliseconds / 1000.0);
+          i += 4;
+          break;
+        }
+        case 'P': {
+          active = byte(i);
+          i += 1;
+          break;
+        }
+        case 'H': {
+          onHand({card(i), card(i + 1)});
+          i += 2;
+          break;
+        }
+        case 'G': {
+          onBounty(RANKS[byte(i)]);
+          i += 1;
+          break;
+        }
+        case 'F': {
+          onAction({Action::Type::FOLD});
+          break;
+        }
+        case 'C': {
+          onAction({Action::Type::CALL});
+          break;
+        }
+        case 'K': {
+          onAction({Action::Type::CHECK});
+          break;
+        }
+        case 'R': {
+          onAction({Action::Type::RAISE, int16(i)});
+          i += 2;
+          break;
+        }
+        case 'B': {
+          std::array<Card, 5> revisedDeck;
+          auto count = std::min<std::size_t>(byte(i), revisedDeck.size());
+          for (std::size_t j = 0; j < count; ++j) {
+            revisedDeck[j] = card(i + 1 + j);
+          }
+          onBoard(revisedDeck);
+          i += 1 + byte(i);
+          break;
+        }
+        case 'O': {
+          onOpponent({card(i), card(i + 1)});
+          i += 2;
+          break;
+        }
+        case 'D': {
+          onDelta(int16(i));
+          i += 2;
+          break;
+        }
+        case 'Y': {
+          onBountyHits({(byte(i) & 1) != 0, (byte(i) & 2) != 0});
+          i += 1;
+          break;
+        }
+        case 'Q': {
+          return false;
+        }
+        default: {
+          // the framing cannot skip a clause it does not know
+          return true;
+        }
+      }
+    }
+    return true;
+  }
+
+  Action decide() {
+    if (roundFlag) {  // ack the engine
+      return Action {Action::Type::CHECK};
+    }
+    return pokerbot.getAction(gameInfo, std::static_pointer_cast<const RoundState>(roundState), active);
   }
 
 public:
   template <typename... Args>
-  Runner(boost::asio::ip::tcp::iostream &stream, Args... args)
+  Runner(Stream &stream, Args... args)
       : pokerbot(std::forward<Args>(args)...), stream(stream) {}
 
-  ~Runner() { stream.close(); }
-
   void run() {
-    GameInfoPtr gameInfo = std::make_shared<GameInfo>(0, 0.0, 1);
-    std::array<std::array<std::string, 2>, 2> emptyArray;
+    gameInfo = makePooled<GameInfo>(0, 0.0, 1);
+    std::array<std::array<Card, 2>, 2> emptyArray;
     auto emptyBounties = std::array<char, 2>{};
-    std::array<std::string, 5> cardDeck;
-    StatePtr roundState = std::make_shared<RoundState>(
+    std::array<Card, 5> cardDeck;
+    roundState = makePooled<RoundState>(
         0, 0, std::array<int, 2>{0, 0}, std::array<int, 2>{0, 0},
         emptyArray, emptyBounties,
         cardDeck, nullptr);
-    int active = 0;
-    bool roundFlag = true;
     while (true) {
-      auto packet = receive();
-      for (const auto &clause : packet) {
-        auto leftover = clause.substr(1);
-        switch (clause[0]) {
-          case 'T': {
-            gameInfo = std::make_shared<GameInfo>(gameInfo->bankroll, std::stof(leftover), gameInfo->roundNum);
-            break;
-          }
-          case 'P': {
-            active = std::stoi(leftover);
-            break;
-          }
-          case 'H': {
-            std::vector<std::string> cards;
-            boost::split(cards, leftover, boost::is_any_of(","));
-
-            std::array<std::array<std::string, 2>, 2> hands;
-            hands[active][0] = cards[0];
-            hands[active][1] = cards[1];
-            std::array<std::string, 5> deck;
-            std::array<int, 2> pips = {SMALL_BLIND, BIG_BLIND};
-            std::array<int, 2> stacks = {
-                STARTING_STACK - SMALL_BLIND,
-                STARTING_STACK - BIG_BLIND};
-            std::array<char, 2> bounties;
-            roundState = std::make_shared<RoundState>(
-                0, 0, std::move(pips), std::move(stacks), std::move(hands), std::move(bounties), 
-                    std::move(deck), nullptr);
-            break;
-          }
-          case 'G': {
-            std::array<char, 2> bounties = {' ', ' '};
-            bounties[active] = leftover[0];
-            auto maker = std::static_pointer_cast<const RoundState>(roundState);
-            roundState = std::make_shared<RoundState>(maker->button, maker->street, maker->pips, maker->stacks,
-                                                      maker->hands, bounties, maker->deck, maker->previousState);
-            if (roundFlag) {
-              pokerbot.handleNewRound(
-                  gameInfo,
-                  std::static_pointer_cast<const RoundState>(roundState), active);
-              roundFlag = false;
-            }
-            break;
-          }
-          case 'F': {
-            roundState = std::static_pointer_cast<const RoundState>(roundState)->proceed({Action::Type::FOLD});
-            break;
-          }
-          case 'C': {
-            roundState = std::static_pointer_cast<const RoundState>(roundState)->proceed({Action::Type::CALL});
-            break;
-          }
-          case 'K': {
-            roundState = std::static_pointer_cast<const RoundState>(roundState)->proceed({Action::Type::CHECK});
-            break;
-          }
-          case 'R': {
-            roundState = std::static_pointer_cast<const RoundState>(roundState)->proceed({Action::Type::RAISE,
-                                                                                          std::stoi(leftover)});
-            break;
-          }
-          case 'B': {
-            std::vector<std::string> cards;
-            boost::split(cards, leftover, boost::is_any_of(","));
-            std::array<std::string, 5> revisedDeck;
-            for (auto j = 0; j < cards.size(); ++j) {
-              revisedDeck[j] = cards[j];
-            }
-            auto maker = std::static_pointer_cast<const RoundState>(roundState);
-            roundState = std::make_shared<RoundState>(maker->button, maker->street, maker->pips, maker->stacks,
-                                                      maker->hands, maker->bounties, revisedDeck, maker->previousState);
-            break;
-          }
-          case 'O': {
-            // backtrack
-            std::vector<std::string> cards;
-            boost::split(cards, leftover, boost::is_any_of(","));
-            roundState = std::static_pointer_cast<const TerminalState>(roundState)->previousState;
-            auto maker = std::static_pointer_cast<const RoundState>(roundState);
-            auto revisedHands = maker->hands;
-            revisedHands[1 - active] = {cards[0], cards[1]};
-            // rebuild history
-            roundState = std::make_shared<RoundState>(maker->button, maker->street, maker->pips, maker->stacks,
-                                                      revisedHands, maker->bounties, maker->deck, maker->previousState);
-            roundState = std::make_shared<TerminalState>(std::array<int, 2>{0, 0}, std::array<bool, 2>{false, false}, roundState);
-            break;
-          }
-          case 'D': {
-            auto delta = std::stoi(leftover);
-            std::array<int, 2> deltas;
-            deltas[active] = delta;
-            deltas[1 - active] = -1 * delta;
-            roundState = std::make_shared<TerminalState>(
-                std::move(deltas),
-                std::array<bool, 2>{false, false},
-                std::static_pointer_cast<const TerminalState>(roundState)
-                    ->previousState);
-            gameInfo = std::make_shared<GameInfo>(
-                gameInfo->bankroll + delta, gameInfo->gameClock, gameInfo->roundNum);
-            break;
-          }
-          case 'Y': {
-            std::array<bool, 2> bounty_hits = {leftover[0] == '1', leftover[1] == '1'};
-            if(active == 1) std::swap(bounty_hits[0], bounty_hits[1]);
-            roundState = std::make_shared<TerminalState>(
-                std::static_pointer_cast<const TerminalState>(roundState)->deltas,
-                bounty_hits,
-                std::static_pointer_cast<const TerminalState>(roundState)->previousState);
-            pokerbot.handleRoundOver(
-                gameInfo,
-                std::static_pointer_cast<const TerminalState>(roundState),
-                active);
-            gameInfo = std::make_shared<GameInfo>(
-                gameInfo->bankroll, gameInfo->gameClock, gameInfo->roundNum + 1);
-            roundFlag = true;
-            break;
-          }
-          case 'Q': {
-            return;
-          }
-          default: {
-            break;
-          }
+      if (binary) {
+        if (!receiveBinary()) {
+          return;
         }
+        if (payload == "N") {
+          newGame();
+          sendBinary("N", 1);
+          continue;
+        }
+        if (!updateBinary(payload)) {
+          return;
+        }
+        sendBinary(decide());
+        continue;
+      }
+      if (!receive()) {
+        return;
       }
-      if (roundFlag) {
-        send(Action {Action::Type::CHECK});
-      } else {
-        auto action = pokerbot.getAction(gameInfo, std::static_pointer_cast<const RoundState>(roundState), active);
-        send(action);
+      if (line == "N") {
+        newGame();
+        stream << "N\n";
+        continue;
       }
+      if (line == WIRE_OFFER) {
+        // the engine offers the binary framing at connect time, used from the next message on
+        binary = true;
+        stream << WIRE_OFFER << '\n';
+        continue;
+      }
+      if (!update(line.data(), line.data() + line.size())) {
+        return;
+      }
+      send(decide());
     }
   }
 };
 
 template <typename BotType, typename... Args>
 void runBot(std::string &host, std::string &port, Args... args) {
-  boost::asio::ip::tcp::iostream stream;
-  stream.connect(host, port);
-  // set TCP_NODELAY on the stream
-  boost::asio::ip::tcp::no_delay option(true);
-  stream.rdbuf()->socket().set_option(option);
+  auto stream = connectToEngine(host, port);
   if (!stream) {
-    std::cerr << "Unable to connect to " << host << ":" << port << std::endl;
     return;
   }
-
-  auto r = Runner<BotType>(stream, std::forward<Args>(args)...);
+  auto r = Runner<BotType>(*stream, std::forward<Args>(args)...);
   r.run();
 }
 
 inline std::array<std::string, 2> parseArgs(int argc, char *argv[]) {
   std::string host = "localhost";
-  int port;
+  std::string port;
 
   bool host_flag = false;
   for (int i = 1; i < argc; i++) {
@@ -221,11 +443,11 @@ inline std::array<std::string, 2> parseArgs(int argc, char *argv[]) {
       host = arg;
       host_flag = false;
     } else {
-      port = std::stoi(arg);
+      port = arg;  // a port number, or the path of a Unix domain socket
     }
   }
 
-  return {host, std::to_string(port)};
+  return {host, port};
 }
 
 } // namespace pokerbots::skeleton
@@ -1,11 +1,13 @@
 #pragma once
 
+#include <array>
 #include <iostream>
 #include <memory>
-#include <unordered_set>
 
 #include "actions.h"
+#include "cards.h"
 #include "constants.h"
+#include "pool.h"
 
 namespace pokerbots::skeleton {
 
@@ -28,26 +30,27 @@ private:
 
 using StatePtr = std::shared_ptr<const State>;
 
+// states are allocated from a pool and hold cards as bytes, so proceed() does not touch the heap once warmed up
 struct RoundState : public State {
   int button;
   int street;
   std::array<int, 2> pips;
   std::array<int, 2> stacks;
-  std::array<std::array<std::string, 2>, 2> hands;
+  std::array<std::array<Card, 2>, 2> hands;
   std::array<char, 2> bounties;
-  std::array<std::string, 5> deck;
+  std::array<Card, 5> deck;
   StatePtr previousState;
 
   RoundState(int button, int street, std::array<int, 2> pips, std::array<int, 2> stacks,
-             std::array<std::array<std::string, 2>, 2> hands, std::array<char, 2> bounties,
-             std::array<std::string, 5> deck, StatePtr previousState)
+             std::array<std::array<Card, 2>, 2> hands, std::array<char, 2> bounties,
+             std::array<Card, 5> deck, StatePtr previousState)
       : button(button), street(street), pips(std::move(pips)), stacks(std::move(stacks)),
         hands(std::move(hands)), bounties(std::move(bounties)), deck(std::move(deck)),
         previousState(std::move(previousState)) {}
 
   StatePtr showdown() const;
 
-  std::unordered_set<Action::Type> legalActions() const;
+  ActionSet legalActions() const;
 
   std::array<int, 2> raiseBounds() const;
 
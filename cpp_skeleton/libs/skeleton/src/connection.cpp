@@ -0,0 +1,34 @@
+#include "skeleton/connection.h"
+
+#include <algorithm>
+#include <cctype>
+
+#include <boost/asio/ip/tcp.hpp>
+#include <boost/asio/local/stream_protocol.hpp>
+
+namespace pokerbots::skeleton {
+
+std::unique_ptr<std::iostream> connectToEngine(const std::string &host, const std::string &port) {
+  if (!std::all_of(port.begin(), port.end(), [](char c) { return std::isdigit(c); })) {
+    // the engine passed the path of a Unix domain socket rather than a port
+    auto stream = std::make_unique<boost::asio::local::stream_protocol::iostream>();
+    stream->connect(boost::asio::local::stream_protocol::endpoint(port));
+    if (!*stream) {
+      std::cerr << "Unable to connect to " << port << std::endl;
+      return nullptr;
+    }
+    return stream;
+  }
+  auto stream = std::make_unique<boost::asio::ip::tcp::iostream>();
+  stream->connect(host, port);
+  if (!*stream) {
+    std::cerr << "Unable to connect to " << host << ":" << port << std::endl;
+    return nullptr;
+  }
+  // set TCP_NODELAY on the stream
+  boost::asio::ip::tcp::no_delay option(true);
+  stream->rdbuf()->socket().set_option(option);
+  return stream;
+}
+
+} // namespace pokerbots::skeleton
@@ -8,27 +8,24 @@
 namespace pokerbots::skeleton {
 
 StatePtr RoundState::showdown() const {
-  return std::make_shared<TerminalState>(std::array<int, 2>{0, 0}, std::array<bool, 2>{false, false}, getShared());
+  return makePooled<TerminalState>(std::array<int, 2>{0, 0}, std::array<bool, 2>{false, false}, getShared());
 }
 
-std::unordered_set<Action::Type> RoundState::legalActions() const {
+ActionSet RoundState::legalActions() const {
   auto active = getActive(button);
   auto continueCost = pips[1-active] - pips[active];
   if (continueCost == 0) {
     // we can only raise the stakes if both players can afford it
     auto betsForbidden = stacks[0] == 0 || stacks[1] == 0;
-    return betsForbidden ? std::unordered_set<Action::Type>{Action::Type::CHECK, Action::Type::FOLD}
-                         : std::unordered_set<Action::Type>{
-                               Action::Type::CHECK, Action::Type::RAISE, Action::Type::FOLD};
+    return betsForbidden ? ActionSet{Action::Type::CHECK, Action::Type::FOLD}
+                         : ActionSet{Action::Type::CHECK, Action::Type::RAISE, Action::Type::FOLD};
   }
   // continueCost > 0
   // similarly, re-raising is only allowed if both players can afford it
   auto raisesForbidden = continueCost == stacks[active] || stacks[1-active] == 0;
   return raisesForbidden
-             ? std::unordered_set<Action::Type>{Action::Type::FOLD,
-                                                Action::Type::CALL}
-             : std::unordered_set<Action::Type>{
-                   Action::Type::FOLD, Action::Type::CALL, Action::Type::RAISE};
+             ? ActionSet{Action::Type::FOLD, Action::Type::CALL}
+             : ActionSet{Action::Type::FOLD, Action::Type::CALL, Action::Type::RAISE};
 }
 
 std::array<int, 2> RoundState::raiseBounds() const {
@@ -44,7 +41,7 @@ StatePtr RoundState::proceedStreet() const {
     return this->showdown();
   }
   auto newStreet = street == 0 ? 3 : street + 1;
-  return std::make_shared<RoundState>(1, newStreet, std::array<int, 2>{0, 0}, stacks, hands, bounties, deck, getShared());
+  return makePooled<RoundState>(1, newStreet, std::array<int, 2>{0, 0}, stacks, hands, bounties, deck, getShared());
 }
 
 StatePtr RoundState::proceed(Action action) const {
@@ -52,11 +49,11 @@ StatePtr RoundState::proceed(Action action) const {
   switch (action.actionType) {
     case Action::Type::FOLD: {
       auto delta = active == 0 ? stacks[0] - STARTING_STACK : STARTING_STACK - stacks[1];
-      return std::make_shared<TerminalState>(std::array<int, 2>{delta, -1 * delta}, get_bounty_hits(), getShared());
+      return makePooled<TerminalState>(std::array<int, 2>{delta, -1 * delta}, get_bounty_hits(), getShared());
     }
     case Action::Type::CALL: {
       if (button == 0) {  // sb calls bb
-        return std::make_shared<RoundState>(
+        return makePooled<RoundState>(
             1, 0, std::array<int, 2>{BIG_BLIND, BIG_BLIND},
             std::array<int, 2>{STARTING_STACK - BIG_BLIND,
                                STARTING_STACK - BIG_BLIND},
@@ -68,7 +65,7 @@ StatePtr RoundState::proceed(Action action) const {
       auto contribution = newPips[1-active] - newPips[active];
       newStacks[active] = newStacks[active] - contribution;
       newPips[active] = newPips[active] + contribution;
-      auto state = std::make_shared<RoundState>(button + 1, street, std::move(newPips), std::move(newStacks),
+      auto state = makePooled<RoundState>(button + 1, street, std::move(newPips), std::move(newStacks),
                                                 hands, bounties, deck, getShared());
       return state->proceedStreet();
     }
@@ -77,7 +74,7 @@ StatePtr RoundState::proceed(Action action) const {
         return this->proceedStreet();
       }
       // let opponent act
-      return std::make_shared<RoundState>(button + 1, street, pips, stacks, hands, bounties, deck, getShared());
+      return makePooled<RoundState>(button + 1, street, pips, stacks, hands, bounties, deck, getShared());
     }
     default: {  // Action::Type::RAISE
       auto newPips = pips;
@@ -85,7 +82,7 @@ StatePtr RoundState::proceed(Action action) const {
       auto contribution = action.amount - newPips[active];
       newStacks[active] = newStacks[active] - contribution;
       newPips[active] = newPips[active] + contribution;
-      return std::make_shared<RoundState>(button + 1, street, std::move(newPips), std::move(newStacks), hands, bounties, deck, getShared());
+      return makePooled<RoundState>(button + 1, street, std::move(newPips), std::move(newStacks), hands, bounties, deck, getShared());
     }
   }
 }
@@ -104,28 +101,15 @@ std::array<bool, 2> RoundState::get_bounty_hits() const
             - First boolean indicates if Player 1's bounty was hit
             - Second boolean indicates if Player 2's bounty was hit
     */
-    std::vector<char> cards0, cards1;
-    try
+    std::array<bool, 2> bounty_hits = {false, false};
+    for(int player = 0; player < 2; player ++)
     {
+        // the opponent's hole cards are empty unless they were shown, and never match
         for(int i = 0; i < 2; i ++)
-            cards0.push_back(this->hands[0][i][0]);
+            bounty_hits[player] = bounty_hits[player] || this->hands[player][i].rankName() == this->bounties[player];
+        for(int i = 0; i < this->street; i ++)
+            bounty_hits[player] = bounty_hits[player] || this->deck[i].rankName() == this->bounties[player];
     }
-    catch(const std::exception &e) {}
-    try
-    {
-        for(int i = 0; i < 2; i ++)
-            cards1.push_back(this->hands[1][i][0]);
-    }
-    catch(const std::exception &e) {}
-    for(int i = 0; i < this->street; i ++)
-    {
-        cards0.push_back(this->deck[i][0]);
-        cards1.push_back(this->deck[i][0]);
-    }
-    std::array<bool, 2> bounty_hits = {
-        std::find(cards0.begin(), cards0.end(), this->bounties[0]) != cards0.end(), 
-        std::find(cards1.begin(), cards1.end(), this->bounties[1]) != cards1.end() 
-    };
     return bounty_hits;
 }
 
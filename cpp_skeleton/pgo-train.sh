@@ -0,0 +1,56 @@
+#!/bin/bash
+# Usage: bash pgo-train.sh
+# Records a profile of the bot in pgo/ for build.sh's pgo profile, then builds with it. The bot is
+# built instrumented and plays PGO_ROUNDS rounds (default 500) against itself, in the engine at
+# ENGINE_DIR (default ..). Training takes far longer than the engine's BUILD_TIMEOUT, so run this
+# by hand and commit pgo/ with the bot, and again whenever the bot's code changes.
+set -e
+
+PGO_ROUNDS=${PGO_ROUNDS:-500}
+BOT_DIR=$PWD
+
+if ! ENGINE_DIR=$(cd "${ENGINE_DIR:-..}" 2> /dev/null && pwd) || [ ! -f "$ENGINE_DIR/engine.py" ]; then
+    echo "No engine.py in ${ENGINE_DIR:-the parent directory} to train with, set ENGINE_DIR" >&2
+    exit 1
+fi
+
+rm -rf pgo
+mkdir -p pgo
+bash build.sh instrument
+
+# both seats run the instrumented build, which the engine must not rebuild
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+mkdir "$WORK_DIR/bot"
+cat > "$WORK_DIR/bot/commands.json" << EOF
+{
+    "build": [],
+    "run": ["$BOT_DIR/build/pokerbot"]
+}
+EOF
+cat > "$WORK_DIR/config.py" << EOF
+exec(open("$ENGINE_DIR/config.py").read())
+PLAYER_1_PATH = "$WORK_DIR/bot"
+PLAYER_2_PATH = "$WORK_DIR/bot"
+NUM_ROUNDS = $PGO_ROUNDS
+BUILD_CACHE_DIR = None
+TELEMETRY = False
+EOF
+# the engine reads config.py from the working directory, ahead of its own
+if ! (cd "$WORK_DIR" && python3 -c \
+        'import runpy, sys; engine_dir = sys.argv.pop(1); sys.path.insert(1, engine_dir); runpy.run_path(engine_dir + "/engine.py", run_name="__main__")' \
+        "$ENGINE_DIR" > "$BOT_DIR/build/pgo-train.log"); then
+    echo "Training failed, see build/pgo-train.log" >&2
+fi
+
+# only the merged profile is kept, as it is all that clang reads
+if compgen -G "pgo/*.profraw" > /dev/null; then
+    llvm-profdata merge -output=pgo/default.profdata pgo/*.profraw
+    rm -f pgo/*.profraw
+fi
+if [ -z "$(find pgo -name '*.gcda' -o -name default.profdata)" ]; then
+    echo "No profile was recorded" >&2
+    exit 1
+fi
+bash build.sh pgo
+echo "Recorded a profile in pgo/, commit it with the bot and build with the pgo profile"
@@ -38,7 +38,7 @@ struct Bot {
     auto previousState = std::static_pointer_cast<const RoundState>(terminalState->previousState);  // RoundState before payoffs
     // int street = previousState->street;  // 0, 3, 4, or 5 representing when this round ended 
     // auto myCards = previousState->hands[active];  // your cards 
-    // auto oppCards = previousState->hands[1-active];  // opponent's cards or "" if not revealed 
+    // auto oppCards = previousState->hands[1-active];  // opponent's cards, empty Cards if not revealed 
     
     bool myBountyHit = terminalState->bounty_hits[active];  // true if your bounty hit this round
     bool oppBountyHit = terminalState->bounty_hits[1-active];  // true if your opponent's bounty hit this round
@@ -69,8 +69,8 @@ struct Bot {
     auto legalActions =
         roundState->legalActions(); // the actions you are allowed to take
     int street = roundState->street;  // 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
-    auto myCards = roundState->hands[active];  // your cards 
-    auto boardCards = roundState->deck;  // the board cards 
+    auto myCards = roundState->hands[active];  // your cards, each a Card with rank() and suit() (or .str() for a name like "As")
+    auto boardCards = roundState->deck;  // the board cards, empty Cards past the current street
     int myPip = roundState->pips[active];  // the number of chips you have contributed to the pot this round of betting 
     int oppPip = roundState->pips[1-active]; // the number of chips your opponent has contributed to the pot this round of betting 
     int myStack = roundState->stacks[active];  // the number of chips you have remaining 
@@ -0,0 +1,88 @@
+'''
+Sequential stopping rules, which end a match once its result is statistically decided.
+'''
+import math
+
+
+class SequentialTest():
+    '''
+    A two-sided sequential probability ratio test on the first player's bankroll deltas.
+
+    It weighs H0, that the first player wins h0 chips per observation on average, against
+    H1, that it wins h1, and against H2, that it wins as much less than h0 as h1 is more,
+    so that either player can be found the better one. The deltas are treated as normal with
+    the variance of the sample so far, which makes the log-likelihood ratio of an alternative
+    a to H0 after n observations with mean m equal to n (a - h0) (2 m - h0 - a) / (2 variance).
+
+    Following Sobel and Wald, this runs one test of H0 against each alternative on the same
+    observations, each with half of alpha. A test accepts its alternative once its ratio
+    reaches log((1 - beta) / (alpha / 2)), and H0 once it falls to log(beta / (1 - alpha / 2)).
+    The match is decided as soon as either test accepts its alternative, or once both accept
+    H0. The two alternatives cannot both be accepted, and alpha and beta bound the chances
+    of naming a winner of an even match and of missing a winner.
+
+    The mean and variance are kept with Welford's update, in constant memory. No
+    decision is taken within the first min_observations, while the variance is unsettled.
+    '''
+
+    def __init__(self, h0, h1, alpha, beta, min_observations):
+        self.h0 = h0
+        self.h1 = h1
+        self.h2 = 2 * h0 - h1
+        self.lower = math.log(beta / (1 - alpha / 2))
+        self.upper = math.log((1 - beta) / (alpha / 2))
+        self.min_observations = min_observations
+        self.count = 0
+        self.mean = 0.
+        self.sum_squares = 0.
+        # the log-likelihood ratios of H1 and H2 to H0
+        self.llrs = [0., 0.]
+        self.decision = None
+
+    def variance(self):
+        '''
+        Returns the sample variance of the observations, or 0 with fewer than two.
+        '''
+        return self.sum_squares / (self.count - 1) if self.count > 1 else 0.
+
+    def update(self, delta):
+        '''
+        Adds one observation, and returns the accepted hypothesis, 'H0', 'H1' or 'H2', or None while undecided.
+        '''
+        self.count += 1
+        difference = delta - self.mean
+        self.mean += difference / self.count
+        self.sum_squares += difference * (delta - self.mean)
+        variance = self.variance()
+        if variance > 0:
+            self.llrs = [self.count * (alternative - self.h0) * (2 * self.mean - self.h0 - alternative) / (2 * variance)
+                         for alternative in (self.h1, self.h2)]
+        if self.decision is None and self.count >= self.min_observations and variance > 0:
+            if self.llrs[0] >= self.upper:
+                self.decision = 'H1'
+            elif self.llrs[1] >= self.upper:
+                self.decision = 'H2'
+            elif max(self.llrs) <= self.lower:
+                self.decision = 'H0'
+        return self.decision
+
+    def summary(self, names, unit):
+        '''
+        Describes the state of the test, for both players' names and the unit of an observation.
+
+        The verdict is followed by the observed mean, so that the size of the difference
+        reads alongside the decision.
+        '''
+        if self.decision == 'H1':
+            verdict = 'H1 accepted, {} wins {:g} rather than {:g} chips per {}'.format(names[0], self.h1, self.h0, unit)
+        elif self.decision == 'H2':
+            verdict = 'H2 accepted, {} wins {:g} rather than {:g} chips per {}'.format(names[1], 0. - self.h2, 0. - self.h0, unit)
+        elif self.decision == 'H0':
+            verdict = 'H0 accepted, {} wins {:g} rather than {:g} or {:g} chips per {}'.format(
+                names[0], self.h0, self.h1, self.h2, unit)
+        else:
+            verdict = 'undecided'
+        standard_error = math.sqrt(self.variance() / self.count) if self.count else 0.
+        return 'SPRT {}; after {} {}s {} {} {:.2f} +/- {:.2f} chips per {}, LLRs {:.2f} and {:.2f} in ({:.2f}, {:.2f})'.format(
+            verdict, self.count, unit, names[0], 'wins' if self.mean >= 0 else 'loses', abs(self.mean), standard_error,
+            unit, self.llrs[0], self.llrs[1], self.lower, self.upper)
@@ -3,20 +3,39 @@
 DO NOT REMOVE, RENAME, OR EDIT THIS FILE
 '''
 from collections import namedtuple
+from contextlib import redirect_stdout, contextmanager, asynccontextmanager
 from threading import Thread
-from queue import Queue
+import traceback
+import tempfile
+import shutil
+import asyncio
+import importlib
 import time
 import math
 import json
+import hashlib
 import subprocess
+import signal
 import socket
 import eval7
 import sys
+import argparse
 import os
 import random
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # builds are not locked where flock is unavailable, such as on Windows
+
 sys.path.append(os.getcwd())
 from config import *
+from gamelog import GameLog, PlayerLog, RoundRecord, RECORD_LOGS
+from buildcache import BuildCache
+from telemetry import Telemetry
+from profiler import SamplingProfiler
+from earlystop import SequentialTest
+import wire
 
 FoldAction = namedtuple('FoldAction', [])
 CallAction = namedtuple('CallAction', [])
@@ -31,6 +50,44 @@ CCARDS = lambda cards: ','.join(map(str, cards))
 PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards)))
 PVALUE = lambda name, value: ', {} ({})'.format(name, value)
 STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
+BUILD_CACHE = BuildCache(BUILD_CACHE_DIR, BUILD_CACHE_EXCLUDE) if BUILD_CACHE_DIR is not None else None
+RANK_NAMES = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+# hands and boards are summarized as 13-bit rank masks, bit i set if rank RANK_NAMES[i] is present
+RANK_BITS = {rank: 1 << index for index, rank in enumerate(RANK_NAMES)}
+# the rank masks of one round: each player's hand, the board by street, and each player's bounty rank
+RankMasks = namedtuple('RankMasks', ['hands', 'boards', 'bounties'])
+# pokerbot output is read from its pipe in chunks of up to this many bytes
+OUTPUT_CHUNK_SIZE = 65536
+
+
+def rank_mask(cards):
+    '''
+    Returns the rank mask of a list of cards.
+    '''
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.rank
+    return mask
+
+
+def round_rank_masks(hands, deck, bounties):
+    '''
+    Precomputes the RankMasks of a round once its cards are dealt.
+    '''
+    boards = [0]
+    for card in deck.peek(5):
+        boards.append(boards[-1] | 1 << card.rank)
+    return RankMasks((rank_mask(hands[0]), rank_mask(hands[1])), tuple(boards),
+                     (RANK_BITS.get(bounties[0], 0), RANK_BITS.get(bounties[1], 0)))
+
+
+def round_rng(seed, purpose, round_num):
+    '''
+    Returns a random number generator derived from the match seed for one purpose in one round.
+
+    String seeds are hashed with SHA-512, so every round can be reproduced on its own.
+    '''
+    return random.Random('{}:{}:{}'.format(seed, purpose, round_num))
 
 # Socket encoding scheme:
 #
@@ -55,7 +112,7 @@ STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 # Action history is sent once, including the player's actions
 
 
-class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks', 'hands', 'deck', 'bounties', 'previous_state'])):
+class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks', 'hands', 'deck', 'bounties', 'previous_state', 'rank_masks'])):
     '''
     Encodes the game tree for one round of poker.
     '''
@@ -72,25 +129,25 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
                 - First boolean indicates if Player 1's bounty was hit
                 - Second boolean indicates if Player 2's bounty was hit
         '''
-        cards0 = self.hands[0] + ([] if self.street == 0 else self.deck.peek(self.street))
-        cards1 = self.hands[1] + ([] if self.street == 0 else self.deck.peek(self.street))
-        cardNames = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-        return (self.bounties[0] in [cardNames[card.rank] for card in cards0],
-                self.bounties[1] in [cardNames[card.rank] for card in cards1])
+        hands, boards, bounties = self.rank_masks
+        board = boards[self.street]
+        return (bool((hands[0] | board) & bounties[0]), bool((hands[1] | board) & bounties[1]))
 
-    def get_delta(self, winner_index: int) -> int:
+    def get_delta(self, winner_index: int, bounty_hits=None) -> int:
         '''Returns the delta after bounty rules are applied.
 
         Args:
             winner_index (int): Index of the winning player. Must be 0 (player A),
                 1 (player B), or 2 (split pot).
+            bounty_hits (tuple[bool, bool], optional): The result of get_bounty_hits,
+                if the caller already has it.
 
         Returns:
             int: The delta value after applying bounty rules.
         '''
         assert winner_index in [0, 1, 2]
 
-        bounty_hit_0, bounty_hit_1 = self.get_bounty_hits()
+        bounty_hit_0, bounty_hit_1 = self.get_bounty_hits() if bounty_hits is None else bounty_hits
 
         delta = 0
         if winner_index == 2:
@@ -143,15 +200,16 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         score0 = eval7.evaluate(self.deck.peek(5) + self.hands[0])
         score1 = eval7.evaluate(self.deck.peek(5) + self.hands[1])
         assert(self.stacks[0] == self.stacks[1])
+        bounty_hits = self.get_bounty_hits()
         if score0 > score1:
-            delta = self.get_delta(0)
+            delta = self.get_delta(0, bounty_hits)
         elif score0 < score1:
-            delta = self.get_delta(1)
+            delta = self.get_delta(1, bounty_hits)
         else:
             # split the pot
-            delta = self.get_delta(2)
+            delta = self.get_delta(2, bounty_hits)
         
-        return TerminalState([int(delta), -int(delta)], self.get_bounty_hits(), self)
+        return TerminalState([int(delta), -int(delta)], bounty_hits, self)
 
     def legal_actions(self):
         '''
@@ -185,7 +243,7 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         if self.street == 5:
             return self.showdown()
         new_street = 3 if self.street == 0 else self.street + 1
-        return RoundState(1, new_street, [0, 0], self.stacks, self.hands, self.deck, self.bounties, self)
+        return RoundState(1, new_street, [0, 0], self.stacks, self.hands, self.deck, self.bounties, self, self.rank_masks)
 
     def proceed(self, action):
         '''
@@ -212,31 +270,32 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         '''
         active = self.button % 2
         if isinstance(action, FoldAction):
-            delta = self.get_delta((1 - active) % 2) # if active folds, the other player (1 - active) wins
-            return TerminalState([delta, -delta], self.get_bounty_hits(), self)
+            bounty_hits = self.get_bounty_hits()
+            delta = self.get_delta((1 - active) % 2, bounty_hits) # if active folds, the other player (1 - active) wins
+            return TerminalState([delta, -delta], bounty_hits, self)
         if isinstance(action, CallAction):
             if self.button == 0:  # sb calls bb
-                return RoundState(1, 0, [BIG_BLIND] * 2, [STARTING_STACK - BIG_BLIND] * 2, self.hands, self.deck, self.bounties, self)
+                return RoundState(1, 0, [BIG_BLIND] * 2, [STARTING_STACK - BIG_BLIND] * 2, self.hands, self.deck, self.bounties, self, self.rank_masks)
             # both players acted
             new_pips = list(self.pips)
             new_stacks = list(self.stacks)
             contribution = new_pips[1-active] - new_pips[active]
             new_stacks[active] -= contribution
             new_pips[active] += contribution
-            state = RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.bounties, self)
+            state = RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.bounties, self, self.rank_masks)
             return state.proceed_street()
         if isinstance(action, CheckAction):
             if (self.street == 0 and self.button > 0) or self.button > 1:  # both players acted
                 return self.proceed_street()
             # let opponent act
-            return RoundState(self.button + 1, self.street, self.pips, self.stacks, self.hands, self.deck, self.bounties, self)
+            return RoundState(self.button + 1, self.street, self.pips, self.stacks, self.hands, self.deck, self.bounties, self, self.rank_masks)
         # isinstance(action, RaiseAction)
         new_pips = list(self.pips)
         new_stacks = list(self.stacks)
         contribution = action.amount - new_pips[active]
         new_stacks[active] -= contribution
         new_pips[active] += contribution
-        return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.bounties, self)
+        return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self.bounties, self, self.rank_masks)
 
 
 class Player():
@@ -244,19 +303,23 @@ class Player():
     Handles subprocess and socket interactions with one player's pokerbot.
     '''
 
-    def __init__(self, name, path):
+    def __init__(self, name, path, log_dir='.'):
         self.name = name
         self.path = path
+        self.log_dir = log_dir
         self.game_clock = STARTING_GAME_CLOCK
         self.bankroll = 0
         self.commands = None
+        self.build_key = None
+        self.last_latency = None
         self.bot_subprocess = None
         self.socketfile = None
-        self.bytes_queue = Queue()
+        self.binary = False
+        self.log = PlayerLog(log_dir, name, PLAYER_LOG_SIZE_LIMIT, PLAYER_LOG_BACKUPS, GAME_LOG_FLUSH_INTERVAL)
 
-    def build(self):
+    def load_commands(self):
         '''
-        Loads the commands file and builds the pokerbot.
+        Loads and checks the pokerbot's commands file.
         '''
         try:
             with open(self.path + '/commands.json', 'r') as json_file:
@@ -271,50 +334,106 @@ class Player():
             print(self.name, 'commands.json not found - check PLAYER_PATH')
         except json.decoder.JSONDecodeError:
             print(self.name, 'commands.json misformatted')
-        if self.commands is not None and len(self.commands['build']) > 0:
+
+    def build(self):
+        '''
+        Loads the commands file and builds the pokerbot.
+        '''
+        self.load_commands()
+        if self.commands is None or len(self.commands['build']) == 0:
+            return
+        with build_lock(self.path):
+            if self.restore_build():
+                return
             try:
-                proc = subprocess.run(self.commands['build'],
-                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                      cwd=self.path, timeout=BUILD_TIMEOUT, check=False)
-                self.bytes_queue.put(proc.stdout)
-            except subprocess.TimeoutExpired as timeout_expired:
-                error_message = 'Timed out waiting for ' + self.name + ' to build'
-                print(error_message)
-                self.bytes_queue.put(timeout_expired.stdout)
-                self.bytes_queue.put(error_message.encode())
+                # in its own session, so that a timeout also stops whatever the build started
+                proc = subprocess.Popen(self.commands['build'],
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        cwd=self.path, start_new_session=True)
+                try:
+                    outs, _ = proc.communicate(timeout=BUILD_TIMEOUT)
+                    self.log.write(outs)
+                    self.save_build(proc.returncode, outs)
+                except subprocess.TimeoutExpired:
+                    error_message = 'Timed out waiting for ' + self.name + ' to build'
+                    print(error_message)
+                    kill_process_group(proc)
+                    outs, _ = proc.communicate()
+                    self.log.write(outs)
+                    self.log.write(error_message.encode())
+                    self.save_build(proc.returncode, outs)
             except (TypeError, ValueError):
                 print(self.name, 'build command misformatted')
             except OSError:
                 print(self.name, 'build failed - check "build" in commands.json')
 
+    def restore_build(self):
+        '''
+        Looks the pokerbot's sources up in the build cache, and restores the outputs of
+        an earlier build of identical sources. Returns whether the build can be skipped.
+        '''
+        self.build_key = None
+        if BUILD_CACHE is None:
+            return False
+        try:
+            self.build_key = BUILD_CACHE.key(self.path, self.commands['build'])
+            build_output = BUILD_CACHE.restore(self.build_key, self.path)
+        except OSError:
+            print(self.name, 'build cache lookup failed')
+            self.build_key = None
+            return False
+        if build_output is None:
+            return False
+        self.log.write(build_output)
+        print(self.name, 'build restored from cache')
+        return True
+
+    def save_build(self, returncode, build_output):
+        '''
+        Adds the outputs of a successful build to the build cache.
+
+        After a failed build, any outputs restored from the cache by an earlier run are
+        removed, so that the pokerbot fails to run instead of running stale code.
+        '''
+        if self.build_key is None:
+            return
+        try:
+            if returncode == 0:
+                BUILD_CACHE.forget(self.path)
+                BUILD_CACHE.store(self.build_key, self.path, build_output)
+            elif BUILD_CACHE.discard(self.path):
+                print(self.name, 'build failed, removed outputs restored from cache')
+        except OSError:
+            print(self.name, 'could not update build cache')
+
     def run(self):
         '''
         Runs the pokerbot and establishes the socket connection.
         '''
         if self.commands is not None and len(self.commands['run']) > 0:
             try:
-                server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                with server_socket:
-                    server_socket.bind(('', 0))
+                with bot_server() as (server_socket, address):
                     server_socket.settimeout(CONNECT_TIMEOUT)
                     server_socket.listen()
-                    port = server_socket.getsockname()[1]
-                    proc = subprocess.Popen(self.commands['run'] + [str(port)],
+                    proc = subprocess.Popen(self.commands['run'] + [address],
                                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                             cwd=self.path)
                     self.bot_subprocess = proc
                     # function for bot listening
-                    def enqueue_output(out, queue):
+                    def capture_output(out, log):
                         try:
-                            for line in out:
-                                if self.path == r"./player_chatbot":
+                            if self.path == r"./player_chatbot":
+                                for line in out:
                                     print(line.strip().decode("utf-8"))
-                                else:
-                                    queue.put(line)
+                            else:
+                                # whatever the pipe holds goes straight to disk, a chunk at a time
+                                for chunk in iter(lambda: out.read1(OUTPUT_CHUNK_SIZE), b''):
+                                    log.write(chunk)
+                                    log.flush()
                         except ValueError:
                             pass
                     # start a separate bot listening thread which dies with the program
-                    Thread(target=enqueue_output, args=(proc.stdout, self.bytes_queue), daemon=True).start()
+                    Thread(target=capture_output, args=(proc.stdout, self.log), daemon=True).start()
                     # block until we timeout or the player connects
                     client_socket, _ = server_socket.accept()
                     with client_socket:
@@ -322,7 +441,7 @@ class Player():
                             client_socket.settimeout(PLAYER_TIMEOUT)
                         else:
                             client_socket.settimeout(CONNECT_TIMEOUT)
-                        sock = client_socket.makefile('rw')
+                        sock = client_socket.makefile('rwb')
                         self.socketfile = sock
                         print(self.name, 'connected successfully')
             except (TypeError, ValueError):
@@ -338,7 +457,7 @@ class Player():
         '''
         if self.socketfile is not None:
             try:
-                self.socketfile.write('Q\n')
+                self.socketfile.write(wire.encode('Q') if self.binary else b'Q\n')
                 self.socketfile.close()
             except socket.timeout:
                 print('Timed out waiting for', self.name, 'to disconnect')
@@ -350,21 +469,159 @@ class Player():
                     outs, _ = self.bot_subprocess.communicate(timeout=PLAYER_TIMEOUT)
                 else:
                     outs, _ = self.bot_subprocess.communicate(timeout=CONNECT_TIMEOUT)
-                self.bytes_queue.put(outs)
+                self.log.write(outs)
             except subprocess.TimeoutExpired:
                 print('Timed out waiting for', self.name, 'to quit')
                 self.bot_subprocess.kill()
                 outs, _ = self.bot_subprocess.communicate()
-                self.bytes_queue.put(outs)
-        with open(self.name + '.txt', 'wb') as log_file:
-            bytes_written = 0
-            for output in self.bytes_queue.queue:
-                try:
-                    bytes_written += log_file.write(output)
-                    if bytes_written >= PLAYER_LOG_SIZE_LIMIT:
-                        break
-                except TypeError:
-                    pass
+                self.log.write(outs)
+        self.save_log()
+
+    def save_log(self):
+        '''
+        Closes the pokerbot's log file, which its output has been streamed to.
+        '''
+        self.log.close()
+
+    def reopen_log(self):
+        '''
+        Starts a new log file for the pokerbot's next game, under its current name and log directory.
+        '''
+        self.log.reopen(self.log_dir, self.name)
+
+    def new_game(self):
+        '''
+        Starts another game with a pokerbot kept running since its last one.
+
+        The engine sends the clause N, which a pokerbot supporting reuse answers with N once
+        it has reset its state. Returns whether it did.
+        '''
+        self.game_clock = STARTING_GAME_CLOCK
+        self.bankroll = 0
+        if not self.is_connected():
+            return False
+        try:
+            return self.request('N\n') == 'N'
+        except OSError:
+            return False
+
+    def is_connected(self):
+        '''
+        Returns whether the pokerbot can currently be queried.
+        '''
+        return self.socketfile is not None
+
+    def request(self, message):
+        '''
+        Sends one encoded message to the pokerbot and returns its response clause.
+
+        Messages and responses are text lines, framed in binary on the wire once negotiate_binary succeeds.
+        '''
+        if self.binary:
+            self.socketfile.write(wire.encode(message))
+            self.socketfile.flush()
+            return wire.decode(wire.read(self.socketfile))
+        self.socketfile.write(message.encode())
+        self.socketfile.flush()
+        return self.socketfile.readline().decode(errors='replace').strip()
+
+    def negotiate_binary(self):
+        '''
+        Offers the binary framing of the protocol to the pokerbot and returns whether it is in use.
+
+        The offer is the clause W<version>, to which a pokerbot supporting that version replies
+        with the same clause. Older skeletons ignore unknown clauses and reply K, which keeps
+        the text protocol. Only socket connections are framed; in-process pokerbots are not.
+        '''
+        if self.socketfile is None or self.binary:
+            return self.binary
+        try:
+            self.binary = self.request(wire.OFFER + '\n') == wire.OFFER
+        except OSError:
+            pass
+        return self.binary
+
+    def negotiate(self, tables):
+        '''
+        Offers the multi-table protocol to the pokerbot and returns how many tables it accepts.
+
+        The offer is the clause M<tables>, to which a pokerbot supporting the protocol replies
+        with M<count>. Older skeletons ignore unknown clauses and reply K, which means one table.
+        '''
+        if not self.is_connected():
+            return 1
+        try:
+            return self.accepted_tables(self.request('M' + str(tables) + '\n'), tables)
+        except OSError:
+            return 1
+
+    @staticmethod
+    def accepted_tables(response, tables):
+        '''
+        Returns how many tables a pokerbot accepts with its response to an offer of tables.
+        '''
+        try:
+            if response[:1] == 'M':
+                return max(1, min(tables, int(response[1:])))
+        except ValueError:
+            pass
+        return 1
+
+    def decode(self, clause, round_state, game_log):
+        '''
+        Converts a response clause into a legal action.
+
+        A missing (None), illegal or misformatted clause is replaced by CheckAction if it
+        is legal and FoldAction otherwise; the latter two are logged.
+        '''
+        legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
+        if clause is not None:
+            try:
+                action = DECODE[clause[0]]
+                if action in legal_actions:
+                    if clause[0] == 'R':
+                        amount = int(clause[1:])
+                        min_raise, max_raise = round_state.raise_bounds()
+                        if min_raise <= amount <= max_raise:
+                            return action(amount)
+                    else:
+                        return action()
+                game_log.append(self.name + ' attempted illegal ' + action.__name__)
+            except (IndexError, KeyError, ValueError):
+                game_log.append(self.name + ' response misformatted: ' + str(clause))
+        return CheckAction() if CheckAction in legal_actions else FoldAction()
+
+    def timed_request(self, message, game_logs):
+        '''
+        Sends a message and returns the response, charging the round trip to the game clock.
+
+        Returns None if the pokerbot runs out of time or disconnects, which is logged to
+        every one of game_logs.
+        '''
+        try:
+            start_time = time.perf_counter()
+            response = self.request(message)
+            end_time = time.perf_counter()
+            self.last_latency = end_time - start_time
+            if ENFORCE_GAME_CLOCK and self.path != r"./player_chatbot":
+                self.game_clock -= self.last_latency
+            if self.game_clock <= 0.:
+                raise socket.timeout
+            return response
+        except socket.timeout:
+            self.fail(self.name + ' ran out of time', game_logs)
+        except OSError:
+            self.fail(self.name + ' disconnected', game_logs)
+        return None
+
+    def fail(self, error_message, game_logs):
+        '''
+        Reports a pokerbot which timed out or disconnected, and stops querying it.
+        '''
+        for game_log in game_logs:
+            game_log.append(error_message)
+        print(error_message)
+        self.game_clock = 0.
 
     def query(self, round_state, player_message, game_log):
         '''
@@ -378,7 +635,7 @@ class Player():
             round_state (RoundState or TerminalState): The current state of the game.
             player_message (list): Messages to be sent to the player bot, including game state
                 information like time remaining, player position, and cards.
-            game_log (list): A list to store game events and error messages.
+            game_log (GameLog): The game log, which receives error messages.
 
         Returns:
             Action: One of FoldAction, CallAction, CheckAction, or RaiseAction representing
@@ -392,61 +649,546 @@ class Player():
             - Bot disconnections or timeouts result in game clock being set to 0
             - At the end of a round, only CheckAction is considered legal
         '''
-        legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
-        if self.socketfile is not None and self.game_clock > 0.:
-            clause = ''
+        clause = None
+        self.last_latency = None
+        if self.is_connected() and self.game_clock > 0.:
+            player_message[0] = 'T{:.3f}'.format(self.game_clock)
+            message = ' '.join(player_message) + '\n'
+            del player_message[1:]  # do not send redundant action history
+            clause = self.timed_request(message, [game_log])
+        return self.decode(clause, round_state, game_log)
+
+    def query_batch(self, requests):
+        '''
+        Requests actions on several tables at once, using the multi-table protocol.
+
+        Each request is a (table_id, round_state, player_message, game_log) tuple. The tables'
+        messages are sent as one line, each prefixed by its #<table_id> clause, and the
+        pokerbot answers with one #<table_id> clause and one action clause per table.
+        The whole round trip is charged to the game clock once.
+
+        Returns a list of actions in the order of the requests, with the same defaults as query.
+        '''
+        response = None
+        self.last_latency = None
+        if self.is_connected() and self.game_clock > 0.:
+            response = self.timed_request(self.batch_message(requests), [request[3] for request in requests])
+        return self.decode_batch(requests, response)
+
+    def batch_message(self, requests):
+        '''
+        Builds the message of a multi-table request, one #<table_id> clause and one table's message per request.
+        '''
+        parts = []
+        for table_id, _, player_message, _ in requests:
+            player_message[0] = 'T{:.3f}'.format(self.game_clock)
+            parts.append('#' + str(table_id) + ' ' + ' '.join(player_message))
+            del player_message[1:]  # do not send redundant action history
+        return ' '.join(parts) + '\n'
+
+    def decode_batch(self, requests, response):
+        '''
+        Splits the response to a multi-table request by table, and converts each table's clause into a legal action.
+        '''
+        clauses = {}
+        if response is not None:
+            for table_id, _, _, _ in requests:
+                clauses[table_id] = ''  # a table missing from the response is misformatted
+            table_id = None
+            for clause in response.split(' '):
+                if clause[:1] == '#':
+                    table_id = int(clause[1:]) if clause[1:].isdigit() else None
+                elif table_id in clauses:
+                    clauses[table_id] = clause
+        return [self.decode(clauses.get(table_id), round_state, game_log)
+                for table_id, round_state, _, game_log in requests]
+
+
+def kill_process_group(proc):
+    '''
+    Kills a process started in a new session, along with every process it started in turn.
+    '''
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.kill()
+
+
+def open_build_lock(path):
+    '''
+    Opens the lock file guarding builds of the pokerbot at path, or returns None if builds are not locked.
+
+    The file is kept in the temporary directory under a hash of the pokerbot's absolute path,
+    so every engine process on the machine agrees on it.
+    '''
+    if fcntl is None:
+        return None
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    return open(os.path.join(tempfile.gettempdir(), 'pokerbots-build-' + digest + '.lock'), 'w')
+
+
+@contextmanager
+def build_lock(path):
+    '''
+    Holds the build lock of the pokerbot at path, so that engines started together, such as
+    tournament workers, take turns building it in its one source directory.
+    '''
+    lock_file = open_build_lock(path)
+    if lock_file is None:
+        yield
+        return
+    with lock_file:  # closing the file releases the lock
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+@asynccontextmanager
+async def build_lock_async(path):
+    '''
+    Holds the build lock of the pokerbot at path like build_lock, waiting for it without blocking the event loop.
+
+    Each holder opens the file anew, and flock locks of separate opens exclude each other
+    even within one process, so concurrent games in one event loop take turns as well.
+    '''
+    lock_file = open_build_lock(path)
+    if lock_file is None:
+        yield
+        return
+    with lock_file:
+        await asyncio.get_running_loop().run_in_executor(None, fcntl.flock, lock_file, fcntl.LOCK_EX)
+        yield
+
+
+@contextmanager
+def bot_server():
+    '''
+    Opens the listening socket which a pokerbot connects to, using the configured TRANSPORT.
+
+    Yields the socket and the address argument passed to the pokerbot: a port number for
+    TCP, or the path of a Unix domain socket, which is removed afterwards.
+    '''
+    if TRANSPORT == 'unix':
+        socket_dir = tempfile.mkdtemp(prefix='pokerbots-')
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_socket:
+                address = os.path.join(socket_dir, 'bot.sock')
+                server_socket.bind(address)
+                yield server_socket, address
+        finally:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+    else:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
+            server_socket.bind(('', 0))
+            yield server_socket, str(server_socket.getsockname()[1])
+
+
+def load_bot_module(path):
+    '''
+    Imports a Python pokerbot's player module along with its own copy of the skeleton.
+
+    Returns the pokerbot's Player class and its skeleton's Runner class.
+    '''
+    # each bot ships its own skeleton, so hide any previously imported one during the import
+    shadowed = {}
+    for module_name in list(sys.modules):
+        if module_name in ('player', 'skeleton') or module_name.startswith('skeleton.'):
+            shadowed[module_name] = sys.modules.pop(module_name)
+    sys.path.insert(0, path)
+    try:
+        player_module = importlib.import_module('player')
+        runner_module = importlib.import_module('skeleton.runner')
+        return player_module.Player, runner_module.Runner
+    finally:
+        sys.path.remove(path)
+        for module_name in list(sys.modules):
+            if module_name in ('player', 'skeleton') or module_name.startswith('skeleton.'):
+                del sys.modules[module_name]
+        sys.modules.update(shadowed)
+
+
+class LocalPlayer(Player):
+    '''
+    Runs a Python pokerbot inside the engine process, without sockets or subprocesses.
+
+    The pokerbot's own skeleton Runner decodes the same messages a socket would carry,
+    so the RoundState it sees and the game clock it is charged are unchanged. It shares
+    the engine's working directory, which is never changed, so it must find its files
+    from its module's path rather than relative to its own directory.
+    '''
+
+    def __init__(self, name, path, log_dir='.'):
+        super().__init__(name, path, log_dir)
+        self.bot_class = None
+        self.runner_class = None
+        self.runner = None
+
+    def build(self):
+        '''
+        Imports the pokerbot's player module and skeleton.
+        '''
+        try:
+            self.bot_class, self.runner_class = load_bot_module(self.path)
+        except Exception:
+            print(self.name, 'import failed - check player.py')
+            self.log.write(traceback.format_exc())
+
+    def run(self):
+        '''
+        Instantiates the pokerbot and attaches it to its skeleton Runner.
+        '''
+        if self.bot_class is not None:
             try:
-                player_message[0] = 'T{:.3f}'.format(self.game_clock)
-                message = ' '.join(player_message) + '\n'
-                del player_message[1:]  # do not send redundant action history
-                start_time = time.perf_counter()
-                self.socketfile.write(message)
-                self.socketfile.flush()
-                clause = self.socketfile.readline().strip()
-                end_time = time.perf_counter()
-                if ENFORCE_GAME_CLOCK and self.path != r"./player_chatbot":
-                    self.game_clock -= end_time - start_time
-                if self.game_clock <= 0.:
-                    raise socket.timeout
-                action = DECODE[clause[0]]
-                if action in legal_actions:
-                    if clause[0] == 'R':
-                        amount = int(clause[1:])
-                        min_raise, max_raise = round_state.raise_bounds()
-                        if min_raise <= amount <= max_raise:
-                            return action(amount)
-                    else:
-                        return action()
-                game_log.append(self.name + ' attempted illegal ' + action.__name__)
-            except socket.timeout:
-                error_message = self.name + ' ran out of time'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
+                with redirect_stdout(self.log):
+                    self.runner = self.runner_class(self.bot_class(), None)
+                print(self.name, 'loaded successfully')
+            except Exception:
+                print(self.name, 'failed to start')
+                self.log.write(traceback.format_exc())
+
+    def stop(self):
+        '''
+        Ends the game for the pokerbot and saves its output.
+        '''
+        if self.runner is not None:
+            try:
+                with redirect_stdout(self.log):
+                    self.runner.handle([b'Q'])
+            except Exception:
+                self.log.write(traceback.format_exc())
+            self.runner = None
+        self.save_log()
+
+    def is_connected(self):
+        '''
+        Returns whether the pokerbot can currently be queried.
+        '''
+        return self.runner is not None
+
+    def request(self, message):
+        '''
+        Hands one encoded message to the pokerbot's Runner and returns its response.
+        '''
+        try:
+            with redirect_stdout(self.log):
+                return self.runner.handle(message.encode().split())
+        except Exception:
+            # a crashed bot behaves like one that dropped its socket connection
+            self.log.write(traceback.format_exc())
+            self.runner = None
+            raise OSError
+
+
+class BotConnection(asyncio.Protocol):
+    '''
+    Receives a pokerbot's responses, stamping each with the time it arrived.
+
+    Responses are text lines, or binary frames once binary is set, and are queued as the
+    text clauses they stand for. The timestamp is taken when the event loop reads the data,
+    which is earlier than when the coroutine waiting for the response resumes. Time the loop
+    spends elsewhere before it polls the socket is still charged to the pokerbot's game clock.
+    '''
+
+    def __init__(self):
+        self.transport = None
+        self.buffer = b''
+        self.binary = False
+        self.responses = asyncio.Queue()
+        self.connected = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connected.set_result(True)
+
+    def data_received(self, data):
+        arrival_time = time.perf_counter()
+        self.buffer += data
+        while True:
+            if self.binary:
+                if len(self.buffer) < wire.LENGTH.size:
+                    break
+                end = wire.LENGTH.size + wire.LENGTH.unpack_from(self.buffer)[0]
+                if len(self.buffer) < end:
+                    break
+                response = wire.decode(self.buffer[wire.LENGTH.size:end])
+                self.buffer = self.buffer[end:]
+            else:
+                if b'\n' not in self.buffer:
+                    break
+                line, _, self.buffer = self.buffer.partition(b'\n')
+                response = line.decode(errors='replace').strip()
+            self.responses.put_nowait((response, arrival_time))
+
+    def connection_lost(self, exc):
+        self.responses.put_nowait((None, time.perf_counter()))
+
+
+class AsyncPlayer(Player):
+    '''
+    Handles the subprocess and socket of one pokerbot with asyncio, so that a single
+    process can drive many games at once.
+
+    The pokerbot sees exactly the same protocol as with Player. Each request is charged
+    from the moment it is written to the moment its response arrives.
+    '''
+
+    def __init__(self, name, path, log_dir='.'):
+        super().__init__(name, path, log_dir)
+        self.connection = None
+        self.output_task = None
+
+    async def build_async(self):
+        '''
+        Loads the commands file and builds the pokerbot.
+        '''
+        self.load_commands()
+        if self.commands is None or len(self.commands['build']) == 0:
+            return
+        async with build_lock_async(self.path):
+            if self.restore_build():
+                return
+            try:
+                proc = await asyncio.create_subprocess_exec(*self.commands['build'],
+                                                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                            cwd=self.path, start_new_session=True)
+                try:
+                    outs, _ = await asyncio.wait_for(proc.communicate(), BUILD_TIMEOUT)
+                    self.log.write(outs)
+                    self.save_build(proc.returncode, outs)
+                except asyncio.TimeoutError:
+                    error_message = 'Timed out waiting for ' + self.name + ' to build'
+                    print(error_message)
+                    kill_process_group(proc)
+                    outs, _ = await proc.communicate()
+                    self.log.write(outs)
+                    self.log.write(error_message.encode())
+                    self.save_build(proc.returncode, outs)
+            except (TypeError, ValueError):
+                print(self.name, 'build command misformatted')
             except OSError:
-                error_message = self.name + ' disconnected'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
-            except (IndexError, KeyError, ValueError):
-                game_log.append(self.name + ' response misformatted: ' + str(clause))
-        return CheckAction() if CheckAction in legal_actions else FoldAction()
+                print(self.name, 'build failed - check "build" in commands.json')
 
+    async def capture_output(self, stream):
+        '''
+        Streams the pokerbot's output to its log until it exits.
+        '''
+        while True:
+            chunk = await stream.read(OUTPUT_CHUNK_SIZE)
+            if not chunk:
+                break
+            self.log.write(chunk)
+            self.log.flush()
 
-class Game():
+    async def run_async(self):
+        '''
+        Runs the pokerbot and waits for its socket connection.
+        '''
+        if self.commands is not None and len(self.commands['run']) > 0:
+            connection = BotConnection()
+            try:
+                with bot_server() as (server_socket, address):
+                    # only the pokerbot's first connection is served
+                    server = await asyncio.get_running_loop().create_server(
+                        lambda: asyncio.Protocol() if connection.connected.done() else connection, sock=server_socket)
+                    try:
+                        proc = await asyncio.create_subprocess_exec(*self.commands['run'], address,
+                                                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                                    cwd=self.path)
+                        self.bot_subprocess = proc
+                        self.output_task = asyncio.ensure_future(self.capture_output(proc.stdout))
+                        await asyncio.wait_for(connection.connected, CONNECT_TIMEOUT)
+                    finally:
+                        server.close()
+                self.connection = connection
+                print(self.name, 'connected successfully')
+            except (TypeError, ValueError):
+                print(self.name, 'run command misformatted')
+            except asyncio.TimeoutError:
+                print('Timed out waiting for', self.name, 'to connect')
+            except OSError:
+                print(self.name, 'run failed - check "run" in commands.json')
+
+    async def stop_async(self):
+        '''
+        Closes the socket connection and stops the pokerbot.
+        '''
+        if self.connection is not None:
+            self.connection.transport.write(wire.encode('Q') if self.binary else b'Q\n')
+            self.connection.transport.close()
+            self.connection = None
+        if self.bot_subprocess is not None:
+            try:
+                await asyncio.wait_for(self.bot_subprocess.wait(), CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                print('Timed out waiting for', self.name, 'to quit')
+                self.bot_subprocess.kill()
+                await self.bot_subprocess.wait()
+        if self.output_task is not None:
+            await self.output_task
+        self.save_log()
+
+    def is_connected(self):
+        '''
+        Returns whether the pokerbot can currently be queried.
+        '''
+        return self.connection is not None
+
+    async def request_async(self, message):
+        '''
+        Sends one encoded message to the pokerbot, framed like Player.request.
+
+        Returns its response clause and the seconds from sending the message to receiving the response.
+        '''
+        start_time = time.perf_counter()
+        self.connection.transport.write(wire.encode(message) if self.binary else message.encode())
+        timeout = min(CONNECT_TIMEOUT, self.game_clock) if ENFORCE_GAME_CLOCK else CONNECT_TIMEOUT
+        response, arrival_time = await asyncio.wait_for(self.connection.responses.get(), timeout)
+        if response is None:
+            self.connection = None
+            raise ConnectionResetError
+        return response, arrival_time - start_time
+
+    async def negotiate_binary_async(self):
+        '''
+        Offers the binary framing of the protocol to the pokerbot, like Player.negotiate_binary.
+        '''
+        if self.connection is None or self.binary:
+            return self.binary
+        try:
+            response, _ = await self.request_async(wire.OFFER + '\n')
+            # the pokerbot frames everything after its answer
+            self.binary = self.connection.binary = response == wire.OFFER
+        except (asyncio.TimeoutError, OSError):
+            pass
+        return self.binary
+
+    async def negotiate_async(self, tables):
+        '''
+        Offers the multi-table protocol to the pokerbot, like Player.negotiate.
+        '''
+        if not self.is_connected():
+            return 1
+        try:
+            response, _ = await self.request_async('M' + str(tables) + '\n')
+            return self.accepted_tables(response, tables)
+        except (asyncio.TimeoutError, OSError):
+            return 1
+
+    async def timed_request_async(self, message, game_logs):
+        '''
+        Sends a message and returns the response, charging the round trip to the game clock, like Player.timed_request.
+        '''
+        try:
+            response, self.last_latency = await self.request_async(message)
+            if ENFORCE_GAME_CLOCK:
+                self.game_clock -= self.last_latency
+            if self.game_clock <= 0.:
+                raise asyncio.TimeoutError
+            return response
+        except asyncio.TimeoutError:
+            self.fail(self.name + ' ran out of time', game_logs)
+        except OSError:
+            self.fail(self.name + ' disconnected', game_logs)
+        return None
+
+    async def query_async(self, round_state, player_message, game_log):
+        '''
+        Requests one action from the pokerbot, like Player.query.
+        '''
+        clause = None
+        self.last_latency = None
+        if self.is_connected() and self.game_clock > 0.:
+            player_message[0] = 'T{:.3f}'.format(self.game_clock)
+            message = ' '.join(player_message) + '\n'
+            del player_message[1:]  # do not send redundant action history
+            clause = await self.timed_request_async(message, [game_log])
+        return self.decode(clause, round_state, game_log)
+
+    async def query_batch_async(self, requests):
+        '''
+        Requests actions on several tables at once, like Player.query_batch.
+        '''
+        response = None
+        self.last_latency = None
+        if self.is_connected() and self.game_clock > 0.:
+            response = await self.timed_request_async(self.batch_message(requests), [request[3] for request in requests])
+        return self.decode_batch(requests, response)
+
+
+def make_player(name, path, log_dir='.'):
     '''
-    Manages logging and the high-level game procedure.
+    Creates the Player which will interact with the pokerbot at path.
+    '''
+    if IN_PROCESS_BOTS and path != r"./player_chatbot" and os.path.isfile(path + '/player.py'):
+        return LocalPlayer(name, path, log_dir)
+    return Player(name, path, log_dir)
+
+
+class PlayerPool():
+    '''
+    Keeps pokerbots running between games, so that each is built and started only once.
+
+    Idle pokerbots are matched to games by path. One which declines to start a new game,
+    such as a pokerbot with an older skeleton, is stopped and replaced by a fresh one.
     '''
 
     def __init__(self):
-        self.log = ['6.9630 MIT Pokerbots - ' + PLAYER_1_NAME + ' vs ' + PLAYER_2_NAME]
+        self.idle = {}
+
+    def acquire(self, name, path, log_dir='.'):
+        '''
+        Returns a running Player for the pokerbot at path, reusing an idle one when possible.
+        '''
+        idle = self.idle.get(path, [])
+        while idle:
+            player = idle.pop()
+            player.name = name
+            player.log_dir = log_dir
+            player.reopen_log()
+            if player.new_game():
+                return player
+            player.stop()
+        player = make_player(name, path, log_dir)
+        player.build()
+        player.run()
+        return player
+
+    def release(self, player):
+        '''
+        Saves the output of a finished game and keeps the pokerbot for the next one, if it is still connected.
+        '''
+        if player.is_connected():
+            player.save_log()
+            self.idle.setdefault(player.path, []).append(player)
+        else:
+            player.stop()
+
+    def close(self):
+        '''
+        Stops every idle pokerbot.
+        '''
+        for players in self.idle.values():
+            for player in players:
+                player.stop()
+        self.idle = {}
+
+
+class Table():
+    '''
+    Holds the log lines and player messages of the round being played at one table.
+    '''
+
+    def __init__(self, table_id, log, names):
+        self.table_id = table_id
+        self.log = log
+        self.round_num = 0
+        self.last_code = None
         self.player_messages = [[], []]
-        self.preflop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.flop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.turn_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.ev_preflop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.ev_flop_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
-        self.ev_turn_bets = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
+        self.preflop_bets = {names[0]: 0, names[1]: 0}
+        self.flop_bets = {names[0]: 0, names[1]: 0}
+        self.turn_bets = {names[0]: 0, names[1]: 0}
 
     def log_round_state(self, players, round_state):
         '''
@@ -497,15 +1239,17 @@ class Game():
             phrasing = (' bets ' if bet_override else ' raises to ') + str(action.amount)
             code = 'R' + str(action.amount)
         self.log.append(name + phrasing)
+        self.last_code = code
         self.player_messages[0].append(code)
         self.player_messages[1].append(code)
+        return code
 
     def log_terminal_state(self, players, round_state):
         '''
         Incorporates TerminalState information into the game log and player messages.
         '''
         previous_state = round_state.previous_state
-        if not self.log[-1].endswith(' folds'):
+        if self.last_code != 'F':
             self.log.append('{} shows {}'.format(players[0].name, PCARDS(previous_state.hands[0])))
             self.log.append('{} shows {}'.format(players[1].name, PCARDS(previous_state.hands[1])))
             self.player_messages[0].append('O' + CCARDS(previous_state.hands[1]))
@@ -533,37 +1277,231 @@ class Game():
         self.player_messages[0].append('Y' + hit_chars[0] + hit_chars[1])
         self.player_messages[1].append('Y' + hit_chars[1] + hit_chars[0])
 
-    def run_round(self, players, bounties):
+class Game():
+    '''
+    Manages logging and the high-level game procedure.
+    '''
+
+    def __init__(self, names=(PLAYER_1_NAME, PLAYER_2_NAME), paths=(PLAYER_1_PATH, PLAYER_2_PATH),
+                 seed=SEED, duplicate=DUPLICATE_MODE, log_dir='.', early_stop=EARLY_STOP):
+        self.names = names
+        self.paths = paths
+        self.seed = random.SystemRandom().getrandbits(64) if seed is None else seed
+        self.duplicate = duplicate
+        self.log_dir = log_dir
+        log_filename = os.path.normpath(os.path.join(log_dir, GAME_LOG_FILENAME))
+        self.log = GameLog(log_filename + '.txt' if 'text' in GAME_LOG_FORMATS else None,
+                           GAME_LOG_COMPRESSION, GAME_LOG_BUFFER_SIZE, GAME_LOG_FLUSH_INTERVAL)
+        self.record_logs = [RECORD_LOGS[log_format][1](log_filename + RECORD_LOGS[log_format][0], names,
+                                                       GAME_LOG_BUFFER_SIZE, GAME_LOG_FLUSH_INTERVAL)
+                            for log_format in GAME_LOG_FORMATS if log_format in RECORD_LOGS]
+        self.log.append('6.9630 MIT Pokerbots - ' + names[0] + ' vs ' + names[1])
+        self.log.append('Seed ' + str(self.seed) + (' (duplicate)' if duplicate else ''))
+        self.ev_preflop_bets = {names[0]: 0, names[1]: 0}
+        self.ev_flop_bets = {names[0]: 0, names[1]: 0}
+        self.ev_turn_bets = {names[0]: 0, names[1]: 0}
+        self.telemetry = Telemetry(log_filename + '.metrics.json', names, NUM_ROUNDS,
+                                   TELEMETRY_INTERVAL) if TELEMETRY else None
+        self.rounds_played = 0
+        # in duplicate mode the test observes whole deals, so a deal's two rounds are never split
+        deal_size = 2 if duplicate else 1
+        self.sprt = SequentialTest(SPRT_H0 * deal_size, SPRT_H1 * deal_size, SPRT_ALPHA, SPRT_BETA,
+                                   SPRT_MIN_ROUNDS // deal_size) if early_stop else None
+
+    def log_round_record(self, round_num, players, round_state, actions):
+        '''
+        Writes the structured record of a finished round to the record logs.
+        '''
+        previous_state = round_state.previous_state
+        street = previous_state.street
+        record = RoundRecord(round_num, [player.name for player in players],
+                             [bounty if bounty in RANK_BITS else None for bounty in previous_state.bounties],
+                             [list(map(str, hand)) for hand in previous_state.hands],
+                             list(map(str, previous_state.deck.peek(street))) if street > 0 else [],
+                             actions, list(round_state.deltas), list(round_state.bounty_hits),
+                             street, actions[-1][1] != 'F')
+        for record_log in self.record_logs:
+            record_log.write(record)
+
+    def play_round(self, table, players, bounties, round_num, deal_num):
         '''
-        Runs one round of poker.
+        Plays one round of poker at a table, dealing the cards of the given deal number.
+
+        This is a generator: whenever a player must be queried it yields the tuple
+        (player, round_state, player_message), and expects that player's action to be sent back.
+        It returns the deltas of the seats.
         '''
         deck = eval7.Deck()
-        deck.shuffle()
+        round_rng(self.seed, 'deal', deal_num).shuffle(deck.cards)
         hands = [deck.deal(2), deck.deal(2)]
         pips = [SMALL_BLIND, BIG_BLIND]
         stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
-        round_state = RoundState(0, 0, pips, stacks, hands, deck, bounties, None)
+        round_state = RoundState(0, 0, pips, stacks, hands, deck, bounties, None, round_rank_masks(hands, deck, bounties))
+        actions = []
         while not isinstance(round_state, TerminalState):
-            self.log_round_state(players, round_state)
+            table.log_round_state(players, round_state)
             active = round_state.button % 2
             player = players[active]
-            action = player.query(round_state, self.player_messages[active], self.log)
+            action = yield player, round_state, table.player_messages[active]
             bet_override = (round_state.pips == [0, 0])
-            self.log_action(player.name, action, bet_override)
+            actions.append([active, table.log_action(player.name, action, bet_override)])
             round_state = round_state.proceed(action)
-        self.log_terminal_state(players, round_state)
+        table.log_terminal_state(players, round_state)
+        if self.record_logs:
+            self.log_round_record(round_num, players, round_state, actions)
         for i in range(len(players)):
             multiplier = 1 if round_state.deltas[i] > 0 else (0 if round_state.deltas[i] == 0 else -1)
-            self.ev_preflop_bets[players[i].name] += multiplier * self.preflop_bets[players[i].name]
-            self.ev_flop_bets[players[i].name] += multiplier * self.flop_bets[players[i].name]
-            self.ev_turn_bets[players[i].name] += multiplier * self.turn_bets[players[i].name]
-        for player, player_message, delta in zip(players, self.player_messages, round_state.deltas):
-            player.query(round_state, player_message, self.log)
+            self.ev_preflop_bets[players[i].name] += multiplier * table.preflop_bets[players[i].name]
+            self.ev_flop_bets[players[i].name] += multiplier * table.flop_bets[players[i].name]
+            self.ev_turn_bets[players[i].name] += multiplier * table.turn_bets[players[i].name]
+        for player, player_message, delta in zip(players, table.player_messages, round_state.deltas):
+            yield player, round_state, player_message
             player.bankroll += delta
+        return round_state.deltas
 
-    def run(self):
+    def play_table(self, table, players, round_nums):
+        '''
+        Plays a contiguous run of rounds at a table, yielding queries like play_round.
+
+        Seats alternate with the parity of the round number, so every table agrees with
+        a single-table game on who holds the button in a given round. The run ends early
+        once the game's sequential test is decided.
+        '''
+        bounties = [-1, -1]  # indexed like players, not like the seats
+        for round_num in round_nums:
+            # in duplicate mode, each even round replays the previous deal with the seats swapped,
+            # so bounties stay with the cards and are only reset on the first round of a deal
+            replay = self.duplicate and round_num % 2 == 0
+            if not replay:
+                if self.sprt is not None and self.sprt.decision is not None:
+                    return
+                deal_delta = 0
+            table.round_num = round_num
+            seats = players if round_num % 2 == 1 else players[::-1]
+            table.log.append('')
+            table.log.append('Round #' + str(round_num) + STATUS(seats))
+            deal_num = (round_num + 1) // 2 if self.duplicate else round_num
+            if self.duplicate:
+                bounty_reset = not replay and (round_num % ROUNDS_PER_BOUNTY == 1 or (round_num + 1) % ROUNDS_PER_BOUNTY == 1)
+            else:
+                bounty_reset = round_num % ROUNDS_PER_BOUNTY == 1
+            # a table which starts mid-game draws its own bounties
+            bounty_reset = bounty_reset or (round_num == round_nums[0] and round_num > 1)
+            seat_bounties = bounties if round_num % 2 == 1 else bounties[::-1]
+            if bounty_reset:
+                bounty_rng = round_rng(self.seed, 'bounty', round_num)
+                seat_bounties = [RANK_NAMES[bounty_rng.randint(0, 12)], RANK_NAMES[bounty_rng.randint(0, 12)]]
+                bounties = seat_bounties if round_num % 2 == 1 else seat_bounties[::-1]
+                table.log.append(f"Bounties reset to {seat_bounties[0]} for player {seats[0].name} and {seat_bounties[1]} for player {seats[1].name}")
+            deltas = yield from self.play_round(table, seats, seat_bounties[::-1] if replay else seat_bounties, round_num, deal_num)
+            table.log.append('Winning counts at the end of the round: ' + STATUS(seats))
+            self.rounds_played += 1
+            deal_delta += deltas[0] if round_num % 2 == 1 else deltas[1]
+            if self.sprt is not None and (replay or not self.duplicate):
+                self.observe_deal(deal_delta)
+            if self.telemetry is not None:
+                self.telemetry.end_round(round_num, seats)
+            if table.log is not self.log:
+                for line in table.log:
+                    self.log.append(line)
+                del table.log[:]
+
+    def observe_deal(self, delta):
+        '''
+        Adds the first player's bankroll delta over one deal to the sequential test, announcing its decision.
+        '''
+        if self.sprt.decision is None and self.sprt.update(delta) is not None:
+            print('Stopping early,', self.sprt_summary())
+
+    def sprt_summary(self):
+        '''
+        Describes the state of the game's sequential test.
+        '''
+        return self.sprt.summary(self.names, 'deal' if self.duplicate else 'round')
+
+    def record_latency(self, player, table, round_state, action, latency):
+        '''
+        Adds one response of a player to the telemetry, if it is collected and the player was queried.
+        '''
+        if self.telemetry is not None and latency is not None:
+            street = round_state.street if isinstance(round_state, RoundState) else None
+            self.telemetry.record(player.name, table.round_num, street, type(action).__name__[:-len('Action')], latency)
+
+    def table_rounds(self, tables):
+        '''
+        Splits the rounds of the game into one contiguous run per table.
+
+        In duplicate mode every run has an even length, so no deal is split across tables.
+        '''
+        size = -(-NUM_ROUNDS // tables)
+        if self.duplicate:
+            size += size % 2
+        return [range(first, min(first + size, NUM_ROUNDS + 1)) for first in range(1, NUM_ROUNDS + 1, size)]
+
+    def play_tables(self, players, tables):
+        '''
+        Plays every round of the game, interleaving the tables, and yields batched queries.
+
+        Each player is sent one batched query covering every table waiting on it, then the
+        other player is, and so on until all tables are done. A query is the player and its
+        requests for query_batch, and the list of actions must be sent back.
+        '''
+        waiting = {}
+        for table_id, round_nums in enumerate(self.table_rounds(tables)):
+            table = Table(table_id, [], self.names)
+            rounds = self.play_table(table, players, round_nums)
+            waiting[table_id] = (table, rounds, next(rounds))
+        turn = 0
+        while waiting:
+            player = players[turn]
+            turn = 1 - turn
+            batch = [waiting[table_id] for table_id in waiting if waiting[table_id][2][0] is player]
+            if not batch:
+                continue
+            actions = yield player, [(table.table_id, query[1], query[2], table.log) for table, _, query in batch]
+            # the round trip is shared by every decision in the batch
+            latency = None if player.last_latency is None else player.last_latency / len(batch)
+            for (table, rounds, query), action in zip(batch, actions):
+                self.record_latency(player, table, query[1], action, latency)
+                try:
+                    waiting[table.table_id] = (table, rounds, rounds.send(action))
+                except StopIteration:
+                    del waiting[table.table_id]
+
+    def log_final(self, players):
+        '''
+        Logs the final bankrolls and bet EVs, and returns the players in their final seat order.
+        '''
+        if self.rounds_played % 2 == 1:
+            players = players[::-1]
+        self.log.append('')
+        self.log.append('Final' + STATUS(players))
+        if self.sprt is not None:
+            self.log.append('Played {} of {} rounds, {}'.format(self.rounds_played, NUM_ROUNDS, self.sprt_summary()))
+        for player in players:
+            self.log.append('{} preflop bets EV: {}'.format(player.name, self.ev_preflop_bets[player.name]))
+            self.log.append('{} flop bets EV: {}'.format(player.name, self.ev_flop_bets[player.name]))
+            self.log.append('{} turn bets EV: {}'.format(player.name, self.ev_turn_bets[player.name]))
+        return players
+
+    def close_logs(self):
+        '''
+        Writes out and closes the game log, record logs and telemetry.
         '''
-        Runs one game of poker.
+        for log in [self.log] + self.record_logs:
+            if log.filename is not None:
+                print('Writing', log.filename)
+            log.close()
+        if self.telemetry is not None:
+            print('Writing', self.telemetry.filename)
+            self.telemetry.close()
+
+    def run(self, pool=None):
+        '''
+        Runs one game of poker and returns the final bankroll of each player by name.
+
+        Given a PlayerPool, the pokerbots are taken from it and returned to it afterwards
+        instead of being built, started and stopped for this game alone.
         '''
         print('   __  _____________  ___       __           __        __    ')
         print('  /  |/  /  _/_  __/ / _ \\___  / /_____ ____/ /  ___  / /____')
@@ -571,39 +1509,158 @@ class Game():
         print('/_/  /_/___/ /_/   /_/   \\___/_/\\_\\\\__/_/ /_.__/\\___/\\__/___/')
         print()
         print('Starting the Pokerbots engine...')
+        if pool is None:
+            players = [
+                make_player(self.names[0], self.paths[0], self.log_dir),
+                make_player(self.names[1], self.paths[1], self.log_dir)
+            ]
+            for player in players:
+                player.build()
+            for player in players:
+                player.run()
+        else:
+            players = [
+                pool.acquire(self.names[0], self.paths[0], self.log_dir),
+                pool.acquire(self.names[1], self.paths[1], self.log_dir)
+            ]
+        if BINARY_PROTOCOL:
+            for player in players:
+                player.negotiate_binary()
+        tables = 1
+        if NUM_TABLES > 1:
+            tables = min(player.negotiate(NUM_TABLES) for player in players)
+        if tables > 1:
+            print('Playing on', tables, 'tables')
+            batches = self.play_tables(players, tables)
+            try:
+                player, requests = next(batches)
+                while True:
+                    player, requests = batches.send(player.query_batch(requests))
+            except StopIteration:
+                pass
+        else:
+            table = Table(0, self.log, self.names)
+            rounds = self.play_table(table, players, range(1, NUM_ROUNDS + 1))
+            try:
+                player, round_state, player_message = next(rounds)
+                while True:
+                    action = player.query(round_state, player_message, self.log)
+                    self.record_latency(player, table, round_state, action, player.last_latency)
+                    player, round_state, player_message = rounds.send(action)
+            except StopIteration:
+                pass
+        players = self.log_final(players)
+        for player in players:
+            if pool is None:
+                player.stop()
+            else:
+                pool.release(player)
+        self.close_logs()
+        return {player.name: player.bankroll for player in players}
+
+    async def run_async(self):
+        '''
+        Runs one game of poker with asyncio, and returns the final bankroll of each player by name.
+
+        Both pokerbots always run as subprocesses, so many games can share one event loop,
+        and are offered the binary framing and multi-table protocol like in run. Their logs
+        are written to the game's log directory.
+        '''
         players = [
-            Player(PLAYER_1_NAME, PLAYER_1_PATH),
-            Player(PLAYER_2_NAME, PLAYER_2_PATH)
+            AsyncPlayer(self.names[0], self.paths[0], self.log_dir),
+            AsyncPlayer(self.names[1], self.paths[1], self.log_dir)
         ]
-        bounties = [-1, -1]
-        for player in players:
-            player.build()
-        for player in players:
-            player.run()
-        for round_num in range(1, NUM_ROUNDS + 1):
-            self.log.append('')
-            self.log.append('Round #' + str(round_num) + STATUS(players))
-            if round_num % ROUNDS_PER_BOUNTY == 1:
-                cardNames = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-                bounties = [cardNames[random.randint(0, 12)], cardNames[random.randint(0, 12)]]
-                self.log.append(f"Bounties reset to {bounties[0]} for player {players[0].name} and {bounties[1]} for player {players[1].name}")
-            self.run_round(players, bounties)
-            self.log.append('Winning counts at the end of the round: ' + STATUS(players))
+        await asyncio.gather(*[player.build_async() for player in players])
+        await asyncio.gather(*[player.run_async() for player in players])
+        if BINARY_PROTOCOL:
+            await asyncio.gather(*[player.negotiate_binary_async() for player in players])
+        tables = 1
+        if NUM_TABLES > 1:
+            tables = min(await asyncio.gather(*[player.negotiate_async(NUM_TABLES) for player in players]))
+        if tables > 1:
+            print('Playing on', tables, 'tables')
+            batches = self.play_tables(players, tables)
+            try:
+                player, requests = next(batches)
+                while True:
+                    player, requests = batches.send(await player.query_batch_async(requests))
+            except StopIteration:
+                pass
+        else:
+            table = Table(0, self.log, self.names)
+            rounds = self.play_table(table, players, range(1, NUM_ROUNDS + 1))
+            try:
+                player, round_state, player_message = next(rounds)
+                while True:
+                    action = await player.query_async(round_state, player_message, self.log)
+                    self.record_latency(player, table, round_state, action, player.last_latency)
+                    player, round_state, player_message = rounds.send(action)
+            except StopIteration:
+                pass
+        players = self.log_final(players)
+        await asyncio.gather(*[player.stop_async() for player in players])
+        self.close_logs()
+        return {player.name: player.bankroll for player in players}
 
-            players = players[::-1]
-            bounties = bounties[::-1]
-        self.log.append('')
-        self.log.append('Final' + STATUS(players))
-        for player in players:
-            self.log.append('{} preflop bets EV: {}'.format(player.name, self.ev_preflop_bets[player.name]))
-            self.log.append('{} flop bets EV: {}'.format(player.name, self.ev_flop_bets[player.name]))
-            self.log.append('{} turn bets EV: {}'.format(player.name, self.ev_turn_bets[player.name]))
-            player.stop()
-        name = GAME_LOG_FILENAME + '.txt'
-        print('Writing', name)
-        with open(name, 'w') as log_file:
-            log_file.write('\n'.join(self.log))
+
+# the phases of a profiled game, each sample going to the phase of its innermost listed function
+PROFILE_PHASES = [
+    ('bot', ['engine.py:Player.request', 'engine.py:LocalPlayer.request']),
+    ('setup and teardown', ['engine.py:Player.build', 'engine.py:Player.run', 'engine.py:Player.stop',
+                            'engine.py:LocalPlayer.build', 'engine.py:LocalPlayer.run', 'engine.py:LocalPlayer.stop']),
+    ('showdown and bounties', ['engine.py:RoundState.showdown', 'engine.py:RoundState.get_delta',
+                               'engine.py:RoundState.get_bounty_hits', 'engine.py:round_rank_masks']),
+    ('game tree', ['engine.py:RoundState.proceed', 'engine.py:RoundState.proceed_street',
+                   'engine.py:RoundState.legal_actions', 'engine.py:RoundState.raise_bounds']),
+    ('text log', ['engine.py:Table.log_round_state', 'engine.py:Table.log_action', 'engine.py:Table.log_terminal_state',
+                  'gamelog.py:GameLog.append', 'gamelog.py:GameLog.flush']),
+    ('record logs', ['engine.py:Game.log_round_record']),
+    ('telemetry', ['engine.py:Game.record_latency', 'telemetry.py:Telemetry.end_round', 'telemetry.py:Telemetry.close']),
+    ('protocol', ['engine.py:Player.query', 'engine.py:Player.query_batch', 'engine.py:Player.negotiate']),
+    ('dealing and rounds', ['engine.py:Game.play_round', 'engine.py:Game.play_table', 'engine.py:Game.play_tables']),
+]
+
+
+def profile_game(game, filename):
+    '''
+    Runs a game under the sampling profiler.
+
+    Writes the collapsed stacks to filename, for flamegraph.pl or speedscope, and prints
+    the wall time spent in each phase of PROFILE_PHASES.
+    '''
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        game.run()
+    finally:
+        profiler.stop()
+    profiler.write_collapsed(filename)
+    total = profiler.total()
+    print()
+    print('Profiled {:.2f} seconds, stacks written to {}'.format(total, filename))
+    for phase, seconds in profiler.phase_totals(PROFILE_PHASES).items():
+        print('{:<24}{:>9.3f} s{:>7.1f}%'.format(phase, seconds, 100 * seconds / total if total else 0.))
+
+
+def parse_args():
+    '''
+    Parses the engine's optional command line overrides of config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 engine.py')
+    parser.add_argument('--seed', type=int, default=SEED, help='Seed for the cards and bounties, defaults to SEED')
+    parser.add_argument('--duplicate', action='store_true', default=DUPLICATE_MODE,
+                        help='Replay every deal with the seats swapped, defaults to DUPLICATE_MODE')
+    parser.add_argument('--early-stop', action='store_true', default=EARLY_STOP,
+                        help='End the game once a sequential test on the bankrolls is decided, defaults to EARLY_STOP')
+    parser.add_argument('--profile', type=str, default=None, metavar='FILE',
+                        help='Profile the engine, writing flamegraph stacks to FILE and printing time per phase')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    Game().run()
+    args = parse_args()
+    game = Game(seed=args.seed, duplicate=args.duplicate, early_stop=args.early_stop)
+    if args.profile is None:
+        game.run()
+    else:
+        profile_game(game, args.profile)
@@ -0,0 +1,507 @@
+'''
+Writers and readers for the engine's game logs.
+'''
+from collections import namedtuple
+import abc
+import struct
+import json
+import gzip
+import threading
+import time
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def open_log_file(filename, compression=None):
+    '''
+    Opens a binary log file for writing, optionally through a compressor.
+
+    Compressed streams are flushed block by block, so a log cut short by a crash
+    can still be decompressed up to its last flush.
+    '''
+    if compression == 'gzip':
+        return gzip.open(filename, 'wb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError('zstd compression needs the zstandard package (pip install zstandard)')
+        return zstandard.ZstdCompressor().stream_writer(open(filename, 'wb'))
+    if compression is None:
+        return open(filename, 'wb')
+    raise ValueError('unknown compression ' + repr(compression))
+
+
+class GameLog():
+    '''
+    Streams text log lines to disk with bounded buffering.
+
+    Lines are buffered until buffer_size characters are pending or flush_interval
+    seconds have passed since the last flush, so memory stays flat for any match
+    length and at most one interval of lines is lost if the engine is killed.
+    A filename of None discards the lines.
+    '''
+
+    def __init__(self, filename, compression=None, buffer_size=65536, flush_interval=5.):
+        self.filename = None if filename is None else filename + COMPRESSION_SUFFIXES[compression]
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.log_file = None
+        self.buffer = []
+        self.buffered = 0
+        self.deadline = time.monotonic() + flush_interval
+
+    def append(self, line):
+        '''
+        Adds one line to the log.
+        '''
+        self.buffer.append(line)
+        self.buffered += len(line) + 1
+        if self.buffered >= self.buffer_size or time.monotonic() >= self.deadline:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes out the pending lines and flushes them through to disk.
+        '''
+        if self.filename is None:
+            self.buffer = []
+            self.buffered = 0
+            return
+        if self.log_file is None:
+            self.log_file = open_log_file(self.filename, self.compression)
+        if self.buffer:
+            self.buffer.append('')
+            self.log_file.write('\n'.join(self.buffer).encode())
+            self.buffer = []
+            self.buffered = 0
+        self.log_file.flush()
+        self.deadline = time.monotonic() + self.flush_interval
+
+    def close(self):
+        '''
+        Flushes the pending lines and closes the log file.
+        '''
+        self.flush()
+        if self.log_file is not None:
+            self.log_file.close()
+
+
+class PlayerLog():
+    '''
+    Streams a pokerbot's output to disk as it arrives, capped at size_limit bytes per file.
+
+    Once a file fills up it is rotated to name.1.txt, name.2.txt and so on, keeping the
+    newest output and at most backups older files. With no backups, output past the first
+    size_limit bytes is dropped instead. Dropped bytes are counted and summarized at the
+    end of the log, so memory stays flat however much a pokerbot prints. Writes come from
+    reader threads as well as the engine, and are serialized by a lock.
+
+    Output written between close() and reopen() is dropped, and counted in the next log.
+    '''
+
+    def __init__(self, log_dir, name, size_limit, backups=0, flush_interval=5.):
+        self.log_dir = log_dir
+        self.name = name
+        self.size_limit = size_limit
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.log_file = None
+        self.closed = False
+        self.size = 0
+        self.dropped = 0
+        self.deadline = time.monotonic() + flush_interval
+
+    def filename(self, index=0):
+        '''
+        Returns the path of the current log file, or of its index-th backup.
+        '''
+        suffix = '.txt' if index == 0 else '.{}.txt'.format(index)
+        return os.path.join(self.log_dir, self.name + suffix)
+
+    def open(self):
+        '''
+        Starts a new log file, removing any backups left over from an earlier log of the same name.
+        '''
+        for index in range(1, self.backups + 1):
+            try:
+                os.remove(self.filename(index))
+            except FileNotFoundError:
+                pass
+        self.log_file = open(self.filename(), 'wb')
+        self.size = 0
+
+    def rotate(self):
+        '''
+        Moves the full log file to the first backup, shifting the older backups along.
+        '''
+        self.log_file.close()
+        oldest = self.filename(self.backups)
+        if os.path.exists(oldest):
+            self.dropped += os.path.getsize(oldest)
+        for index in range(self.backups, 0, -1):
+            if os.path.exists(self.filename(index - 1)):
+                os.replace(self.filename(index - 1), self.filename(index))
+        self.log_file = open(self.filename(), 'wb')
+        self.size = 0
+
+    def write(self, data):
+        '''
+        Adds output to the log. Accepts bytes or, so the log can stand in for stdout, str.
+        '''
+        if not data:
+            return 0
+        length = len(data)
+        if isinstance(data, str):
+            data = data.encode()
+        with self.lock:
+            if self.closed:
+                self.dropped += len(data)
+                return length
+            if self.log_file is None:
+                self.open()
+            view = memoryview(data)
+            while view:
+                if self.size >= self.size_limit:
+                    if self.backups == 0:
+                        self.dropped += len(view)
+                        break
+                    self.rotate()
+                written = self.log_file.write(view[:self.size_limit - self.size])
+                self.size += written
+                view = view[written:]
+            if time.monotonic() >= self.deadline:
+                self.flush_locked()
+        return length
+
+    def flush(self):
+        '''
+        Flushes the written output through to disk.
+        '''
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        if self.log_file is not None:
+            self.log_file.flush()
+        self.deadline = time.monotonic() + self.flush_interval
+
+    def close(self):
+        '''
+        Summarizes any dropped output and closes the log file.
+        '''
+        with self.lock:
+            if self.closed:
+                return
+            if self.log_file is None:
+                self.open()
+            if self.dropped:
+                self.log_file.write('\n[engine] {} bytes of output dropped, see PLAYER_LOG_SIZE_LIMIT and PLAYER_LOG_BACKUPS\n'
+                                    .format(self.dropped).encode())
+            self.log_file.close()
+            self.log_file = None
+            self.closed = True
+            self.dropped = 0
+
+    def reopen(self, log_dir, name):
+        '''
+        Lets a closed log take output again, starting a new log file in log_dir named after name.
+        '''
+        with self.lock:
+            self.log_dir = log_dir
+            self.name = name
+            self.closed = False
+
+
+# Structured round records
+#
+# Each finished round is one RoundRecord. Seats are indexed as in the engine's RoundState:
+# seat 0 posts the small blind and acts first preflop. Cards are strings like 'As'.
+#
+# players: the names in seat order
+# bounties: the bounty rank of each seat, or None
+# hands: the hole cards of each seat
+# board: the board cards dealt before the round ended
+# actions: [seat, clause] pairs in order, with clauses F, C, K or R###
+# deltas: the bankroll change of each seat
+# bounty_hits: whether each seat hit its bounty
+# street: 0, 3, 4 or 5, when the round ended
+# showdown: whether the hands were compared at showdown
+#
+# Every record file has a sidecar index (filename + '.idx') of (round number, offset) pairs,
+# packed as INDEX_ENTRY, which RecordReader uses to seek straight to a round.
+RoundRecord = namedtuple('RoundRecord', ['round_num', 'players', 'bounties', 'hands', 'board',
+                                         'actions', 'deltas', 'bounty_hits', 'street', 'showdown'])
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+CARD_NAMES = [rank + suit for rank in RANKS for suit in SUITS]
+CARD_CODES = {name: code for code, name in enumerate(CARD_NAMES)}
+ACTION_KINDS = 'FCKR'
+NO_CARD = 255
+
+INDEX_ENTRY = struct.Struct('<IQ')
+# binary files start with BINARY_MAGIC, a version byte and both player names (length-prefixed utf-8)
+BINARY_MAGIC = b'PBRL'
+BINARY_VERSION = 1
+# round number, player in seat 0, street, flags (showdown, seat 0 hit, seat 1 hit), bounty ranks,
+# hole cards, board cards, deltas and the number of actions which follow the header
+BINARY_HEADER = struct.Struct('<IBBB2B4B5B2iB')
+# seat << 4 | index in ACTION_KINDS, then the raise amount
+BINARY_ACTION = struct.Struct('<BH')
+SHOWDOWN_FLAG = 1
+BOUNTY_HIT_FLAGS = (2, 4)
+
+
+class RecordLog(abc.ABC):
+    '''
+    Streams RoundRecords to disk with bounded buffering, alongside an offset index.
+
+    Subclasses choose the file format by defining encode, and header if the format has one.
+    '''
+
+    def __init__(self, filename, names, buffer_size=65536, flush_interval=5.):
+        self.filename = filename
+        self.names = names
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.record_file = None
+        self.index_file = None
+        self.buffer = []
+        self.index = []
+        self.buffered = 0
+        self.offset = 0
+        self.deadline = time.monotonic() + flush_interval
+
+    def header(self):
+        '''
+        Returns the bytes written at the start of the file.
+        '''
+        return b''
+
+    @abc.abstractmethod
+    def encode(self, record):
+        '''
+        Returns the bytes of one record.
+        '''
+
+    def write(self, record):
+        '''
+        Adds one RoundRecord to the log.
+        '''
+        if self.record_file is None:
+            self.record_file = open(self.filename, 'wb')
+            self.index_file = open(self.filename + '.idx', 'wb')
+            self.buffer.append(self.header())
+            self.offset = len(self.buffer[0])
+        data = self.encode(record)
+        self.buffer.append(data)
+        self.index.append(INDEX_ENTRY.pack(record.round_num, self.offset))
+        self.offset += len(data)
+        self.buffered += len(data)
+        if self.buffered >= self.buffer_size or time.monotonic() >= self.deadline:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes out the pending records and their index entries.
+        '''
+        if self.record_file is None:
+            return
+        # records go first, so the index never points past the end of the file
+        self.record_file.write(b''.join(self.buffer))
+        self.record_file.flush()
+        self.index_file.write(b''.join(self.index))
+        self.index_file.flush()
+        self.buffer = []
+        self.index = []
+        self.buffered = 0
+        self.deadline = time.monotonic() + self.flush_interval
+
+    def close(self):
+        '''
+        Flushes the pending records and closes the files.
+        '''
+        self.flush()
+        if self.record_file is not None:
+            self.record_file.close()
+            self.index_file.close()
+
+
+class JsonRecordLog(RecordLog):
+    '''
+    Writes one JSON object per line.
+    '''
+
+    def encode(self, record):
+        return (json.dumps(record._asdict(), separators=(',', ':')) + '\n').encode()
+
+
+class BinaryRecordLog(RecordLog):
+    '''
+    Writes a fixed-width header per record followed by its actions.
+    '''
+
+    def header(self):
+        data = [BINARY_MAGIC, bytes([BINARY_VERSION])]
+        for name in self.names:
+            encoded = name.encode()
+            data.append(bytes([len(encoded)]))
+            data.append(encoded)
+        return b''.join(data)
+
+    def encode(self, record):
+        flags = SHOWDOWN_FLAG if record.showdown else 0
+        for seat in range(2):
+            if record.bounty_hits[seat]:
+                flags |= BOUNTY_HIT_FLAGS[seat]
+        bounties = [NO_CARD if bounty is None else RANKS.index(bounty) for bounty in record.bounties]
+        board = [CARD_CODES[card] for card in record.board] + [NO_CARD] * (5 - len(record.board))
+        data = [BINARY_HEADER.pack(record.round_num, self.names.index(record.players[0]), record.street, flags,
+                                   *bounties, *[CARD_CODES[card] for hand in record.hands for card in hand],
+                                   *board, *record.deltas, len(record.actions))]
+        for seat, clause in record.actions:
+            amount = int(clause[1:]) if clause[0] == 'R' else 0
+            data.append(BINARY_ACTION.pack(seat << 4 | ACTION_KINDS.index(clause[0]), amount))
+        return b''.join(data)
+
+
+RECORD_LOGS = {'jsonl': ('.jsonl', JsonRecordLog), 'binary': ('.bin', BinaryRecordLog)}
+
+
+class RecordReader():
+    '''
+    Reads a JSONL or binary record log, seeking by round number through its index.
+
+    If the sidecar index is missing, it is rebuilt by scanning the file once
+    without decoding any records.
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.record_file = open(filename, 'rb')
+        self.binary = self.record_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+        self.names = None
+        if self.binary:
+            if self.record_file.read(1)[0] != BINARY_VERSION:
+                raise ValueError('unsupported binary record version')
+            self.names = []
+            for _ in range(2):
+                length = self.record_file.read(1)[0]
+                self.names.append(self.record_file.read(length).decode())
+        self.start = self.record_file.tell() if self.binary else 0
+        self.offsets = self.load_index()
+
+    def load_index(self):
+        '''
+        Returns a dict from round number to file offset.
+        '''
+        size = os.path.getsize(self.filename)
+        try:
+            with open(self.filename + '.idx', 'rb') as index_file:
+                data = index_file.read()
+            entries = INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size])
+            return {round_num: offset for round_num, offset in entries if offset < size}
+        except FileNotFoundError:
+            return self.scan()
+
+    def scan(self):
+        '''
+        Rebuilds the index by walking the record boundaries.
+        '''
+        offsets = {}
+        self.record_file.seek(self.start)
+        offset = self.start
+        if self.binary:
+            while True:
+                header = self.record_file.read(BINARY_HEADER.size)
+                if len(header) < BINARY_HEADER.size:
+                    break
+                offsets[struct.unpack_from('<I', header)[0]] = offset
+                offset += BINARY_HEADER.size + header[-1] * BINARY_ACTION.size
+                self.record_file.seek(offset)
+        else:
+            for line in self.record_file:
+                if line.endswith(b'\n'):
+                    # the round number is the first field of every line
+                    offsets[int(line[len(b'{"round_num":'):line.index(b',')])] = offset
+                offset += len(line)
+        return offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def rounds(self):
+        '''
+        Returns the indexed round numbers in order.
+        '''
+        return sorted(self.offsets)
+
+    def read(self, round_num):
+        '''
+        Returns the RoundRecord of one round.
+        '''
+        self.record_file.seek(self.offsets[round_num])
+        if self.binary:
+            return self.decode_binary(self.record_file.read(BINARY_HEADER.size))
+        return RoundRecord(**json.loads(self.record_file.readline()))
+
+    def __iter__(self):
+        '''
+        Yields every RoundRecord in file order.
+        '''
+        for offset in sorted(self.offsets.values()):
+            self.record_file.seek(offset)
+            if self.binary:
+                yield self.decode_binary(self.record_file.read(BINARY_HEADER.size))
+            else:
+                yield RoundRecord(**json.loads(self.record_file.readline()))
+
+    def showdowns(self):
+        '''
+        Yields the RoundRecords which reached showdown, skipping the others undecoded.
+        '''
+        self.record_file.seek(self.start)
+        if self.binary:
+            while True:
+                header = self.record_file.read(BINARY_HEADER.size)
+                if len(header) < BINARY_HEADER.size:
+                    return
+                if header[6] & SHOWDOWN_FLAG:
+                    yield self.decode_binary(header)
+                else:
+                    self.record_file.seek(header[-1] * BINARY_ACTION.size, os.SEEK_CUR)
+        else:
+            for line in self.record_file:
+                if line.endswith(b'"showdown":true}\n'):
+                    yield RoundRecord(**json.loads(line))
+
+    def decode_binary(self, header):
+        '''
+        Decodes a binary record whose actions follow the current file position.
+        '''
+        fields = BINARY_HEADER.unpack(header)
+        round_num, first, street, flags = fields[:4]
+        bounties = [None if rank == NO_CARD else RANKS[rank] for rank in fields[4:6]]
+        cards = [CARD_NAMES[code] for code in fields[6:10]]
+        board = [CARD_NAMES[code] for code in fields[10:15] if code != NO_CARD]
+        actions = []
+        for code, amount in BINARY_ACTION.iter_unpack(self.record_file.read(fields[-1] * BINARY_ACTION.size)):
+            kind = ACTION_KINDS[code & 15]
+            actions.append([code >> 4, kind + str(amount) if kind == 'R' else kind])
+        return RoundRecord(round_num, [self.names[first], self.names[1 - first]], bounties, [cards[:2], cards[2:]],
+                           board, actions, list(fields[15:17]),
+                           [bool(flags & BOUNTY_HIT_FLAGS[0]), bool(flags & BOUNTY_HIT_FLAGS[1])],
+                           street, bool(flags & SHOWDOWN_FLAG))
+
+    def close(self):
+        '''
+        Closes the record file.
+        '''
+        self.record_file.close()
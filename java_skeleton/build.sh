@@ -0,0 +1,16 @@
+#!/bin/bash
+# Compiles the bot, then records the classes it loads in a class data sharing archive (JDK 13
+# and later), which run.sh maps into the JVM so that the first decisions skip class loading
+
+JAVA_OPTS=$(grep -v '^#' jvm.options)
+
+javac javabot/Player.java || exit 1
+rm -f javabot.jsa
+if java -XX:+PrintFlagsFinal -version 2> /dev/null | grep -q ArchiveClassesAtExit; then
+    # plays a short canned game without connecting to the engine
+    # a JVM without a base archive of its own skips this, without failing
+    if ! java $JAVA_OPTS -XX:ArchiveClassesAtExit=javabot.jsa javabot.Player --warmup > /dev/null || [ ! -f javabot.jsa ]; then
+        echo "Could not create the class data sharing archive, the bot will run without it" >&2
+        rm -f javabot.jsa
+    fi
+fi
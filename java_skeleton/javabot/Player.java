@@ -7,10 +7,9 @@ import javabot.skeleton.State;
 import javabot.skeleton.TerminalState;
 import javabot.skeleton.RoundState;
 import javabot.skeleton.Bot;
+import javabot.skeleton.Card;
 import javabot.skeleton.Runner;
 
-import java.util.ArrayList;
-import java.util.List;
 import java.util.Set;
 import java.lang.Integer;
 import java.lang.String;
@@ -38,7 +37,7 @@ public class Player implements Bot {
         // int myBankroll = gameState.bankroll;  // the total number of chips you've gained or lost from the beginning of the game to the start of this round
         // float gameClock = gameState.gameClock;  // the total number of seconds your bot has left to play this game
         // int roundNum = gameState.roundNum;  // the round number from 1 to State.NUM_ROUNDS
-        // List<String> myCards = roundState.hands.get(active);  // your cards
+        // int[] myCards = roundState.hands[active];  // your cards, as codes (see Card)
         // boolean bigBlind = (active == 1);  // true if you are the big blind
     }
 
@@ -50,19 +49,19 @@ public class Player implements Bot {
      * @param active Your player's index.
      */
     public void handleRoundOver(GameState gameState, TerminalState terminalState, int active) {
-        // int myDelta = terminalState.deltas.get(active);  // your bankroll change from this round
+        // int myDelta = terminalState.deltas[active];  // your bankroll change from this round
         RoundState previousState = (RoundState)(terminalState.previousState);  // RoundState before payoffs
         // int street = previousState.street;  // 0, 3, 4, or 5 representing when this round ended
-        // List<String> myCards = previousState.hands.get(active);  // your cards
-        // List<String> oppCards = previousState.hands.get(1-active);  // opponent's cards or "" if not revealed
+        // int[] myCards = previousState.hands[active];  // your cards
+        // int[] oppCards = previousState.hands[1-active];  // opponent's cards, Card.NONE if not revealed
         
-        Boolean myBountyHit = terminalState.bounty_hits.get(active);  // if your bounty hit this round
-        Boolean oppBountyHit = terminalState.bounty_hits.get(1-active);  // if opponent's bounty hit this round
+        boolean myBountyHit = terminalState.bounty_hits[active];  // if your bounty hit this round
+        boolean oppBountyHit = terminalState.bounty_hits[1-active];  // if opponent's bounty hit this round
 
-        Character bounty_rank = previousState.bounties.get(active);  // your bounty rank
+        char bounty_rank = previousState.bounties[active];  // your bounty rank
 
         // The following is a demonstration of accessing illegal information (will not work)
-        Character opponent_bounty_rank = previousState.bounties.get(1-active);  // attempting to grab opponent's bounty rank
+        char opponent_bounty_rank = previousState.bounties[1-active];  // attempting to grab opponent's bounty rank
         if (myBountyHit) {
             System.out.println("I hit my bounty of " + bounty_rank + "!");
         }
@@ -83,27 +82,27 @@ public class Player implements Bot {
     public Action getAction(GameState gameState, RoundState roundState, int active) {
         Set<ActionType> legalActions = roundState.legalActions();  // the actions you are allowed to take
         int street = roundState.street;  // 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
-        List<String> myCards = roundState.hands.get(active);  // your cards
-        List<String> boardCards = roundState.deck;  // the board cards
-        int myPip = roundState.pips.get(active);  // the number of chips you have contributed to the pot this round of betting
-        int oppPip = roundState.pips.get(1-active);  // the number of chips your opponent has contributed to the pot this round of betting
-        int myStack = roundState.stacks.get(active);  // the number of chips you have remaining
-        int oppStack = roundState.stacks.get(1-active);  // the number of chips your opponent has remaining
-        Character myBounty = roundState.bounties.get(active);  // your current bounty rank
+        int[] myCards = roundState.hands[active];  // your cards, as codes: Card.name(myCards[0]) is a name like "As"
+        int[] boardCards = roundState.deck;  // the board cards, Card.NONE past the current street
+        int myPip = roundState.pips[active];  // the number of chips you have contributed to the pot this round of betting
+        int oppPip = roundState.pips[1-active];  // the number of chips your opponent has contributed to the pot this round of betting
+        int myStack = roundState.stacks[active];  // the number of chips you have remaining
+        int oppStack = roundState.stacks[1-active];  // the number of chips your opponent has remaining
+        char myBounty = roundState.bounties[active];  // your current bounty rank
         int continueCost = oppPip - myPip;  // the number of chips needed to stay in the pot
         int myContribution = State.STARTING_STACK - myStack;  // the number of chips you have contributed to the pot
         int oppContribution = State.STARTING_STACK - oppStack;  // the number of chips your opponent has contributed to the pot
         int minCost = 0, maxCost = 0;
-        List<Integer> raiseBounds = new ArrayList<Integer>();
+        int[] raiseBounds = {0, 0};
         if (legalActions.contains(ActionType.RAISE_ACTION_TYPE)) {
            raiseBounds = roundState.raiseBounds();  // the smallest and largest numbers of chips for a legal bet/raise
-           minCost = raiseBounds.get(0) - myPip;  // the cost of a minimum bet/raise
-           maxCost = raiseBounds.get(1) - myPip;  // the cost of a maximum bet/raise
+           minCost = raiseBounds[0] - myPip;  // the cost of a minimum bet/raise
+           maxCost = raiseBounds[1] - myPip;  // the cost of a maximum bet/raise
         }
 
         if (legalActions.contains(ActionType.RAISE_ACTION_TYPE)) {
             if (Math.random() < 0.5) {
-                return new Action(ActionType.RAISE_ACTION_TYPE, raiseBounds.get(0));
+                return new Action(ActionType.RAISE_ACTION_TYPE, raiseBounds[0]);
             }
         }
         if (legalActions.contains(ActionType.CHECK_ACTION_TYPE)) {
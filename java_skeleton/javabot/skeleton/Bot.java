@@ -4,6 +4,12 @@ package javabot.skeleton;
  * The interface for a pokerbot.
  */
 public interface Bot {
+    /**
+     * Called when the engine keeps your bot running for another game, before its first round.
+     * Reset anything you track over a game here.
+     */
+    public default void handleNewGame() {}
+
     /**
      * Called when a new round starts. Called State.NUM_ROUNDS times.
      *
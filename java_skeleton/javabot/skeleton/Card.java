@@ -0,0 +1,71 @@
+package javabot.skeleton;
+
+/**
+ * Cards as int codes, rank * 4 + suit, the same encoding as the engine's binary framing.
+ */
+public final class Card {
+    public static final String RANKS = "23456789TJQKA";
+    public static final String SUITS = "cdhs";
+    // an unknown card, such as the opponent's hole cards before a showdown
+    public static final int NONE = -1;
+
+    private static final String[] NAMES = new String[52];
+
+    static {
+        for (int code = 0; code < NAMES.length; code++) {
+            NAMES[code] = "" + RANKS.charAt(code >> 2) + SUITS.charAt(code & 3);
+        }
+    }
+
+    private Card() {}
+
+    /**
+     * Returns the code of a card like "As", or NONE if the text is not one.
+     */
+    public static int parse(CharSequence text) {
+        if (text.length() < 2) {
+            return NONE;
+        }
+        return code(text.charAt(0), text.charAt(1));
+    }
+
+    /**
+     * Returns the code of the card with rank and suit characters like 'A' and 's', or NONE.
+     */
+    public static int code(char rank, char suit) {
+        int rankIndex = RANKS.indexOf(rank);
+        int suitIndex = SUITS.indexOf(suit);
+        if (rankIndex < 0 || suitIndex < 0) {
+            return NONE;
+        }
+        return rankIndex * 4 + suitIndex;
+    }
+
+    /**
+     * Returns the index of a card's rank in RANKS, from 0 for a two to 12 for an ace.
+     */
+    public static int rank(int card) {
+        return card >> 2;
+    }
+
+    /**
+     * Returns the index of a card's suit in SUITS.
+     */
+    public static int suit(int card) {
+        return card & 3;
+    }
+
+    /**
+     * Returns a card's rank as a character like 'A', comparable with a bounty, or 0 for NONE.
+     */
+    public static char rankName(int card) {
+        return card == NONE ? 0 : RANKS.charAt(card >> 2);
+    }
+
+    /**
+     * Returns a card's name like "As", or "" for NONE. The names are shared, not allocated.
+     */
+    public static String name(int card) {
+        return card == NONE ? "" : NAMES[card];
+    }
+}
\ No newline at end of file
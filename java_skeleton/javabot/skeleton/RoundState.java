@@ -1,51 +1,52 @@
 package javabot.skeleton;
 
-import java.util.List;
-import java.util.ArrayList;
-import java.util.Arrays;
-import java.util.Set;
-import java.util.HashSet;
 import java.util.Collections;
-import java.lang.Integer;
-import java.lang.String;
-import java.util.Map;
-import static java.util.Map.entry;
+import java.util.EnumSet;
+import java.util.Set;
 
 /**
  * Encodes the game tree for one round of poker.
+ *
+ * Cards are int codes (see Card) and the other fields are primitive arrays. A state shares
+ * the arrays it does not change with the state before it, so treat them as read-only.
  */
 public class RoundState extends State {
+    // the four possible sets of legal actions, shared rather than built per call
+    private static final Set<ActionType> CHECK_FOLD = Collections.unmodifiableSet(
+        EnumSet.of(ActionType.CHECK_ACTION_TYPE, ActionType.FOLD_ACTION_TYPE));
+    private static final Set<ActionType> CHECK_RAISE_FOLD = Collections.unmodifiableSet(
+        EnumSet.of(ActionType.CHECK_ACTION_TYPE, ActionType.RAISE_ACTION_TYPE, ActionType.FOLD_ACTION_TYPE));
+    private static final Set<ActionType> FOLD_CALL = Collections.unmodifiableSet(
+        EnumSet.of(ActionType.FOLD_ACTION_TYPE, ActionType.CALL_ACTION_TYPE));
+    private static final Set<ActionType> FOLD_CALL_RAISE = Collections.unmodifiableSet(
+        EnumSet.of(ActionType.FOLD_ACTION_TYPE, ActionType.CALL_ACTION_TYPE, ActionType.RAISE_ACTION_TYPE));
+
     public final int button;
     public final int street;
-    public final List<Integer> pips;
-    public final List<Integer> stacks;
-    public final List<List<String>> hands;
-    public final List<Character> bounties;
-    public final List<String> deck;
+    public final int[] pips;
+    public final int[] stacks;
+    public final int[][] hands;
+    public final char[] bounties;
+    public final int[] deck;
     public final State previousState;
 
-    public RoundState(int button, int street, List<Integer> pips, List<Integer> stacks,
-                      List<List<String>> hands, List<Character> bounties, List<String> deck,
+    public RoundState(int button, int street, int[] pips, int[] stacks,
+                      int[][] hands, char[] bounties, int[] deck,
                       State previousState) {
         this.button = button;
         this.street = street;
-        this.pips = Collections.unmodifiableList(pips);
-        this.stacks = Collections.unmodifiableList(stacks);
-        this.hands = Collections.unmodifiableList(
-            Arrays.asList(
-                Collections.unmodifiableList(hands.get(0)),
-                Collections.unmodifiableList(hands.get(1))
-            )
-        );
-        this.bounties = Collections.unmodifiableList(bounties);
-        this.deck = Collections.unmodifiableList(deck);
+        this.pips = pips;
+        this.stacks = stacks;
+        this.hands = hands;
+        this.bounties = bounties;
+        this.deck = deck;
         this.previousState = previousState;
     }
 
     /**
-     * Gets player bounty hits (described inside function) 
+     * Gets player bounty hits (described inside function)
      */
-    List<Boolean> get_bounty_hits()
+    boolean[] get_bounty_hits()
     {
         /*
         Determines if each player hit their bounty card during the round.
@@ -55,29 +56,26 @@ public class RoundState extends State {
         - The community cards dealt so far
 
         Returns:
-            List<Boolean>: A list containing two booleans where:
+            boolean[]: An array of two booleans where:
                 - First boolean indicates if Player 1's bounty was hit
                 - Second boolean indicates if Player 2's bounty was hit
         */
-        List<Character> cards0 = new ArrayList<Character>(), cards1 = new ArrayList<Character>();
-        try
-        {
-            for(int i = 0; i < 2; i ++)
-                cards0.add(this.hands.get(0).get(i).charAt(0));
-        }
-        catch(Exception e) {}
-        try
-        {
-            for(int i = 0; i < 2; i ++)
-                cards1.add(this.hands.get(1).get(i).charAt(0));
-        }
-        catch(Exception e) {}
-        for(int i = 0; i < this.street; i ++)
+        return bountyHits(this.street, this.hands, this.bounties, this.deck);
+    }
+
+    /**
+     * Returns the bounty hits of a round at the given street, shared with SearchState.
+     */
+    static boolean[] bountyHits(int street, int[][] hands, char[] bounties, int[] deck) {
+        boolean[] bounty_hits = new boolean[2];
+        for (int player = 0; player < 2; player++)
         {
-            cards0.add(this.deck.get(i).charAt(0));
-            cards1.add(this.deck.get(i).charAt(0));
+            // the opponent's hole cards are NONE unless they were shown, and never match
+            for (int i = 0; i < 2; i++)
+                bounty_hits[player] |= Card.rankName(hands[player][i]) == bounties[player];
+            for (int i = 0; i < street; i++)
+                bounty_hits[player] |= Card.rankName(deck[i]) == bounties[player];
         }
-        List<Boolean> bounty_hits = Arrays.asList(cards0.contains(this.bounties.get(0)), cards1.contains(this.bounties.get(1)));
         return bounty_hits;
     }
 
@@ -85,43 +83,49 @@ public class RoundState extends State {
      * Compares the players' hands and computes payoffs.
      */
     public State showdown() {
-        return new TerminalState(Arrays.asList(0, 0), Arrays.asList(false, false), this);
+        return new TerminalState(new int[] {0, 0}, new boolean[] {false, false}, this);
     }
 
     /**
-     * Returns the active player's legal moves.
+     * Returns the active player's legal moves, as a shared read-only set.
      */
     public Set<ActionType> legalActions() {
-        int active = this.button % 2;
-        int continueCost = this.pips.get(1-active) - this.pips.get(active);
+        return legalActions(this.button, this.pips, this.stacks);
+    }
+
+    /**
+     * Returns the legal moves of the player to act at button with the given pips and stacks.
+     */
+    static Set<ActionType> legalActions(int button, int[] pips, int[] stacks) {
+        int active = button % 2;
+        int continueCost = pips[1-active] - pips[active];
         if (continueCost == 0) {
             // we can only raise the stakes if both players can afford it
-            boolean betsForbidden = ((this.stacks.get(0) == 0) | (this.stacks.get(1) == 0));
-            if (betsForbidden) {
-                return new HashSet<ActionType>(Arrays.asList(ActionType.CHECK_ACTION_TYPE, ActionType.FOLD_ACTION_TYPE));
-            }
-            return new HashSet<ActionType>(Arrays.asList(ActionType.CHECK_ACTION_TYPE, ActionType.RAISE_ACTION_TYPE, ActionType.FOLD_ACTION_TYPE));
+            boolean betsForbidden = ((stacks[0] == 0) | (stacks[1] == 0));
+            return betsForbidden ? CHECK_FOLD : CHECK_RAISE_FOLD;
         }
         // continueCost > 0
         // similarly, re-raising is only allowed if both players can afford it
-        boolean raisesForbidden = ((continueCost == this.stacks.get(active)) | (this.stacks.get(1-active) == 0));
-        if (raisesForbidden) {
-            return new HashSet<ActionType>(Arrays.asList(ActionType.FOLD_ACTION_TYPE, ActionType.CALL_ACTION_TYPE));
-        }
-        return new HashSet<ActionType>(Arrays.asList(ActionType.FOLD_ACTION_TYPE,
-                                                     ActionType.CALL_ACTION_TYPE,
-                                                     ActionType.RAISE_ACTION_TYPE));
+        boolean raisesForbidden = ((continueCost == stacks[active]) | (stacks[1-active] == 0));
+        return raisesForbidden ? FOLD_CALL : FOLD_CALL_RAISE;
     }
 
     /**
-     * Returns a list of the minimum and maximum legal raises.
+     * Returns the minimum and maximum legal raises.
      */
-    public List<Integer> raiseBounds() {
-        int active = this.button % 2;
-        int continueCost = this.pips.get(1-active) - this.pips.get(active);
-        int maxContribution = Math.min(this.stacks.get(active), this.stacks.get(1-active) + continueCost);
+    public int[] raiseBounds() {
+        return raiseBounds(this.button, this.pips, this.stacks);
+    }
+
+    /**
+     * Returns the minimum and maximum legal raises of the player to act at button.
+     */
+    static int[] raiseBounds(int button, int[] pips, int[] stacks) {
+        int active = button % 2;
+        int continueCost = pips[1-active] - pips[active];
+        int maxContribution = Math.min(stacks[active], stacks[1-active] + continueCost);
         int minContribution = Math.min(maxContribution, continueCost + Math.max(continueCost, State.BIG_BLIND));
-        return Arrays.asList(this.pips.get(active) + minContribution, this.pips.get(active) + maxContribution);
+        return new int[] {pips[active] + minContribution, pips[active] + maxContribution};
     }
 
     /**
@@ -137,7 +141,7 @@ public class RoundState extends State {
         } else {
             newStreet = this.street + 1;
         }
-        return new RoundState(1, newStreet, Arrays.asList(0, 0), this.stacks, this.hands, this.bounties, this.deck, this);
+        return new RoundState(1, newStreet, new int[] {0, 0}, this.stacks, this.hands, this.bounties, this.deck, this);
     }
 
     /**
@@ -149,25 +153,25 @@ public class RoundState extends State {
             case FOLD_ACTION_TYPE: {
                 int delta;
                 if (active == 0) {
-                    delta = this.stacks.get(0) - State.STARTING_STACK;
+                    delta = this.stacks[0] - State.STARTING_STACK;
                 } else {
-                    delta = State.STARTING_STACK - this.stacks.get(1);
+                    delta = State.STARTING_STACK - this.stacks[1];
                 }
-                return new TerminalState(Arrays.asList(delta, -1 * delta), this.get_bounty_hits(), this);
+                return new TerminalState(new int[] {delta, -1 * delta}, this.get_bounty_hits(), this);
             }
             case CALL_ACTION_TYPE: {
                 if (this.button == 0) {  // sb calls bb
-                    return new RoundState(1, 0, Arrays.asList(State.BIG_BLIND, State.BIG_BLIND),
-                                          Arrays.asList(State.STARTING_STACK - State.BIG_BLIND,
-                                                        State.STARTING_STACK - State.BIG_BLIND),
+                    return new RoundState(1, 0, new int[] {State.BIG_BLIND, State.BIG_BLIND},
+                                          new int[] {State.STARTING_STACK - State.BIG_BLIND,
+                                                     State.STARTING_STACK - State.BIG_BLIND},
                                           this.hands, this.bounties, this.deck, this);
                 }
                 // both players acted
-                List<Integer> newPips = new ArrayList<Integer>(this.pips);
-                List<Integer> newStacks = new ArrayList<Integer>(this.stacks);
-                int contribution = newPips.get(1-active) - newPips.get(active);
-                newStacks.set(active, newStacks.get(active) - contribution);
-                newPips.set(active, newPips.get(active) + contribution);
+                int[] newPips = this.pips.clone();
+                int[] newStacks = this.stacks.clone();
+                int contribution = newPips[1-active] - newPips[active];
+                newStacks[active] = newStacks[active] - contribution;
+                newPips[active] = newPips[active] + contribution;
                 RoundState state = new RoundState(this.button + 1, this.street, newPips, newStacks,
                                                   this.hands, this.bounties, this.deck, this);
                 return state.proceedStreet();
@@ -180,11 +184,11 @@ public class RoundState extends State {
                 return new RoundState(this.button + 1, this.street, this.pips, this.stacks, this.hands, this.bounties, this.deck, this);
             }
             default: {  // RAISE_ACTION_TYPE
-                List<Integer> newPips = new ArrayList<Integer>(this.pips);
-                List<Integer> newStacks = new ArrayList<Integer>(this.stacks);
-                int contribution = action.amount - newPips.get(active);
-                newStacks.set(active, newStacks.get(active) - contribution);
-                newPips.set(active, newPips.get(active) + contribution);
+                int[] newPips = this.pips.clone();
+                int[] newStacks = this.stacks.clone();
+                int contribution = action.amount - newPips[active];
+                newStacks[active] = newStacks[active] - contribution;
+                newPips[active] = newPips[active] + contribution;
                 return new RoundState(this.button + 1, this.street, newPips, newStacks, this.hands, this.bounties, this.deck, this);
             }
         }
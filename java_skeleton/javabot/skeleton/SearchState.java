@@ -0,0 +1,188 @@
+package javabot.skeleton;
+
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import java.util.Set;
+
+/**
+ * A mutable round state for tree search, which applies and undoes actions in place.
+ *
+ * It follows the rules of RoundState.proceed, but rather than allocating a new state per
+ * action it updates its own fields and pushes the old values onto an undo stack of ints, so
+ * a search can walk a large tree with apply and undo alone. The applied actions are kept in
+ * history only if it was asked for.
+ */
+public class SearchState {
+    // button, street, both pips and both stacks are saved per action
+    private static final int FRAME = 6;
+
+    public int button;
+    public int street;
+    public final int[] pips;
+    public final int[] stacks;
+    public final int[][] hands;
+    public final char[] bounties;
+    public final int[] deck;
+    // {delta, -delta} once the round is over, null until then
+    public int[] deltas;
+    public final List<Action> history;
+    private int[] undoStack = new int[FRAME * 16];
+    private int undoSize = 0;
+
+    public SearchState(int button, int street, int[] pips, int[] stacks,
+                       int[][] hands, char[] bounties, int[] deck, boolean history) {
+        this.button = button;
+        this.street = street;
+        this.pips = pips.clone();
+        this.stacks = stacks.clone();
+        this.hands = hands;
+        this.bounties = bounties;
+        this.deck = deck;
+        this.deltas = null;
+        this.history = history ? new ArrayList<Action>() : null;
+    }
+
+    /**
+     * Copies a RoundState, such as the one passed to getAction.
+     */
+    public static SearchState fromRoundState(RoundState roundState, boolean history) {
+        return new SearchState(roundState.button, roundState.street, roundState.pips, roundState.stacks,
+                               roundState.hands, roundState.bounties, roundState.deck, history);
+    }
+
+    /**
+     * Returns the current state as a RoundState, without its previous states.
+     */
+    public RoundState toRoundState() {
+        return new RoundState(this.button, this.street, this.pips.clone(), this.stacks.clone(),
+                              this.hands, this.bounties, this.deck, null);
+    }
+
+    /**
+     * Returns whether the round is over.
+     */
+    public boolean isTerminal() {
+        return this.deltas != null;
+    }
+
+    /**
+     * Returns the active player's legal moves, as a shared read-only set.
+     */
+    public Set<ActionType> legalActions() {
+        return RoundState.legalActions(this.button, this.pips, this.stacks);
+    }
+
+    /**
+     * Returns the minimum and maximum legal raises.
+     */
+    public int[] raiseBounds() {
+        return RoundState.raiseBounds(this.button, this.pips, this.stacks);
+    }
+
+    /**
+     * Returns whether each player has hit their bounty by the current street.
+     */
+    public boolean[] getBountyHits() {
+        return RoundState.bountyHits(this.street, this.hands, this.bounties, this.deck);
+    }
+
+    /**
+     * Ends the round at showdown, with payoffs unknown to the player.
+     */
+    public void showdown() {
+        this.deltas = new int[] {0, 0};
+    }
+
+    /**
+     * Resets the players' pips and advances to the next round of betting.
+     */
+    public void proceedStreet() {
+        if (this.street == 5) {
+            this.showdown();
+            return;
+        }
+        this.street = this.street == 0 ? 3 : this.street + 1;
+        this.button = 1;
+        this.pips[0] = 0;
+        this.pips[1] = 0;
+    }
+
+    /**
+     * Performs one action of the active player in place.
+     */
+    public void apply(Action action) {
+        if (this.undoSize + FRAME > this.undoStack.length) {
+            this.undoStack = Arrays.copyOf(this.undoStack, 2 * this.undoStack.length);
+        }
+        int[] frame = this.undoStack;
+        int top = this.undoSize;
+        frame[top] = this.button;
+        frame[top + 1] = this.street;
+        frame[top + 2] = this.pips[0];
+        frame[top + 3] = this.pips[1];
+        frame[top + 4] = this.stacks[0];
+        frame[top + 5] = this.stacks[1];
+        this.undoSize = top + FRAME;
+        if (this.history != null) {
+            this.history.add(action);
+        }
+        int active = this.button % 2;
+        switch (action.actionType) {
+            case FOLD_ACTION_TYPE: {
+                int delta = active == 0 ? this.stacks[0] - State.STARTING_STACK : State.STARTING_STACK - this.stacks[1];
+                this.deltas = new int[] {delta, -delta};
+                break;
+            }
+            case CALL_ACTION_TYPE: {
+                if (this.button == 0) {  // sb calls bb
+                    this.button = 1;
+                    this.pips[0] = this.pips[1] = State.BIG_BLIND;
+                    this.stacks[0] = this.stacks[1] = State.STARTING_STACK - State.BIG_BLIND;
+                    break;
+                }
+                // both players acted
+                int contribution = this.pips[1-active] - this.pips[active];
+                this.stacks[active] -= contribution;
+                this.pips[active] += contribution;
+                this.button += 1;
+                this.proceedStreet();
+                break;
+            }
+            case CHECK_ACTION_TYPE: {
+                if ((this.street == 0 && this.button > 0) || this.button > 1) {  // both players acted
+                    this.proceedStreet();
+                } else {  // let opponent act
+                    this.button += 1;
+                }
+                break;
+            }
+            default: {  // RAISE_ACTION_TYPE
+                int contribution = action.amount - this.pips[active];
+                this.stacks[active] -= contribution;
+                this.pips[active] += contribution;
+                this.button += 1;
+                break;
+            }
+        }
+    }
+
+    /**
+     * Takes back the last action applied.
+     */
+    public void undo() {
+        int top = this.undoSize - FRAME;
+        int[] frame = this.undoStack;
+        this.button = frame[top];
+        this.street = frame[top + 1];
+        this.pips[0] = frame[top + 2];
+        this.pips[1] = frame[top + 3];
+        this.stacks[0] = frame[top + 4];
+        this.stacks[1] = frame[top + 5];
+        this.undoSize = top;
+        this.deltas = null;
+        if (this.history != null) {
+            this.history.remove(this.history.size() - 1);
+        }
+    }
+}
\ No newline at end of file
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+JAVA_OPTS=$(grep -v '^#' jvm.options)
+if [ -f javabot.jsa ]; then
+    JAVA_OPTS="$JAVA_OPTS -XX:SharedArchiveFile=javabot.jsa"
+fi
+exec java $JAVA_OPTS javabot.Player "$@"
@@ -8,6 +8,19 @@ class Bot():
     The base class for a pokerbot.
     '''
 
+    def handle_new_game(self):
+        '''
+        Called when the engine keeps your bot running for another game, before its first round.
+        Reset anything you track over a game here.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        '''
+        pass
+
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -50,3 +63,16 @@ class Bot():
         Your action.
         '''
         raise NotImplementedError('get_action')
+
+    def get_actions(self, requests):
+        '''
+        Called instead of get_action when the engine plays several tables at once and
+        needs a decision on more than one of them. Override it to decide in a batch.
+
+        Arguments:
+        requests: a list of (game_state, round_state, active) tuples, one per table.
+
+        Returns:
+        A list of your actions, in the same order.
+        '''
+        return [self.get_action(game_state, round_state, active) for game_state, round_state, active in requests]
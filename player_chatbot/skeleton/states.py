@@ -11,6 +11,23 @@ NUM_ROUNDS = 1000
 STARTING_STACK = 400
 BIG_BLIND = 2
 SMALL_BLIND = 1
+BOUNTY_RATIO = 1.5
+BOUNTY_CONSTANT = 10
+
+# hands and boards are summarized as 13-bit rank masks, bit i set if rank RANKS[i] is present
+RANKS = '23456789TJQKA'
+RANK_BITS = {rank: 1 << index for index, rank in enumerate(RANKS)}
+CARD_BITS = {rank + suit: bit for rank, bit in RANK_BITS.items() for suit in 'cdhs'}
+
+
+def rank_mask(cards):
+    '''
+    Returns the rank mask of a list of cards.
+    '''
+    mask = 0
+    for card in cards:
+        mask |= CARD_BITS[card]
+    return mask
 
 
 class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks', 'hands', 'bounties', 'deck', 'previous_state'])):
@@ -31,10 +48,9 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
                 - First boolean indicates if Player 1's bounty was hit
                 - Second boolean indicates if Player 2's bounty was hit
         '''
-        cards0 = self.hands[0] + self.deck
-        cards1 = self.hands[1] + self.deck
-        return (self.bounties[0] in [card[0] for card in cards0],
-                self.bounties[1] in [card[0] for card in cards1])
+        board_mask = rank_mask(self.deck)
+        return (bool((rank_mask(self.hands[0]) | board_mask) & RANK_BITS.get(self.bounties[0], 0)),
+                bool((rank_mask(self.hands[1]) | board_mask) & RANK_BITS.get(self.bounties[1], 0)))
 
     def showdown(self):
         '''
@@ -107,3 +123,114 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         new_stacks[active] -= contribution
         new_pips[active] += contribution
         return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.bounties, self.deck, self)
+
+
+class SearchState():
+    '''
+    A mutable round state for tree search, which applies and undoes actions in place.
+
+    It follows the rules of RoundState.proceed, but rather than allocating a new state per
+    action it updates its own fields and pushes the old values onto an undo stack, so a search
+    can walk a large tree with apply and undo alone. The history of applied actions is kept
+    in self.history only if history=True.
+    '''
+    __slots__ = ['button', 'street', 'pips', 'stacks', 'hands', 'bounties', 'deck', 'deltas', 'undo_stack', 'history']
+
+    legal_actions = RoundState.legal_actions
+    raise_bounds = RoundState.raise_bounds
+    get_bounty_hits = RoundState.get_bounty_hits
+
+    def __init__(self, button, street, pips, stacks, hands, bounties, deck, history=False):
+        self.button = button
+        self.street = street
+        self.pips = list(pips)
+        self.stacks = list(stacks)
+        self.hands = hands
+        self.bounties = bounties
+        self.deck = deck
+        self.deltas = None  # [delta, -delta] once the round is over
+        self.undo_stack = []
+        self.history = [] if history else None
+
+    @classmethod
+    def from_round_state(cls, round_state, history=False):
+        '''
+        Copies a RoundState, such as the one passed to get_action.
+        '''
+        return cls(round_state.button, round_state.street, round_state.pips, round_state.stacks,
+                   round_state.hands, round_state.bounties, round_state.deck, history)
+
+    def to_round_state(self):
+        '''
+        Returns the current state as a RoundState, without its previous states.
+        '''
+        return RoundState(self.button, self.street, list(self.pips), list(self.stacks),
+                          self.hands, self.bounties, self.deck, None)
+
+    def is_terminal(self):
+        '''
+        Returns whether the round is over.
+        '''
+        return self.deltas is not None
+
+    def showdown(self):
+        '''
+        Ends the round at showdown, with payoffs unknown to the player.
+        '''
+        self.deltas = [0, 0]
+
+    def proceed_street(self):
+        '''
+        Resets the players' pips and advances to the next round of betting.
+        '''
+        if self.street == 5:
+            self.showdown()
+            return
+        self.street = 3 if self.street == 0 else self.street + 1
+        self.button = 1
+        self.pips[0] = self.pips[1] = 0
+
+    def apply(self, action):
+        '''
+        Performs one action of the active player in place.
+        '''
+        pips = self.pips
+        stacks = self.stacks
+        self.undo_stack.append((self.button, self.street, pips[0], pips[1], stacks[0], stacks[1]))
+        if self.history is not None:
+            self.history.append(action)
+        active = self.button % 2
+        if isinstance(action, FoldAction):
+            delta = stacks[0] - STARTING_STACK if active == 0 else STARTING_STACK - stacks[1]
+            self.deltas = [delta, -delta]
+        elif isinstance(action, CallAction):
+            if self.button == 0:  # sb calls bb
+                self.button = 1
+                pips[0] = pips[1] = BIG_BLIND
+                stacks[0] = stacks[1] = STARTING_STACK - BIG_BLIND
+                return
+            # both players acted
+            contribution = pips[1-active] - pips[active]
+            stacks[active] -= contribution
+            pips[active] += contribution
+            self.button += 1
+            self.proceed_street()
+        elif isinstance(action, CheckAction):
+            if (self.street == 0 and self.button > 0) or self.button > 1:  # both players acted
+                self.proceed_street()
+            else:  # let opponent act
+                self.button += 1
+        else:  # isinstance(action, RaiseAction)
+            contribution = action.amount - pips[active]
+            stacks[active] -= contribution
+            pips[active] += contribution
+            self.button += 1
+
+    def undo(self):
+        '''
+        Takes back the last action applied.
+        '''
+        self.button, self.street, self.pips[0], self.pips[1], self.stacks[0], self.stacks[1] = self.undo_stack.pop()
+        self.deltas = None
+        if self.history is not None:
+            self.history.pop()
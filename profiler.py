@@ -0,0 +1,109 @@
+'''
+A wall-clock sampling profiler for the engine, with flamegraph output.
+'''
+import threading
+import time
+import sys
+import os
+
+
+def frame_name(frame):
+    '''
+    Names a stack frame by its file and qualified function name.
+    '''
+    code = frame.f_code
+    return '{}:{}'.format(os.path.basename(code.co_filename), getattr(code, 'co_qualname', code.co_name))
+
+
+class SamplingProfiler():
+    '''
+    Samples the stack of the thread which starts it from a background thread.
+
+    Each sample is weighted by the wall time since the previous one, so time spent blocked
+    (waiting on a bot's socket, say) is counted like time spent computing. The stacks are
+    written in the collapsed format read by flamegraph.pl and speedscope, with weights in
+    microseconds.
+    '''
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = {}
+        self.thread_id = None
+        self.sampler = None
+        self.running = False
+        self.switch_interval = None
+
+    def start(self):
+        '''
+        Starts sampling the calling thread.
+        '''
+        self.thread_id = threading.get_ident()
+        self.running = True
+        # let the sampler take the GIL about as often as it samples
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        '''
+        Stops sampling.
+        '''
+        self.running = False
+        self.sampler.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def sample(self):
+        '''
+        Collects samples until stopped.
+        '''
+        last_time = time.perf_counter()
+        while self.running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            names = []
+            while frame is not None:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            stack = tuple(reversed(names))
+            self.stacks[stack] = self.stacks.get(stack, 0.) + now - last_time
+            last_time = now
+
+    def total(self):
+        '''
+        Returns the seconds covered by the samples.
+        '''
+        return sum(self.stacks.values())
+
+    def phase_totals(self, phases):
+        '''
+        Attributes the samples to phases.
+
+        Arguments:
+        phases: a list of (phase, function names) pairs, with names as given by frame_name.
+        A sample belongs to the phase of its innermost listed function, or to 'other' if none.
+
+        Returns:
+        A dict of seconds by phase, in the order of phases.
+        '''
+        phase_of = {}
+        for phase, functions in phases:
+            for function in functions:
+                phase_of[function] = phase
+        totals = {phase: 0. for phase, _ in phases}
+        totals['other'] = 0.
+        for stack, seconds in self.stacks.items():
+            phase = next((phase_of[name] for name in reversed(stack) if name in phase_of), 'other')
+            totals[phase] += seconds
+        return totals
+
+    def write_collapsed(self, filename):
+        '''
+        Writes the samples as collapsed stacks.
+        '''
+        with open(filename, 'w') as collapsed_file:
+            for stack, seconds in sorted(self.stacks.items()):
+                collapsed_file.write('{} {}\n'.format(';'.join(stack), int(round(seconds * 1e6))))
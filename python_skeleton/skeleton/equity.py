@@ -0,0 +1,222 @@
+'''
+Monte Carlo equity and bounty-adjusted payoffs with NumPy, built on evaluator.py.
+
+A hand is estimated against a range by dealing the opponent's hole cards and the rest
+of the board in batches and scoring every trial at once. Besides the chances of winning
+and tying, each estimate carries the expected showdown payoff under the bounty rules of
+RoundState.get_delta in the engine: a player who wins having hit their bounty is paid
+BOUNTY_RATIO times the opponent's contribution plus BOUNTY_CONSTANT, and a split pot pays
+out only when exactly one player hit their bounty.
+'''
+from collections import namedtuple
+import time
+
+import numpy as np
+
+from .evaluator import RANKS, card_indices, evaluate_hands
+from .states import BOUNTY_RATIO, BOUNTY_CONSTANT
+
+RANK_INDEX = {rank: index for index, rank in enumerate(RANKS)}
+# every two card combination of the 52 cards, as card index pairs
+ALL_COMBOS = np.array([(a, b) for b in range(52) for a in range(b)], dtype=np.int64)
+BATCH_SIZE = 2000
+MIN_SAMPLES = 2000
+MAX_SAMPLES = 100000
+PRECISION = 0.005
+
+_rng = np.random.default_rng()
+# preflop estimates against a random hand, keyed on (hand class, bounty, opponent bounty)
+_preflop_cache = {}
+
+
+class Equity(namedtuple('_Equity', ['win', 'tie', 'bounty_hit', 'opp_bounty_hit', 'samples', 'std_error', 'slope', 'offset'])):
+    '''
+    The result of an equity estimate.
+
+    win, tie: the chances of winning and splitting the pot at showdown.
+    bounty_hit, opp_bounty_hit: the chances of each player hitting their bounty by the river.
+    samples: the number of trials behind the estimate.
+    std_error: the standard error of equity().
+    slope, offset: the expected showdown payoff is slope * contribution + offset.
+    '''
+
+    def equity(self):
+        '''
+        Returns the share of the pot won on average, counting ties as half.
+        '''
+        return self.win + self.tie / 2
+
+    def payoff(self, contribution):
+        '''
+        Returns the expected chips won at showdown when each player has put contribution
+        chips into the pot (STARTING_STACK minus the stacks at showdown), after bounties.
+
+        The engine rounds fractional deltas towards the button; this does not.
+        '''
+        return self.slope * contribution + self.offset
+
+
+def hand_class(hand):
+    '''
+    Names the class of two hole cards, like 'AKs', 'AKo' or 'QQ'.
+    '''
+    (r0, s0), (r1, s1) = sorted([(RANKS.index(str(card)[0]), str(card)[1]) for card in hand], reverse=True)
+    if r0 == r1:
+        return RANKS[r0] * 2
+    return RANKS[r0] + RANKS[r1] + ('s' if s0 == s1 else 'o')
+
+
+def parse_range(classes):
+    '''
+    Expands hand classes like ['QQ', 'AKs', 'AQo', 'JT'] into an array of card index pairs,
+    usable as a villain_range. A class without an s or o includes both.
+    '''
+    selected = set(classes)
+    combos = []
+    for a, b in ALL_COMBOS:
+        high, low = max(a, b) >> 2, min(a, b) >> 2
+        name = RANKS[high] + RANKS[low]
+        if name in selected or (high != low and name + ('s' if (a & 3) == (b & 3) else 'o') in selected):
+            combos.append((a, b))
+    return np.array(combos, dtype=np.int64).reshape(-1, 2)
+
+
+def _bounty_rank(bounty):
+    '''
+    Returns the rank index of a bounty, or -1 if it is unknown.
+    '''
+    return RANK_INDEX.get(bounty, -1)
+
+
+def _sample(hero, board, combos, weights, bounty, opp_bounty, batch_size, rng):
+    '''
+    Plays out one batch of trials.
+
+    Returns per-trial arrays of the hero's equity share, the payoff slope and offset, and
+    the outcome counts (wins, ties, bounty hits, opponent bounty hits).
+    '''
+    villains = combos[rng.choice(len(combos), batch_size, p=weights)]
+    missing = 5 - len(board)
+    boards = np.broadcast_to(board, (batch_size, len(board)))
+    if missing:
+        # shuffle the live cards of each trial by sorting random keys, with dead cards last
+        keys = rng.random((batch_size, 52))
+        keys[:, hero] = 2.
+        keys[:, board] = 2.
+        rows = np.arange(batch_size)
+        keys[rows, villains[:, 0]] = 2.
+        keys[rows, villains[:, 1]] = 2.
+        boards = np.concatenate([boards, np.argpartition(keys, missing - 1, axis=1)[:, :missing]], axis=1)
+    hero_scores = evaluate_hands(boards, hero)
+    villain_scores = evaluate_hands(boards, villains)
+    wins = hero_scores > villain_scores
+    ties = hero_scores == villain_scores
+    losses = ~(wins | ties)
+
+    board_ranks = boards >> 2
+    if bounty >= 0:
+        hits = np.full(batch_size, bool(((hero >> 2) == bounty).any())) | (board_ranks == bounty).any(axis=1)
+    else:
+        hits = np.zeros(batch_size, dtype=bool)
+    # an unknown opponent bounty is equally likely to be any rank
+    opp_bounties = rng.integers(0, 13, batch_size) if opp_bounty < 0 else np.full(batch_size, opp_bounty)
+    opp_hits = ((villains >> 2) == opp_bounties[:, None]).any(axis=1) | \
+        (board_ranks == opp_bounties[:, None]).any(axis=1)
+
+    # a split pot pays out to whoever alone hit their bounty
+    split = np.where(ties, hits.astype(np.int64) - opp_hits, 0)
+    slope = np.where(wins, np.where(hits, BOUNTY_RATIO, 1.), 0.) - \
+        np.where(losses, np.where(opp_hits, BOUNTY_RATIO, 1.), 0.) + split * (BOUNTY_RATIO - 1) / 2
+    offset = BOUNTY_CONSTANT * ((wins & hits).astype(np.int64) - (losses & opp_hits) + split)
+    return wins + ties / 2, slope, offset, (wins.sum(), ties.sum(), hits.sum(), opp_hits.sum())
+
+
+def estimate(hand, board=(), villain_range=None, weights=None, bounty=None, opp_bounty=None,
+             precision=PRECISION, min_samples=MIN_SAMPLES, max_samples=MAX_SAMPLES, batch_size=BATCH_SIZE,
+             time_limit=None, rng=None):
+    '''
+    Estimates a hand's equity and bounty-adjusted payoff against a range.
+
+    Arguments:
+    hand: your two hole cards, as strings like 'As' (round_state.hands[active]).
+    board: the board cards dealt so far.
+    villain_range: the opponent's possible hole cards, as a list of card pairs or an array
+    from parse_range. None means any two cards.
+    weights: optional relative weights of the hands in villain_range.
+    bounty, opp_bounty: the bounty ranks, like 'A'. None or '-1' (how the runner reports the
+    opponent's bounty) means unknown: your bounty then never pays, and the opponent's is
+    equally likely to be any rank.
+    precision: sampling stops once the standard error of the equity falls to this.
+    min_samples, max_samples: bounds on the number of trials.
+    batch_size: the number of trials dealt and scored at once.
+    time_limit: optional seconds after which sampling stops, whatever the precision.
+    rng: an optional numpy Generator.
+
+    Preflop estimates against any two cards are cached, so the first call for a hand class
+    pays for the sampling and later ones are free.
+
+    Returns:
+    An Equity.
+    '''
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    rng = _rng if rng is None else rng
+    hero = np.asarray(card_indices(list(hand)), dtype=np.int64)
+    board = np.asarray(card_indices(list(board)), dtype=np.int64).reshape(-1)
+    bounty, opp_bounty = _bounty_rank(bounty), _bounty_rank(opp_bounty)
+
+    cache_key = None
+    if len(board) == 0 and villain_range is None:
+        cache_key = (hand_class(hand), bounty, opp_bounty)
+        cached = _preflop_cache.get(cache_key)
+        if cached is not None and cached.std_error <= precision:
+            return cached
+
+    if villain_range is None:
+        combos = ALL_COMBOS
+    elif isinstance(villain_range, np.ndarray):
+        combos = villain_range.astype(np.int64).reshape(-1, 2)
+    else:
+        combos = np.asarray(card_indices(list(villain_range)), dtype=np.int64).reshape(-1, 2)
+    weights = np.ones(len(combos)) if weights is None else np.asarray(weights, dtype=np.float64)
+    dead = np.zeros(52, dtype=bool)
+    dead[hero] = True
+    dead[board] = True
+    live = ~(dead[combos[:, 0]] | dead[combos[:, 1]]) & (weights > 0)
+    if not live.any():
+        raise ValueError('no hand in the range is possible')
+    combos, weights = combos[live], weights[live] / weights[live].sum()
+
+    samples = 0
+    totals = np.zeros(4, dtype=np.int64)
+    equity_sum = equity_squares = slope_sum = offset_sum = 0.
+    while samples < max_samples:
+        size = min(batch_size, max_samples - samples)
+        shares, slope, offset, counts = _sample(hero, board, combos, weights, bounty, opp_bounty, size, rng)
+        samples += size
+        totals += counts
+        equity_sum += shares.sum()
+        equity_squares += (shares * shares).sum()
+        slope_sum += slope.sum()
+        offset_sum += offset.sum()
+        mean = equity_sum / samples
+        std_error = np.sqrt(max(equity_squares / samples - mean * mean, 0.) / samples)
+        if samples >= min_samples and std_error <= precision:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    wins, ties, hits, opp_hits = totals / samples
+    result = Equity(float(wins), float(ties), float(hits), float(opp_hits), samples, float(std_error),
+                    float(slope_sum / samples), float(offset_sum / samples))
+    if cache_key is not None:
+        cached = _preflop_cache.get(cache_key)
+        if cached is None or result.std_error < cached.std_error:
+            _preflop_cache[cache_key] = result
+    return result
+
+
+def clear_cache():
+    '''
+    Empties the cache of preflop estimates.
+    '''
+    _preflop_cache.clear()
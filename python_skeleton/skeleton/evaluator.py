@@ -0,0 +1,144 @@
+'''
+Batch poker hand evaluation with NumPy, for showdowns and equity studies.
+
+Cards are integer indices, rank * 4 + suit, with ranks 23456789TJQKA and suits cdhs
+(the order of eval7.Deck). Scores are identical to eval7.evaluate, so larger is better
+and the hand type is score >> 24.
+'''
+import numpy as np
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+CARD_INDEX = {rank + suit: 4 * r + s for r, rank in enumerate(RANKS) for s, suit in enumerate(SUITS)}
+HAND_TYPES = ['High Card', 'Pair', 'Two Pair', 'Trips', 'Straight', 'Flush', 'Full House', 'Quads', 'Straight Flush']
+
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = [t << 24 for t in range(9)]
+
+
+def _build_tables():
+    '''
+    Precomputes lookups over every 13-bit rank mask.
+    '''
+    masks = np.arange(1 << 13, dtype=np.int64)
+    bits = (masks[:, None] >> np.arange(13)) & 1
+    n_bits = bits.sum(axis=1)
+    # highest set rank, 0 for the empty mask
+    top_card = np.where(masks > 0, 12 - np.argmax(bits[:, ::-1], axis=1), 0)
+    # the five highest ranks packed into nibbles, highest first
+    top_five = np.zeros_like(masks)
+    remaining = masks.copy()
+    for shift in (16, 12, 8, 4, 0):
+        top = np.where(remaining > 0, 12 - np.argmax(((remaining[:, None] >> np.arange(13)) & 1)[:, ::-1], axis=1), 0)
+        top_five |= np.where(remaining > 0, top << shift, 0)
+        remaining &= ~np.where(remaining > 0, 1 << top, 0)
+    # top rank of the best straight, -1 if there is none (the wheel counts as five high)
+    straight = np.full_like(masks, -1)
+    for top in range(4, 13):
+        window = 0b11111 << (top - 4)
+        straight = np.where((masks & window) == window, top, straight)
+    wheel = (1 << 12) | 0b1111
+    straight = np.where((straight < 0) & ((masks & wheel) == wheel), 3, straight)
+    return n_bits, top_card, top_five, straight
+
+
+N_BITS, TOP_CARD, TOP_FIVE, STRAIGHT_TOP = _build_tables()
+RANK_BITS = 1 << np.arange(13, dtype=np.int64)
+RANK_FIELDS = 3 * np.arange(13, dtype=np.int64)
+
+
+def card_indices(cards):
+    '''
+    Converts cards (strings like 'As', eval7.Cards, or nested lists of either) to an index array.
+    '''
+    if isinstance(cards, (list, tuple)):
+        return np.array([card_indices(card) for card in cards], dtype=np.int64)
+    return CARD_INDEX[str(cards)]
+
+
+def evaluate(cards):
+    '''
+    Scores poker hands in bulk.
+
+    Arguments:
+    cards: integer array of card indices, shape (..., k) with 5 <= k <= 7.
+
+    Returns:
+    An int64 array of shape (...) with the eval7.evaluate score of each hand.
+    '''
+    cards = np.asarray(cards, dtype=np.int64)
+    shape = cards.shape[:-1]
+    cards = cards.reshape(-1, cards.shape[-1])
+    ranks = cards >> 2
+    suits = cards & 3
+    rank_bits = RANK_BITS[ranks]
+
+    suit_masks = np.stack([np.bitwise_or.reduce(np.where(suits == s, rank_bits, 0), axis=1) for s in range(4)], axis=1)
+    rank_mask = np.bitwise_or.reduce(suit_masks, axis=1)
+    # count each rank in a 3-bit field of one integer, then unpack the fields
+    packed = (np.int64(1) << (3 * ranks)).sum(axis=1)
+    counts = (packed[:, None] >> RANK_FIELDS) & 7
+    quads = ((counts == 4) * RANK_BITS).sum(axis=1)
+    trips = ((counts == 3) * RANK_BITS).sum(axis=1)
+    pairs = ((counts == 2) * RANK_BITS).sum(axis=1)
+
+    flush_suit = np.argmax(N_BITS[suit_masks], axis=1)
+    flush_mask = suit_masks[np.arange(len(cards)), flush_suit]
+    has_flush = N_BITS[flush_mask] >= 5
+    flush_straight = STRAIGHT_TOP[flush_mask]
+    straight = STRAIGHT_TOP[rank_mask]
+
+    quad = TOP_CARD[quads]
+    trip = TOP_CARD[trips]
+    # the full house pair may come from a second set of trips
+    house_pairs = (trips & ~RANK_BITS[trip]) | pairs
+    pair = TOP_CARD[pairs]
+    second_pair = TOP_CARD[pairs & ~RANK_BITS[pair]]
+
+    conditions = [
+        has_flush & (flush_straight >= 0),
+        quads != 0,
+        (trips != 0) & (house_pairs != 0),
+        has_flush,
+        straight >= 0,
+        trips != 0,
+        N_BITS[pairs] >= 2,
+        pairs != 0,
+    ]
+    choices = [
+        STRAIGHT_FLUSH | (flush_straight << 16),
+        QUADS | (quad << 16) | (TOP_CARD[rank_mask & ~RANK_BITS[quad]] << 12),
+        FULL_HOUSE | (trip << 16) | (TOP_CARD[house_pairs] << 12),
+        FLUSH | TOP_FIVE[flush_mask],
+        STRAIGHT | (straight << 16),
+        TRIPS | (trip << 16) | ((TOP_FIVE[rank_mask & ~RANK_BITS[trip]] >> 4) & 0xFF00),
+        TWO_PAIR | (pair << 16) | (second_pair << 12) |
+        (TOP_CARD[rank_mask & ~RANK_BITS[pair] & ~RANK_BITS[second_pair]] << 8),
+        PAIR | (pair << 16) | ((TOP_FIVE[rank_mask & ~RANK_BITS[pair]] >> 4) & 0xFFF0),
+    ]
+    return np.select(conditions, choices, HIGH_CARD | TOP_FIVE[rank_mask]).reshape(shape)
+
+
+def evaluate_hands(boards, hands):
+    '''
+    Scores hole cards against boards in bulk.
+
+    Arguments:
+    boards: integer array of board card indices, shape (..., 5).
+    hands: integer array of hole card indices, shape (..., 2), broadcastable against boards.
+
+    Returns:
+    An int64 array with the eval7.evaluate score of each board and hand.
+    '''
+    boards = np.asarray(boards, dtype=np.int64)
+    hands = np.asarray(hands, dtype=np.int64)
+    shape = np.broadcast_shapes(boards.shape[:-1], hands.shape[:-1])
+    boards = np.broadcast_to(boards, shape + boards.shape[-1:])
+    hands = np.broadcast_to(hands, shape + hands.shape[-1:])
+    return evaluate(np.concatenate([boards, hands], axis=-1))
+
+
+def hand_type(scores):
+    '''
+    Returns the index into HAND_TYPES of each score.
+    '''
+    return np.asarray(scores) >> 24
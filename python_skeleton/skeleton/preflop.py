@@ -0,0 +1,183 @@
+'''
+Precomputed preflop equities and bounty odds, read from a memory-mapped table.
+
+The table holds, for each of the 169 hand classes, the chances of winning and tying
+against a random hand, and for each bounty rank and street the chances that you, and
+an opponent holding a random hand, have hit a bounty of that rank. It is mapped into
+memory on the first lookup, so importing this module costs nothing and each lookup is
+an index into the file.
+
+The table ships as preflop.bin next to this module. To regenerate it (this needs numpy):
+python3 -m skeleton.preflop [--precision P]
+'''
+from array import array
+import argparse
+import struct
+import mmap
+import math
+import sys
+import os
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop.bin')
+# magic, version, then the number of classes, ranks and streets
+HEADER = struct.Struct('<4sHHHH')
+MAGIC = b'PFT1'
+VERSION = 1
+RANKS = '23456789TJQKA'
+RANK_INDEX = {rank: index for index, rank in enumerate(RANKS)}
+STREETS = (0, 3, 4, 5)
+STREET_INDEX = {street: index for index, street in enumerate(STREETS)}
+NUM_CLASSES = len(RANKS) * len(RANKS)
+NUM_ODDS = NUM_CLASSES * len(RANKS) * len(STREETS)
+# the tables follow the header as float32 arrays, in this order
+WIN, TIE, BOUNTY_HIT, OPP_BOUNTY_HIT = 0, NUM_CLASSES, 2 * NUM_CLASSES, 2 * NUM_CLASSES + NUM_ODDS
+
+_table = None
+
+
+def class_index(hand):
+    '''
+    Returns the index of the class of two hole cards, in 0 to 168.
+
+    Classes are laid out on a 13 by 13 grid of ranks: pairs on the diagonal, suited hands
+    at (high, low) and offsuit hands at (low, high).
+    '''
+    high, low = RANK_INDEX[hand[0][0]], RANK_INDEX[hand[1][0]]
+    if high < low:
+        high, low = low, high
+    if hand[0][1] == hand[1][1]:
+        return high * len(RANKS) + low
+    return low * len(RANKS) + high
+
+
+def class_name(index):
+    '''
+    Names the class at an index, like 'AKs', 'AKo' or 'QQ'.
+    '''
+    row, column = divmod(index, len(RANKS))
+    if row == column:
+        return RANKS[row] * 2
+    if row > column:
+        return RANKS[row] + RANKS[column] + 's'
+    return RANKS[column] + RANKS[row] + 'o'
+
+
+def load(filename=TABLE_FILE):
+    '''
+    Maps a table file into memory and returns it as a flat float view.
+    '''
+    with open(filename, 'rb') as table_file:
+        data = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, classes, ranks, streets = HEADER.unpack_from(data)
+    if (magic, version, classes, ranks, streets) != (MAGIC, VERSION, NUM_CLASSES, len(RANKS), len(STREETS)):
+        raise ValueError('{} is not a version {} preflop table'.format(filename, VERSION))
+    # the floats are stored little-endian, the byte order of every machine we run on
+    return memoryview(data)[HEADER.size:].cast('f')
+
+
+def _lookup(offset):
+    '''
+    Returns the float at an offset into the table, loading it on first use.
+    '''
+    global _table
+    if _table is None:
+        _table = load()
+    return _table[offset]
+
+
+def _odds_offset(hand, bounty, street):
+    '''
+    Returns the offset of a (hand class, bounty rank, street) entry within an odds table.
+    '''
+    return (class_index(hand) * len(RANKS) + RANK_INDEX[bounty]) * len(STREETS) + STREET_INDEX[street]
+
+
+def win_tie(hand):
+    '''
+    Returns the chances of winning and tying at showdown against a random hand.
+    '''
+    index = class_index(hand)
+    return _lookup(WIN + index), _lookup(TIE + index)
+
+
+def equity(hand):
+    '''
+    Returns the share of the pot won against a random hand on average, counting ties as half.
+    '''
+    win, tie = win_tie(hand)
+    return win + tie / 2
+
+
+def bounty_odds(hand, bounty, street=5):
+    '''
+    Returns the chance that a bounty of rank bounty has been hit, by you, holding hand,
+    once the board has street cards.
+    '''
+    return _lookup(BOUNTY_HIT + _odds_offset(hand, bounty, street))
+
+
+def opp_bounty_odds(hand, bounty, street=5):
+    '''
+    Returns the chance that an opponent holding a random hand has hit a bounty of rank
+    bounty once the board has street cards, given that you hold hand.
+    '''
+    return _lookup(OPP_BOUNTY_HIT + _odds_offset(hand, bounty, street))
+
+
+def hit_chance(unseen, outs, cards):
+    '''
+    Returns the chance that drawing cards from unseen cards, outs of which hit, draws a hit.
+    '''
+    return 1 - math.comb(unseen - outs, cards) / math.comb(unseen, cards)
+
+
+def class_hand(index):
+    '''
+    Returns a pair of hole cards of the class at an index.
+    '''
+    name = class_name(index)
+    return [name[0] + 's', name[1] + ('s' if name[2:] == 's' else 'h')]
+
+
+def generate(filename=TABLE_FILE, precision=0.001, seed=0):
+    '''
+    Computes a table and writes it to filename.
+
+    The bounty odds are exact. The equities are Monte Carlo estimates with standard
+    error precision, from skeleton.equity.
+    '''
+    from .equity import estimate
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    wins, ties = array('f'), array('f')
+    hero_odds, opp_odds = array('f'), array('f')
+    for index in range(NUM_CLASSES):
+        hand = class_hand(index)
+        result = estimate(hand, precision=precision, min_samples=10000, max_samples=10 ** 8, batch_size=20000, rng=rng)
+        wins.append(result.win)
+        ties.append(result.tie)
+        print('{:<4}{:.4f}'.format(class_name(index), result.equity()), file=sys.stderr)
+        for rank in RANKS:
+            held = sum(card[0] == rank for card in hand)
+            for street in STREETS:
+                # the board comes from the 50 cards you cannot see, and the opponent's cards too
+                hero_odds.append(1. if held else hit_chance(50, 4, street))
+                opp_odds.append(hit_chance(50, 4 - held, street + 2))
+    partial_filename = filename + '.tmp'
+    with open(partial_filename, 'wb') as table_file:
+        table_file.write(HEADER.pack(MAGIC, VERSION, NUM_CLASSES, len(RANKS), len(STREETS)))
+        for values in (wins, ties, hero_odds, opp_odds):
+            if sys.byteorder != 'little':
+                values.byteswap()
+            values.tofile(table_file)
+    os.replace(partial_filename, filename)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python3 -m skeleton.preflop')
+    parser.add_argument('--output', type=str, default=TABLE_FILE, help='The table file to write')
+    parser.add_argument('--precision', type=float, default=0.001, help='Standard error of the equities')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the equity sampling')
+    args = parser.parse_args()
+    generate(args.output, args.precision, args.seed)
@@ -9,113 +9,481 @@ from .states import STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from .bot import Bot
 
 
+FOLD = FoldAction()
+CALL = CallAction()
+CHECK = CheckAction()
+# the engine's offer of the binary framing, see wire.py in the engine for the format
+WIRE_OFFER = b'W1'
+RANKS = '23456789TJQKA'
+CARD_NAMES = [rank + suit for rank in RANKS for suit in 'cdhs']
+
+
 class Runner():
     '''
     Interacts with the engine.
+
+    Packets are parsed as bytes, and each clause is dispatched on its first byte through
+    the CLAUSES table (or BINARY_CLAUSES once the binary framing is negotiated), which
+    decodes its fields and hands them to the method which applies it to the game tree.
     '''
 
     def __init__(self, pokerbot, socketfile):
         self.pokerbot = pokerbot
         self.socketfile = socketfile
+        self.binary = False
+        self.clauses = {ord(code): (getattr(self, name), parse) for code, (name, parse) in CLAUSES.items()}
+        self.binary_clauses = {ord(code): (getattr(self, name), size, read)
+                               for code, (name, size, read) in BINARY_CLAUSES.items()}
+        self.reset()
+
+    def reset(self):
+        '''
+        Starts the game tree over, for the first game or another game on the same connection.
+        '''
+        self.bankroll = 0
+        self.game_clock = 0.
+        self.round_num = 1
+        self.round_state = None
+        self.active = 0
+        self.round_flag = True
+        self.tables = {}
+
+    @property
+    def game_state(self):
+        '''
+        The GameState handed to the pokerbot, built only when it is needed.
+        '''
+        return GameState(self.bankroll, self.game_clock, self.round_num)
 
     def receive(self):
         '''
-        Generator for incoming messages from the engine.
+        Generator for incoming messages from the engine, as lists of byte string clauses,
+        or as payloads once the binary framing is in use.
         '''
         while True:
-            packet = self.socketfile.readline().strip().split(' ')
-            if not packet:
-                break
-            yield packet
+            if self.binary:
+                header = self.socketfile.read(2)
+                if len(header) < 2:
+                    break
+                yield self.socketfile.read(int.from_bytes(header, 'little'))
+            else:
+                packet = self.socketfile.readline().split()
+                if not packet:
+                    break
+                yield packet
+
+    def encode(self, action):
+        '''
+        Encodes an action as a response clause.
+        '''
+        if isinstance(action, FoldAction):
+            return 'F'
+        if isinstance(action, CallAction):
+            return 'C'
+        if isinstance(action, CheckAction):
+            return 'K'
+        # isinstance(action, RaiseAction)
+        return 'R' + str(action.amount)
+
+    def encode_binary(self, action):
+        '''
+        Encodes an action as a binary response clause.
+        '''
+        if isinstance(action, FoldAction):
+            return b'F'
+        if isinstance(action, CallAction):
+            return b'C'
+        if isinstance(action, CheckAction):
+            return b'K'
+        # isinstance(action, RaiseAction)
+        return b'R' + action.amount.to_bytes(2, 'little')
 
     def send(self, action):
         '''
         Encodes an action and sends it to the engine.
         '''
-        if isinstance(action, FoldAction):
-            code = 'F'
-        elif isinstance(action, CallAction):
-            code = 'C'
-        elif isinstance(action, CheckAction):
-            code = 'K'
-        else:  # isinstance(action, RaiseAction)
-            code = 'R' + str(action.amount)
-        self.socketfile.write(code + '\n')
+        self.socketfile.write(self.encode(action).encode() + b'\n')
         self.socketfile.flush()
 
+    def update(self, packet):
+        '''
+        Applies one packet from the engine, a list of byte string clauses, to the game tree.
+
+        Returns False once the engine ends the game, otherwise True.
+        '''
+        clauses = self.clauses
+        for clause in packet:
+            entry = clauses.get(clause[0])
+            # clauses from newer engines which this runner does not know are ignored
+            if entry is not None and entry[0](entry[1](clause[1:])) is False:
+                return False
+        return True
+
+    def update_binary(self, payload):
+        '''
+        Applies one binary payload from the engine to the game tree.
+
+        Returns False once the engine ends the game, otherwise True.
+        '''
+        clauses = self.binary_clauses
+        position = 0
+        while position < len(payload):
+            apply, size, read = clauses[payload[position]]
+            position += 1
+            if apply(read(payload, position)) is False:
+                return False
+            position += size if size is not None else 1 + payload[position]
+        return True
+
+    def on_time(self, game_clock):
+        '''
+        T: the pokerbot's remaining game clock.
+        '''
+        self.game_clock = game_clock
+
+    def on_player(self, active):
+        '''
+        P: the pokerbot's seat this round.
+        '''
+        self.active = active
+
+    def on_hand(self, cards):
+        '''
+        H: the pokerbot's hole cards, which start a new round.
+        '''
+        hands = [[], []]
+        hands[self.active] = cards
+        pips = [SMALL_BLIND, BIG_BLIND]
+        stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
+        self.round_state = RoundState(0, 0, pips, stacks, hands, ['-1', '-1'], [], None)
+
+    def on_bounty(self, bounty):
+        '''
+        G: the pokerbot's bounty rank, which always follows H.
+        '''
+        # the bounties list belongs to the RoundState just built by on_hand, so it is filled in place
+        self.round_state.bounties[self.active] = bounty
+        if self.round_flag:
+            self.pokerbot.handle_new_round(self.game_state, self.round_state, self.active)
+            self.round_flag = False
+
+    def on_fold(self, fields):
+        '''
+        F: a fold.
+        '''
+        self.round_state = self.round_state.proceed(FOLD)
+
+    def on_call(self, fields):
+        '''
+        C: a call.
+        '''
+        self.round_state = self.round_state.proceed(CALL)
+
+    def on_check(self, fields):
+        '''
+        K: a check.
+        '''
+        self.round_state = self.round_state.proceed(CHECK)
+
+    def on_raise(self, amount):
+        '''
+        R: a raise to the given amount.
+        '''
+        self.round_state = self.round_state.proceed(RaiseAction(amount))
+
+    def on_board(self, cards):
+        '''
+        B: the board cards dealt so far.
+        '''
+        self.round_state = self.round_state._replace(deck=cards)
+
+    def on_opponent(self, cards):
+        '''
+        O: the opponent's hole cards, revealed at showdown.
+        '''
+        # backtrack
+        round_state = self.round_state.previous_state
+        revised_hands = list(round_state.hands)
+        revised_hands[1-self.active] = cards
+        # rebuild history
+        self.round_state = TerminalState([0, 0], None, round_state._replace(hands=revised_hands))
+
+    def on_delta(self, delta):
+        '''
+        D: the pokerbot's payoff for the round.
+        '''
+        assert isinstance(self.round_state, TerminalState)
+        deltas = [-delta, -delta]
+        deltas[self.active] = delta
+        self.round_state = TerminalState(deltas, None, self.round_state.previous_state)
+        self.bankroll += delta
+
+    def on_bounty_hits(self, hits):
+        '''
+        Y: whether the pokerbot and its opponent hit their bounties, which ends the round.
+        '''
+        assert isinstance(self.round_state, TerminalState)
+        hero_hit_bounty, opponent_hit_bounty = hits
+        if self.active == 1:
+            hero_hit_bounty, opponent_hit_bounty = opponent_hit_bounty, hero_hit_bounty
+        self.round_state = TerminalState(self.round_state.deltas, [hero_hit_bounty, opponent_hit_bounty],
+                                         self.round_state.previous_state)
+        self.pokerbot.handle_round_over(self.game_state, self.round_state, self.active)
+        self.round_num += 1
+        self.round_flag = True
+
+    def on_quit(self, fields):
+        '''
+        Q: the end of the game.
+        '''
+        return False
+
+    def needs_action(self):
+        '''
+        Whether the last packet asked for an action, rather than an ack.
+        '''
+        return not self.round_flag
+
+    def handle(self, packet):
+        '''
+        Applies one packet from the engine, a list of byte string clauses, and works out the response.
+
+        Returns the response line, or None once the engine ends the game.
+        '''
+        if packet[0] == b'N':
+            # the engine reuses this connection for another game
+            self.reset()
+            self.pokerbot.handle_new_game()
+            return 'N'
+        if packet[0] == WIRE_OFFER:
+            # the engine offers the binary framing at connect time, used from the next message on
+            self.binary = True
+            return WIRE_OFFER.decode()
+        if packet[0][:1] == b'M':
+            # the engine offers the multi-table protocol at connect time
+            return 'M' + str(max(1, int(packet[0][1:])))
+        if packet[0][:1] == b'#':
+            return self.handle_tables(packet)
+        if not self.update(packet):
+            return None
+        if not self.needs_action():  # ack the engine
+            return self.encode(CheckAction())
+        assert self.active == self.round_state.button % 2
+        return self.encode(self.pokerbot.get_action(self.game_state, self.round_state, self.active))
+
+    def handle_binary(self, payload):
+        '''
+        Applies one binary payload from the engine and works out the binary response, like handle.
+        '''
+        code = payload[:1]
+        if code == b'N':
+            self.reset()
+            self.pokerbot.handle_new_game()
+            return b'N'
+        if code == b'M':
+            return b'M' + max(1, int.from_bytes(payload[1:3], 'little')).to_bytes(2, 'little')
+        if code == b'#':
+            actions = self.play_tables(self.split_tables(payload), True)
+            if actions is None:
+                return None
+            return b''.join(b'#' + table.to_bytes(2, 'little') + self.encode_binary(action)
+                            for table, action in actions)
+        if not self.update_binary(payload):
+            return None
+        if not self.needs_action():  # ack the engine
+            return b'K'
+        assert self.active == self.round_state.button % 2
+        return self.encode_binary(self.pokerbot.get_action(self.game_state, self.round_state, self.active))
+
+    def split_tables(self, payload):
+        '''
+        Splits a binary multi-table payload into (table, payload) pairs.
+        '''
+        segments = []
+        position = 0
+        while position < len(payload):
+            if payload[position] == ord('#'):
+                segments.append([int.from_bytes(payload[position + 1:position + 3], 'little'), position + 3, None])
+                position += 3
+                continue
+            _, size, _ = self.binary_clauses[payload[position]]
+            position += 1 + (size if size is not None else 1 + payload[position + 1])
+            segments[-1][2] = position
+        return [(table, payload[start:start if end is None else end]) for table, start, end in segments]
+
+    def handle_tables(self, packet):
+        '''
+        Applies a multi-table packet, where each table's clauses follow its #<table> tag.
+        '''
+        segments = []
+        for clause in packet:
+            if clause[:1] == b'#':
+                segments.append((int(clause[1:]), []))
+            else:
+                segments[-1][1].append(clause)
+        actions = self.play_tables(segments, False)
+        if actions is None:
+            return None
+        return ' '.join('#{} {}'.format(table, self.encode(action)) for table, action in actions)
+
+    def play_tables(self, segments, binary):
+        '''
+        Applies each table's clauses and decides every table's action.
+
+        Every table keeps its own Runner, so game_state.round_num and bankroll count that table's
+        rounds only. The decisions of all tables in the packet are made by one call to
+        Bot.get_actions, and the acks of the others are checks.
+
+        Returns (table, action) pairs in the order of segments, or None once the engine ends the game.
+        '''
+        actions = {}
+        pending = []
+        for table, clauses in segments:
+            if table not in self.tables:
+                self.tables[table] = Runner(self.pokerbot, None)
+            runner = self.tables[table]
+            if not (runner.update_binary(clauses) if binary else runner.update(clauses)):
+                return None
+            if runner.needs_action():
+                assert runner.active == runner.round_state.button % 2
+                pending.append(table)
+            else:
+                actions[table] = CHECK
+        if pending:
+            runners = [self.tables[table] for table in pending]
+            decisions = self.pokerbot.get_actions([(runner.game_state, runner.round_state, runner.active)
+                                                   for runner in runners])
+            for table, action in zip(pending, decisions):
+                actions[table] = action
+        return [(table, actions[table]) for table, _ in segments]
+
     def run(self):
         '''
         Reconstructs the game tree based on the action history received from the engine.
         '''
-        game_state = GameState(0, 0., 1)
-        round_state = None
-        active = 0
-        round_flag = True
         for packet in self.receive():
-            for clause in packet:
-                if clause[0] == 'T':
-                    game_state = GameState(game_state.bankroll, float(clause[1:]), game_state.round_num)
-                elif clause[0] == 'P':
-                    active = int(float(clause[1:]))
-                elif clause[0] == 'H':
-                    hands = [[], []]
-
-                    hands[active] = clause[1:].split(',')
-                    pips = [SMALL_BLIND, BIG_BLIND]
-                    stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
-                    round_state = RoundState(0, 0, pips, stacks, hands, None, [], None)
-                elif clause[0] == 'G':
-                    bounties = ['-1', '-1']
-                    bounties[active] = clause[1:]
-                    round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                             round_state.hands, bounties, round_state.deck, round_state.previous_state)
-                    if round_flag:
-                        self.pokerbot.handle_new_round(game_state, round_state, active)
-                        round_flag = False
-                elif clause[0] == 'F':
-                    round_state = round_state.proceed(FoldAction())
-                elif clause[0] == 'C':
-                    round_state = round_state.proceed(CallAction())
-                elif clause[0] == 'K':
-                    round_state = round_state.proceed(CheckAction())
-                elif clause[0] == 'R':
-                    round_state = round_state.proceed(RaiseAction(int(float(clause[1:]))))
-                elif clause[0] == 'B':
-                    round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                             round_state.hands, round_state.bounties, clause[1:].split(','), round_state.previous_state)
-                elif clause[0] == 'O':
-                    # backtrack
-                    round_state = round_state.previous_state
-                    revised_hands = list(round_state.hands)
-                    revised_hands[1-active] = clause[1:].split(',')
-                    # rebuild history
-                    round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                             revised_hands, round_state.bounties, round_state.deck, round_state.previous_state)
-                    round_state = TerminalState([0, 0], None, round_state)
-                elif clause[0] == 'D':
-                    assert isinstance(round_state, TerminalState)
-                    delta = int(float(clause[1:]))
-                    deltas = [-delta, -delta]
-                    deltas[active] = delta
-                    round_state = TerminalState(deltas, None, round_state.previous_state)
-                    game_state = GameState(game_state.bankroll + delta, game_state.game_clock, game_state.round_num)
-                elif clause[0] == 'Y':
-                    assert isinstance(round_state, TerminalState)
-                    hero_hit_bounty, opponent_hit_bounty = (clause[1] == '1'), (clause[2] == '1')
-                    if active == 1:
-                        hero_hit_bounty, opponent_hit_bounty = opponent_hit_bounty, hero_hit_bounty
-                    round_state = TerminalState(round_state.deltas, [hero_hit_bounty, opponent_hit_bounty], round_state.previous_state)
-                    self.pokerbot.handle_round_over(game_state, round_state, active)
-                    game_state = GameState(game_state.bankroll, game_state.game_clock, game_state.round_num + 1)
-                    round_flag = True
-                elif clause[0] == 'Q':
+            if self.binary:
+                response = self.handle_binary(packet)
+                if response is None:
                     return
-            if round_flag:  # ack the engine
-                self.send(CheckAction())
+                self.socketfile.write(len(response).to_bytes(2, 'little') + response)
             else:
-                assert active == round_state.button % 2
-                action = self.pokerbot.get_action(game_state, round_state, active)
-                self.send(action)
+                response = self.handle(packet)
+                if response is None:
+                    return
+                self.socketfile.write(response.encode() + b'\n')
+            self.socketfile.flush()
+
+
+def parse_cards(fields):
+    '''
+    Decodes the comma separated cards of a text clause.
+    '''
+    return fields.decode().split(',')
+
+
+def parse_hits(fields):
+    '''
+    Decodes the two bounty hit flags of a text Y clause.
+    '''
+    return fields[0] == ord('1'), fields[1] == ord('1')
+
+
+def no_fields(fields):
+    '''
+    Decodes a clause without fields.
+    '''
+    return None
+
+
+def read_clock(payload, position):
+    '''
+    Decodes a binary game clock, sent in milliseconds.
+    '''
+    return int.from_bytes(payload[position:position + 4], 'little', signed=True) / 1000
+
+
+def read_byte(payload, position):
+    '''
+    Decodes a binary one byte field.
+    '''
+    return payload[position]
+
+
+def read_short(payload, position):
+    '''
+    Decodes a binary two byte signed field.
+    '''
+    return int.from_bytes(payload[position:position + 2], 'little', signed=True)
+
+
+def read_hand(payload, position):
+    '''
+    Decodes two binary cards.
+    '''
+    return [CARD_NAMES[payload[position]], CARD_NAMES[payload[position + 1]]]
+
+
+def read_board(payload, position):
+    '''
+    Decodes a binary card count and that many cards.
+    '''
+    return [CARD_NAMES[card] for card in payload[position + 1:position + 1 + payload[position]]]
+
+
+def read_rank(payload, position):
+    '''
+    Decodes a binary rank.
+    '''
+    return RANKS[payload[position]]
+
+
+def read_hits(payload, position):
+    '''
+    Decodes the binary bounty hit flags.
+    '''
+    return bool(payload[position] & 1), bool(payload[position] & 2)
+
+
+def read_nothing(payload, position):
+    '''
+    Decodes a binary clause without fields.
+    '''
+    return None
+
+
+# the Runner method which applies each kind of text clause, and the parser of its fields
+CLAUSES = {
+    'T': ('on_time', float),
+    'P': ('on_player', int),
+    'H': ('on_hand', parse_cards),
+    'G': ('on_bounty', bytes.decode),
+    'F': ('on_fold', no_fields),
+    'C': ('on_call', no_fields),
+    'K': ('on_check', no_fields),
+    'R': ('on_raise', int),
+    'B': ('on_board', parse_cards),
+    'O': ('on_opponent', parse_cards),
+    'D': ('on_delta', int),
+    'Y': ('on_bounty_hits', parse_hits),
+    'Q': ('on_quit', no_fields),
+}
+# the same for binary clauses, with the size of their fields (None for the board's count and cards) and their reader
+BINARY_CLAUSES = {
+    'T': ('on_time', 4, read_clock),
+    'P': ('on_player', 1, read_byte),
+    'H': ('on_hand', 2, read_hand),
+    'G': ('on_bounty', 1, read_rank),
+    'F': ('on_fold', 0, read_nothing),
+    'C': ('on_call', 0, read_nothing),
+    'K': ('on_check', 0, read_nothing),
+    'R': ('on_raise', 2, read_short),
+    'B': ('on_board', None, read_board),
+    'O': ('on_opponent', 2, read_hand),
+    'D': ('on_delta', 2, read_short),
+    'Y': ('on_bounty_hits', 1, read_hits),
+    'Q': ('on_quit', 0, read_nothing),
+}
 
 
 def parse_args():
@@ -124,7 +492,7 @@ def parse_args():
     '''
     parser = argparse.ArgumentParser(prog='python3 player.py')
     parser.add_argument('--host', type=str, default='localhost', help='Host to connect to, defaults to localhost')
-    parser.add_argument('port', type=int, help='Port on host to connect to')
+    parser.add_argument('port', type=str, help='Port on host to connect to, or the path of a Unix domain socket')
     return parser.parse_args()
 
 def run_bot(pokerbot, args):
@@ -133,11 +501,15 @@ def run_bot(pokerbot, args):
     '''
     assert isinstance(pokerbot, Bot)
     try:
-        sock = socket.create_connection((args.host, args.port))
+        if args.port.isdigit():
+            sock = socket.create_connection((args.host, int(args.port)))
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(args.port)
     except OSError:
         print('Could not connect to {}:{}'.format(args.host, args.port))
         return
-    socketfile = sock.makefile('rw')
+    socketfile = sock.makefile('rwb')
     runner = Runner(pokerbot, socketfile)
     runner.run()
     socketfile.close()
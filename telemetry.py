@@ -0,0 +1,150 @@
+'''
+Per-decision latency and game clock telemetry for the engine's players.
+'''
+from array import array
+import bisect
+import json
+import time
+import os
+
+# upper edges of the latency histogram buckets in seconds, the last bucket counts everything slower
+LATENCY_BUCKETS = [0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1., 2., 5.]
+PERCENTILES = [50, 90, 99, 99.9]
+STREET_LABELS = {0: 'Preflop', 3: 'Flop', 4: 'Turn', 5: 'River', None: 'Round over'}
+# the summary breaks latencies down over this many blocks of rounds, and samples the clock this often
+ROUND_BLOCKS = 10
+CLOCK_SAMPLES = 100
+
+
+class Histogram():
+    '''
+    Counts latencies into the fixed LATENCY_BUCKETS.
+    '''
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, latency, bucket):
+        '''
+        Counts one latency, which falls in the given bucket.
+        '''
+        self.counts[bucket] += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    def summary(self):
+        '''
+        Returns the histogram as a JSON-ready dict.
+        '''
+        count = sum(self.counts)
+        return {'count': count, 'total': self.total, 'mean': self.total / count if count else 0.,
+                'max': self.max, 'histogram': self.counts}
+
+
+class BotTelemetry():
+    '''
+    The latencies and clock samples of one bot.
+    '''
+
+    def __init__(self):
+        self.latencies = array('d')
+        self.histogram = Histogram()
+        self.by_street = {}
+        self.by_action = {}
+        self.by_rounds = {}
+        self.clock = []
+
+    def summary(self, block_size, num_rounds):
+        '''
+        Returns the bot's telemetry as a JSON-ready dict, labelling the blocks of block_size rounds.
+        '''
+        latencies = sorted(self.latencies)
+        summary = self.histogram.summary()
+        summary['percentiles'] = {'p{:g}'.format(percentile): latencies[min(len(latencies) - 1,
+                                                                            int(len(latencies) * percentile / 100))]
+                                  for percentile in PERCENTILES} if latencies else {}
+        summary['by_street'] = {STREET_LABELS[street]: histogram.summary() for street, histogram in self.by_street.items()}
+        summary['by_action'] = {action: histogram.summary() for action, histogram in self.by_action.items()}
+        summary['by_rounds'] = {'{}-{}'.format(block * block_size + 1, min((block + 1) * block_size, num_rounds)):
+                                self.by_rounds[block].summary() for block in sorted(self.by_rounds)}
+        summary['clock'] = self.clock
+        return summary
+
+
+class Telemetry():
+    '''
+    Collects the response latency of every decision and the game clock of each bot.
+
+    The summary is written as JSON to filename when the game ends, and rewritten every
+    interval seconds while it runs (None only writes it at the end), so it can be
+    watched live. Each write replaces the file atomically.
+    '''
+
+    def __init__(self, filename, names, num_rounds, interval=None):
+        self.filename = filename
+        self.bots = {name: BotTelemetry() for name in names}
+        self.block_size = -(-num_rounds // ROUND_BLOCKS)
+        self.num_rounds = num_rounds
+        self.clock_interval = max(1, num_rounds // CLOCK_SAMPLES)
+        self.rounds_played = 0
+        self.interval = interval
+        self.deadline = None if interval is None else time.monotonic() + interval
+
+    def record(self, name, round_num, street, action, latency):
+        '''
+        Records the latency of one response.
+
+        Arguments:
+        name: the bot's name.
+        round_num: the round number.
+        street: the street of the decision, or None for the ack which ends a round.
+        action: the name of the action, such as 'Raise'.
+        latency: the seconds charged to the bot's game clock.
+        '''
+        bot = self.bots[name]
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, latency)
+        bot.latencies.append(latency)
+        bot.histogram.add(latency, bucket)
+        for histograms, key in ((bot.by_street, street), (bot.by_action, action),
+                                (bot.by_rounds, (round_num - 1) // self.block_size)):
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram()
+            histogram.add(latency, bucket)
+
+    def end_round(self, round_num, players):
+        '''
+        Notes the end of a round, sampling the players' game clocks and refreshing the live file.
+        '''
+        self.rounds_played += 1
+        if round_num % self.clock_interval == 0 or round_num == self.num_rounds:
+            for player in players:
+                self.bots[player.name].clock.append([round_num, player.game_clock])
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.write(False)
+            self.deadline = time.monotonic() + self.interval
+
+    def summary(self, complete):
+        '''
+        Returns the telemetry of every bot as a JSON-ready dict.
+        '''
+        return {'complete': complete, 'rounds_played': self.rounds_played, 'bucket_edges': LATENCY_BUCKETS,
+                'bots': {name: bot.summary(self.block_size, self.num_rounds) for name, bot in self.bots.items()}}
+
+    def write(self, complete):
+        '''
+        Replaces the telemetry file with the current summary.
+        '''
+        partial_filename = self.filename + '.tmp'
+        with open(partial_filename, 'w') as telemetry_file:
+            json.dump(self.summary(complete), telemetry_file, indent=1)
+        os.replace(partial_filename, self.filename)
+
+    def close(self):
+        '''
+        Writes the final summary.
+        '''
+        self.write(True)
@@ -0,0 +1,9 @@
+'''
+Puts the engine's modules and the Python skeleton on the import path of the tests.
+'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, 'python_skeleton'))
@@ -0,0 +1,122 @@
+'''
+Tests of the build cache's keys, restores and discards.
+'''
+import os
+import shutil
+
+import pytest
+
+from buildcache import BuildCache
+
+BUILD = ['bash', 'build.sh']
+
+
+def write(path, relpath, data):
+    filename = os.path.join(path, relpath)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as output:
+        output.write(data)
+
+
+def read(path, relpath):
+    with open(os.path.join(path, relpath)) as source:
+        return source.read()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BuildCache(str(tmp_path / 'cache'), ['build', '*.o'])
+
+
+@pytest.fixture
+def bot(tmp_path):
+    '''
+    A pokerbot with two sources, built into build/ and main.o.
+    '''
+    path = str(tmp_path / 'bot')
+    write(path, 'main.cpp', 'int main() {}')
+    write(path, 'src/player.cpp', 'void play() {}')
+    write(path, 'build/pokerbot', 'binary 1')
+    write(path, 'main.o', 'object 1')
+    return path
+
+
+def build(path, version):
+    write(path, 'build/pokerbot', 'binary {}'.format(version))
+    write(path, 'main.o', 'object {}'.format(version))
+
+
+def test_key_covers_sources_only(cache, bot):
+    key = cache.key(bot, BUILD)
+    assert cache.key(bot, BUILD) == key
+    build(bot, 2)
+    write(bot, 'build/extra', 'log')
+    assert cache.key(bot, BUILD) == key
+    assert cache.key(bot, ['bash', 'build.sh', 'debug']) != key
+    write(bot, 'src/player.cpp', 'void play() { fold(); }')
+    assert cache.key(bot, BUILD) != key
+    write(bot, 'src/player.cpp', 'void play() {}')
+    assert cache.key(bot, BUILD) == key
+    os.rename(os.path.join(bot, 'src/player.cpp'), os.path.join(bot, 'src/bot.cpp'))
+    assert cache.key(bot, BUILD) != key
+
+
+def test_store_and_restore(cache, bot):
+    key = cache.key(bot, BUILD)
+    assert cache.restore(key, bot) is None
+    cache.store(key, bot, b'built')
+    shutil.rmtree(os.path.join(bot, 'build'))
+    write(bot, 'main.o', 'stale')
+    assert cache.restore(key, bot) == b'built'
+    assert read(bot, 'build/pokerbot') == 'binary 1'
+    assert read(bot, 'main.o') == 'object 1'
+    # the entry is not replaced by a later store under the same key
+    build(bot, 2)
+    cache.store(key, bot, b'built again')
+    assert cache.restore(key, bot) == b'built'
+    assert read(bot, 'build/pokerbot') == 'binary 1'
+
+
+def test_copies_in_two_directories(cache, bot, tmp_path):
+    '''
+    Outputs built in one directory are never restored into a copy of the pokerbot elsewhere.
+    '''
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(bot, copy)
+    key = cache.key(bot, BUILD)
+    copy_key = cache.key(copy, BUILD)
+    assert copy_key != key
+    cache.store(key, bot, b'built here')
+    shutil.rmtree(os.path.join(copy, 'build'))
+    assert cache.restore(copy_key, copy) is None
+    assert not os.path.exists(os.path.join(copy, 'build'))
+    build(copy, 2)
+    cache.store(copy_key, copy, b'built there')
+    assert cache.restore(key, bot) == b'built here'
+    assert cache.restore(copy_key, copy) == b'built there'
+    assert read(bot, 'build/pokerbot') == 'binary 1'
+    assert read(copy, 'build/pokerbot') == 'binary 2'
+
+
+def test_discard_after_failed_build(cache, bot):
+    key = cache.key(bot, BUILD)
+    cache.store(key, bot, b'built')
+    assert not cache.discard(bot)
+    assert cache.restore(key, bot) == b'built'
+    # the sources change and the rebuild fails, so the restored outputs must not be run
+    write(bot, 'main.cpp', 'int main() { syntax error')
+    assert cache.discard(bot)
+    assert not os.path.exists(os.path.join(bot, 'build/pokerbot'))
+    assert not os.path.exists(os.path.join(bot, 'main.o'))
+    assert read(bot, 'main.cpp') == 'int main() { syntax error'
+    assert not cache.discard(bot)
+
+
+def test_forget_after_successful_build(cache, bot):
+    key = cache.key(bot, BUILD)
+    cache.store(key, bot, b'built')
+    assert cache.restore(key, bot) == b'built'
+    cache.forget(bot)
+    build(bot, 2)
+    assert not cache.discard(bot)
+    assert read(bot, 'build/pokerbot') == 'binary 2'
@@ -0,0 +1,100 @@
+'''
+Tests that seeded games deal reproducibly, and that duplicate mode replays every deal.
+'''
+import json
+import os
+
+import pytest
+
+import engine
+from gamelog import RecordReader
+
+
+class CallingPlayer(engine.Player):
+    '''
+    Calls or checks every decision, so that every round reaches showdown.
+    '''
+
+    def query(self, round_state, player_message, game_log):
+        del player_message[1:]
+        self.last_latency = None
+        if not isinstance(round_state, engine.RoundState):
+            return engine.CheckAction()
+        return engine.CheckAction() if engine.CheckAction in round_state.legal_actions() else engine.CallAction()
+
+
+class PlayerPool():
+    '''
+    Hands out fresh CallingPlayers to Game.run.
+    '''
+
+    def acquire(self, name, path, log_dir='.'):
+        return CallingPlayer(name, path, log_dir)
+
+    def release(self, player):
+        pass
+
+
+@pytest.fixture
+def play(tmp_path, monkeypatch):
+    '''
+    Plays a game of 100 rounds in its own directory, and returns the directory.
+    '''
+    monkeypatch.setattr(engine, 'NUM_ROUNDS', 100)
+    monkeypatch.setattr(engine, 'GAME_LOG_FORMATS', ['text', 'jsonl'])
+
+    def play(name, seed, duplicate=False):
+        log_dir = str(tmp_path / name)
+        os.mkdir(log_dir)
+        engine.Game(seed=seed, duplicate=duplicate, log_dir=log_dir, early_stop=False).run(PlayerPool())
+        return log_dir
+    return play
+
+
+def read_records(log_dir):
+    reader = RecordReader(os.path.join(log_dir, 'gamelog.jsonl'))
+    try:
+        return list(reader)
+    finally:
+        reader.close()
+
+
+def read(log_dir, filename):
+    with open(os.path.join(log_dir, filename)) as log_file:
+        return log_file.read()
+
+
+def test_seeded_games_repeat(play):
+    first, second, other = play('first', 7), play('second', 7), play('other', 8)
+    assert read(first, 'gamelog.txt') == read(second, 'gamelog.txt')
+    assert read(first, 'gamelog.jsonl') == read(second, 'gamelog.jsonl')
+    assert read(first, 'gamelog.jsonl') != read(other, 'gamelog.jsonl')
+
+
+def test_round_rng_is_per_round():
+    assert engine.round_rng(7, 'deal', 5).random() == engine.round_rng(7, 'deal', 5).random()
+    assert engine.round_rng(7, 'deal', 5).random() != engine.round_rng(7, 'deal', 6).random()
+    assert engine.round_rng(7, 'deal', 5).random() != engine.round_rng(7, 'bounty', 5).random()
+    assert engine.round_rng(7, 'deal', 5).random() != engine.round_rng(8, 'deal', 5).random()
+
+
+def test_duplicate_replays_deals(play):
+    log_dir = play('duplicate', 7, duplicate=True)
+    records = read_records(log_dir)
+    assert [record.round_num for record in records] == list(range(1, 101))
+    for first, replay in zip(records[::2], records[1::2]):
+        # the seats swap players, and the cards and bounties of each seat stay the same
+        assert replay.players == first.players[::-1]
+        assert replay.hands == first.hands
+        assert replay.board == first.board
+        assert replay.bounties == first.bounties
+        assert replay.deltas == first.deltas
+    assert len({json.dumps(record.hands) for record in records[::2]}) == 50
+
+
+def test_duplicate_deals_match_plain_deals(play):
+    plain = read_records(play('plain', 7))
+    duplicate = read_records(play('duplicate', 7, duplicate=True))
+    # deal n of a duplicate game is round n of a plain game with the same seed
+    for deal in range(1, 51):
+        assert duplicate[2 * deal - 2].hands == plain[deal - 1].hands
@@ -0,0 +1,58 @@
+'''
+Tests that the Python skeleton's NumPy evaluator scores hands exactly like eval7.
+'''
+import random
+
+import eval7
+import numpy as np
+import pytest
+
+from skeleton import evaluator
+
+CARDS = [eval7.Card(rank + suit) for rank in evaluator.RANKS for suit in evaluator.SUITS]
+
+
+def eval7_scores(hands):
+    return [eval7.evaluate([CARDS[card] for card in hand]) for hand in hands]
+
+
+@pytest.mark.parametrize('size', [5, 6, 7])
+def test_random_hands(size):
+    rng = random.Random(size)
+    hands = np.array([rng.sample(range(52), size) for _ in range(5000)])
+    assert evaluator.evaluate(hands).tolist() == eval7_scores(hands)
+
+
+@pytest.mark.parametrize('hand, hand_type', [
+    ('As Ks Qs Js Ts 2d 3c', 'Straight Flush'),
+    ('5h 4h 3h 2h Ah Kh Qd', 'Straight Flush'),
+    ('Ac 2d 3h 4s 5c 9d Td', 'Straight'),
+    ('Ac Kd Qh Js Tc 9d 8d', 'Straight'),
+    ('9c 9d 9h 9s Ac Ad Ah', 'Quads'),
+    ('9c 9d 9h Ac Ad Ah 2s', 'Full House'),
+    ('2c 7c 9c Jc Kc 3c Ad', 'Flush'),
+    ('Qc Qd Qh 2s 5c 8d Jh', 'Trips'),
+    ('Qc Qd 5h 5s 2c 2d Ah', 'Two Pair'),
+    ('Qc Qd 2h 5s 7c 9d Ah', 'Pair'),
+    ('Kc Qd 2h 5s 7c 9d 3h', 'High Card'),
+])
+def test_hand_types(hand, hand_type):
+    cards = evaluator.card_indices(hand.split())
+    score = evaluator.evaluate(cards)
+    assert score == eval7_scores([cards])[0]
+    assert evaluator.HAND_TYPES[evaluator.hand_type(score)] == hand_type
+
+
+def test_card_order_matches_eval7_deck():
+    assert evaluator.card_indices(eval7.Deck().cards).tolist() == list(range(52))
+
+
+def test_evaluate_hands_broadcasts():
+    rng = random.Random(0)
+    deals = [rng.sample(range(52), 9) for _ in range(200)]
+    boards = np.array([deal[:5] for deal in deals])
+    hands = np.array([[deal[5:7], deal[7:9]] for deal in deals])
+    scores = evaluator.evaluate_hands(boards[:, None, :], hands)
+    assert scores.shape == (200, 2)
+    for seat in range(2):
+        assert scores[:, seat].tolist() == eval7_scores(np.concatenate([boards, hands[:, seat]], axis=1))
@@ -0,0 +1,75 @@
+'''
+Tests that record logs read back as written, through their index or without it.
+'''
+import os
+
+import pytest
+
+from gamelog import RecordReader, RoundRecord, JsonRecordLog, BinaryRecordLog, INDEX_ENTRY
+
+NAMES = ['A', 'B']
+RECORDS = [
+    RoundRecord(1, ['A', 'B'], ['Q', '4'], [['As', 'Kd'], ['7c', '2h']], [], [[0, 'F']],
+                [-1, 1], [False, False], 0, False),
+    RoundRecord(2, ['B', 'A'], ['4', 'Q'], [['Tc', 'Th'], ['Qs', '9d']], ['2c', '7h', 'Qd', '3s', 'Ah'],
+                [[0, 'C'], [1, 'K'], [1, 'R10'], [0, 'C'], [1, 'K'], [0, 'K'], [1, 'K'], [0, 'R400'], [1, 'C']],
+                [-400, 610], [False, True], 5, True),
+    RoundRecord(3, ['A', 'B'], [None, '4'], [['5c', '5d'], ['Jh', 'Js']], ['5h', '6h', '4d', 'Kc'],
+                [[0, 'R6'], [1, 'C'], [1, 'K'], [0, 'K'], [1, 'R12'], [0, 'F']],
+                [-6, 6], [False, False], 4, False),
+]
+
+
+@pytest.fixture(params=[JsonRecordLog, BinaryRecordLog])
+def record_file(request, tmp_path):
+    '''
+    Writes RECORDS in each format, flushing after every record, and returns the filename.
+    '''
+    filename = str(tmp_path / 'gamelog')
+    record_log = request.param(filename, NAMES, buffer_size=1)
+    for record in RECORDS:
+        record_log.write(record)
+    record_log.close()
+    return filename
+
+
+def read_back(filename):
+    reader = RecordReader(filename)
+    try:
+        return len(reader), reader.rounds(), [reader.read(3), reader.read(1)], list(reader), list(reader.showdowns())
+    finally:
+        reader.close()
+
+
+def test_round_trip(record_file):
+    assert read_back(record_file) == (3, [1, 2, 3], [RECORDS[2], RECORDS[0]], RECORDS, [RECORDS[1]])
+
+
+def test_index_rebuilt_when_missing(record_file):
+    reader = RecordReader(record_file)
+    offsets = reader.offsets
+    reader.close()
+    os.remove(record_file + '.idx')
+    reader = RecordReader(record_file)
+    assert reader.offsets == offsets
+    reader.close()
+    assert read_back(record_file) == (3, [1, 2, 3], [RECORDS[2], RECORDS[0]], RECORDS, [RECORDS[1]])
+
+
+def test_truncated_index_and_records(record_file):
+    with open(record_file + '.idx', 'rb') as index_file:
+        index = index_file.read()
+    assert len(index) == 3 * INDEX_ENTRY.size
+    last_offset = INDEX_ENTRY.unpack_from(index, 2 * INDEX_ENTRY.size)[1]
+    # an index cut mid-entry, and a record file cut inside the last record, as after a crash
+    with open(record_file + '.idx', 'wb') as index_file:
+        index_file.write(index[:-1])
+    with open(record_file, 'rb+') as records:
+        records.truncate(last_offset + 3)
+    for rebuild in (False, True):
+        if rebuild:
+            os.remove(record_file + '.idx')
+        reader = RecordReader(record_file)
+        assert reader.rounds() == [1, 2]
+        assert list(reader) == RECORDS[:2]
+        reader.close()
@@ -0,0 +1,117 @@
+'''
+Tests of the binary framing in wire.py, against the Python skeleton's decoder.
+'''
+import io
+import random
+
+import pytest
+
+import engine
+import wire
+from skeleton.actions import CallAction, CheckAction, RaiseAction
+from skeleton.bot import Bot
+from skeleton.runner import Runner
+
+
+class RaisingBot(Bot):
+    '''
+    Raises the minimum on every third round, so the game's messages carry every clause.
+    '''
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        legal_actions = round_state.legal_actions()
+        if RaiseAction in legal_actions and game_state.round_num % 3 == 0:
+            return RaiseAction(round_state.raise_bounds()[0])
+        return CheckAction() if CheckAction in legal_actions else CallAction()
+
+
+class WirePlayer(engine.Player):
+    '''
+    Plays a skeleton bot in both framings at once, checking that they agree on every message.
+    '''
+
+    def __init__(self, name, log_dir):
+        super().__init__(name, None, log_dir)
+        self.text_runner = Runner(RaisingBot(), None)
+        self.binary_runner = Runner(RaisingBot(), None)
+        self.binary_runner.binary = True
+        self.messages = 0
+
+    def is_connected(self):
+        return True
+
+    def request(self, message):
+        frame = wire.encode(message)
+        assert wire.LENGTH.unpack_from(frame)[0] == len(frame) - wire.LENGTH.size
+        assert wire.read(io.BytesIO(frame)) == frame[wire.LENGTH.size:]
+        response = self.text_runner.handle(message.encode().split())
+        binary_response = self.binary_runner.handle_binary(frame[wire.LENGTH.size:])
+        assert self.binary_runner.round_state == self.text_runner.round_state
+        assert self.binary_runner.game_state == self.text_runner.game_state
+        assert wire.decode(binary_response) == response
+        assert wire.encode(response)[wire.LENGTH.size:] == binary_response
+        self.messages += 1
+        return response
+
+
+class PlayerPool():
+    '''
+    Hands out the given players to Game.run.
+    '''
+
+    def __init__(self, players):
+        self.players = {player.name: player for player in players}
+
+    def acquire(self, name, path, log_dir='.'):
+        return self.players[name]
+
+    def release(self, player):
+        pass
+
+
+def test_game_messages_decode_alike(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, 'NUM_ROUNDS', 60)
+    monkeypatch.setattr(engine, 'GAME_LOG_FORMATS', [])
+    players = [WirePlayer('A', str(tmp_path)), WirePlayer('B', str(tmp_path))]
+    engine.Game(seed=3, log_dir=str(tmp_path)).run(PlayerPool(players))
+    assert all(player.messages > 120 for player in players)
+    assert sum(player.bankroll for player in players) == 0
+
+
+@pytest.mark.parametrize('response', ['F', 'C', 'K', 'N', 'R2', 'R400', 'M4', '#0 C #1 R20 #2 F'])
+def test_response_round_trip(response):
+    assert wire.decode(wire.encode(response)[wire.LENGTH.size:]) == response
+
+
+def test_engine_clauses():
+    payload = wire.encode('T59.983 P1 HAs,Td GT B2c,7h,Kd D-140 Y10\n')[wire.LENGTH.size:]
+    assert payload == (b'T' + wire.INT32.pack(59983) + b'P\x01' + bytes([ord('H'), 51, 33]) + b'G\x08'
+                       + bytes([ord('B'), 3, 0, 22, 45]) + b'D' + wire.INT16.pack(-140) + b'Y\x01')
+
+
+def test_every_card_round_trips():
+    cards = list(wire.CARD_CODES)
+    random.Random(0).shuffle(cards)
+    for first in range(0, len(cards), 5):
+        board = ','.join(cards[first:first + 5])
+        payload = wire.encode('B' + board)[wire.LENGTH.size:]
+        assert ','.join(wire.CARD_NAMES[code] for code in payload[2:]) == board
+
+
+def test_undecodable_response():
+    assert wire.decode(b'CX') == 'C ?58'
+    # a raise cut short of its amount
+    assert wire.decode(b'R\x05') == '?5205'
+
+
+def test_read_short_stream():
+    with pytest.raises(ConnectionResetError):
+        wire.read(io.BytesIO(b'\x05\x00abc'))
+    with pytest.raises(ConnectionResetError):
+        wire.read(io.BytesIO(b'\x05'))
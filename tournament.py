@@ -0,0 +1,226 @@
+'''
+Plays many matches between pokerbots across a pool of worker processes.
+
+Usage: python3 tournament.py BOT_PATH [BOT_PATH ...] [options]
+
+Every match runs engine.Game in its own worker process and log directory,
+so the engine's usual outputs (gamelog.txt and one output log per bot) are kept per match.
+With --concurrent, the matches instead run as asyncio tasks in this process, which
+suits many matches between subprocess bots that spend most of their time waiting.
+Game parameters other than the players come from config.py as usual.
+'''
+from collections import namedtuple
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+import argparse
+import asyncio
+import itertools
+import random
+import math
+import json
+import sys
+import os
+
+from engine import Game, PlayerPool
+
+Match = namedtuple('Match', ['index', 'names', 'paths', 'log_dir', 'seed', 'duplicate'])
+Standing = namedtuple('Standing', ['name', 'matches', 'wins', 'losses', 'total', 'mean', 'margin'])
+
+# two-sided 95% normal quantile
+Z_95 = 1.959964
+
+# the PlayerPool of this worker process, when bots are kept running between matches
+worker_pool = None
+
+
+def bot_names(paths):
+    '''
+    Derives a distinct display name for each bot from its directory name.
+    '''
+    names = []
+    for path in paths:
+        base = os.path.basename(os.path.normpath(path))
+        name = base
+        suffix = 2
+        while name in names:
+            name = '{}_{}'.format(base, suffix)
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def schedule(names, paths, mode, repeats, output_dir, seed, duplicate):
+    '''
+    Lists the matches of a round-robin or gauntlet tournament.
+
+    In a gauntlet, the first bot plays every other bot. Repeated pairings
+    alternate which bot sits in the first seat.
+    '''
+    bots = list(zip(names, paths))
+    if mode == 'gauntlet':
+        pairings = [(bots[0], opponent) for opponent in bots[1:]]
+    else:
+        pairings = list(itertools.combinations(bots, 2))
+    seeder = random.Random(seed)
+    matches = []
+    for first, second in pairings:
+        for repeat in range(repeats):
+            seats = (first, second) if repeat % 2 == 0 else (second, first)
+            index = len(matches)
+            log_dir = os.path.join(output_dir, 'match_{:05d}_{}_vs_{}'.format(index, seats[0][0], seats[1][0]))
+            matches.append(Match(index, (seats[0][0], seats[1][0]), (seats[0][1], seats[1][1]),
+                                 log_dir, seeder.getrandbits(64), duplicate))
+    return matches
+
+
+def start_worker(reuse_bots):
+    '''
+    Sets up a worker process, with a pool of running bots if they are to be reused.
+    '''
+    global worker_pool
+    if reuse_bots:
+        worker_pool = PlayerPool()
+        # stop the bots when the worker exits normally
+        Finalize(worker_pool, worker_pool.close, exitpriority=10)
+
+
+def play_match(match):
+    '''
+    Plays one match inside the calling worker process.
+
+    The engine writes its logs to the match's log directory. Bots bind their own ephemeral ports.
+    With --reuse-bots, the bots come from the worker's pool and stay running afterwards.
+    '''
+    os.makedirs(match.log_dir, exist_ok=True)
+    with open(os.path.join(match.log_dir, 'engine.txt'), 'w') as engine_output, redirect_stdout(engine_output):
+        game = Game(match.names, match.paths, seed=match.seed, duplicate=match.duplicate, log_dir=match.log_dir)
+        bankrolls = game.run(worker_pool)
+    return match, bankrolls
+
+
+async def play_matches_async(matches, concurrency, report):
+    '''
+    Plays matches as asyncio tasks, at most concurrency at a time, calling report(match, bankrolls)
+    as each one finishes.
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def play(match):
+        async with semaphore:
+            os.makedirs(match.log_dir, exist_ok=True)
+            game = Game(match.names, match.paths, seed=match.seed, duplicate=match.duplicate, log_dir=match.log_dir)
+            return match, await game.run_async()
+
+    for result in asyncio.as_completed([play(match) for match in matches]):
+        report(*await result)
+
+
+def standings(names, results):
+    '''
+    Aggregates match results into standings sorted by mean bankroll per match.
+
+    The margin is the half-width of a normal 95% confidence interval on the mean,
+    or None for a bot with a single match.
+    '''
+    table = []
+    for name in names:
+        scores = [bankrolls[name] for _, bankrolls in results if name in bankrolls]
+        matches = len(scores)
+        if matches == 0:
+            continue
+        mean = sum(scores) / matches
+        if matches > 1:
+            variance = sum((score - mean) ** 2 for score in scores) / (matches - 1)
+            margin = Z_95 * math.sqrt(variance / matches)
+        else:
+            margin = None
+        table.append(Standing(name, matches, sum(score > 0 for score in scores),
+                              sum(score < 0 for score in scores), sum(scores), mean, margin))
+    table.sort(key=lambda standing: standing.mean, reverse=True)
+    return table
+
+
+def format_standings(table):
+    '''
+    Renders the standings as a fixed-width text table.
+    '''
+    width = max([len('Bot')] + [len(standing.name) for standing in table])
+    lines = ['{:<{w}}  {:>7}  {:>5}  {:>6}  {:>10}  {:>10}  {:>10}'.format(
+        'Bot', 'Matches', 'Wins', 'Losses', 'Total', 'Mean', '95% CI', w=width)]
+    for standing in table:
+        lines.append('{:<{w}}  {:>7}  {:>5}  {:>6}  {:>10}  {:>10.1f}  {:>10}'.format(
+            standing.name, standing.matches, standing.wins, standing.losses, standing.total,
+            standing.mean, '-' if standing.margin is None else '+/-{:.1f}'.format(standing.margin), w=width))
+    return '\n'.join(lines)
+
+
+def parse_args():
+    '''
+    Parses the tournament's command line arguments.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 tournament.py')
+    parser.add_argument('paths', nargs='+', help='Bot directories, each with a commands.json')
+    parser.add_argument('--schedule', choices=['round-robin', 'gauntlet'], default='round-robin',
+                        help='Pair every bot with every other, or the first bot with each of the rest')
+    parser.add_argument('--matches', type=int, default=2, help='Matches per pairing, defaults to 2')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Matches played at once, defaults to the number of CPUs')
+    parser.add_argument('--concurrent', action='store_true',
+                        help='Play the matches as asyncio tasks in this process rather than in worker processes')
+    parser.add_argument('--reuse-bots', action='store_true',
+                        help='Keep each worker\'s bots built and running between matches (not with --concurrent)')
+    parser.add_argument('--output', type=str, default='tournament', help='Directory for match logs and standings')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the per-match seeds')
+    parser.add_argument('--duplicate', action='store_true', help='Replay every deal with the seats swapped')
+    return parser.parse_args()
+
+
+def main():
+    '''
+    Runs a tournament and writes its standings.
+    '''
+    args = parse_args()
+    if len(args.paths) < 2:
+        print('A tournament needs at least two bots')
+        return
+    paths = [os.path.abspath(path) for path in args.paths]
+    names = bot_names(paths)
+    output_dir = os.path.abspath(args.output)
+    matches = schedule(names, paths, args.schedule, args.matches, output_dir, args.seed, args.duplicate)
+    print('Playing', len(matches), 'matches on', args.workers, 'concurrent tasks' if args.concurrent else 'workers')
+    results = []
+    terminal = sys.stdout
+
+    def report(match, bankrolls):
+        results.append((match, bankrolls))
+        print('[{}/{}]'.format(len(results), len(matches)),
+              ', '.join('{} ({})'.format(name, bankrolls[name]) for name in match.names), file=terminal)
+
+    if args.concurrent:
+        # the engine's own messages from every match share one file
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, 'engine.txt'), 'w') as engine_output, redirect_stdout(engine_output):
+            asyncio.run(play_matches_async(matches, args.workers, report))
+    else:
+        with Pool(args.workers, initializer=start_worker, initargs=(args.reuse_bots,)) as pool:
+            for match, bankrolls in pool.imap_unordered(play_match, matches):
+                report(match, bankrolls)
+            # let the workers exit normally, so they stop their pooled bots
+            pool.close()
+            pool.join()
+    table = standings(names, results)
+    print()
+    print(format_standings(table))
+    with open(os.path.join(output_dir, 'standings.txt'), 'w') as standings_file:
+        standings_file.write(format_standings(table) + '\n')
+    with open(os.path.join(output_dir, 'results.json'), 'w') as results_file:
+        json.dump({'standings': [standing._asdict() for standing in table],
+                   'matches': [{'names': match.names, 'seed': match.seed, 'log_dir': match.log_dir,
+                                'bankrolls': bankrolls}
+                               for match, bankrolls in sorted(results)]},
+                  results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
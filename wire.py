@@ -0,0 +1,123 @@
+'''
+The compact binary framing of the engine-bot protocol.
+
+The engine offers it with the text clause W1 once a pokerbot connects. A pokerbot which
+supports it answers W1, and from then on every message in both directions is a 2-byte
+little-endian payload length followed by the payload. Older skeletons ignore the unknown
+clause and answer K, which keeps the connection on the text protocol.
+
+A payload carries the same clauses as a text line, each a one byte ASCII code (the
+letter of the text clause) followed by fixed-size fields, all little-endian:
+
+    T   int32   game clock in milliseconds
+    P   uint8   seat
+    H   2 cards your hole cards
+    G   uint8   your bounty rank
+    F, C, K, Q, N   no fields
+    R   uint16  raise amount
+    B   uint8 count, then count cards: the board
+    O   2 cards the opponent's hole cards
+    D   int16   your delta
+    Y   uint8   bounty hits: bit 0 is the first flag of the text clause, bit 1 the second
+    M   uint16  number of tables
+    #   uint16  table id
+
+A card is one byte, rank * 4 + suit, with ranks 23456789TJQKA and suits cdhs; a rank is
+its index in the same order. A pokerbot's response is framed the same way and holds an
+action (F, C, K or R), N, M, or one #-tagged action per table.
+'''
+import functools
+import struct
+
+VERSION = 1
+OFFER = 'W{}'.format(VERSION)
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+CARD_CODES = {rank + suit: 4 * r + s for r, rank in enumerate(RANKS) for s, suit in enumerate(SUITS)}
+CARD_NAMES = {code: card for card, code in CARD_CODES.items()}
+LENGTH = struct.Struct('<H')
+INT16 = struct.Struct('<h')
+INT32 = struct.Struct('<i')
+
+
+def encode_cards(cards):
+    '''
+    Encodes comma separated card names as card bytes.
+    '''
+    return bytes(CARD_CODES[card] for card in cards.split(','))
+
+
+@functools.lru_cache(maxsize=65536)
+def encode_clause(clause):
+    '''
+    Encodes one text clause. Clauses other than T repeat often, so their encodings are cached.
+    '''
+    code = clause[0]
+    fields = clause[1:]
+    if code in 'FCKQN':
+        return code.encode()
+    if code == 'T':
+        return b'T' + INT32.pack(round(float(fields) * 1000))
+    if code in 'HO':
+        return code.encode() + encode_cards(fields)
+    if code == 'B':
+        cards = encode_cards(fields)
+        return b'B' + bytes((len(cards),)) + cards
+    if code == 'G':
+        return b'G' + bytes((RANKS.index(fields),))
+    if code == 'P':
+        return b'P' + bytes((int(fields),))
+    if code == 'D':
+        return b'D' + INT16.pack(int(fields))
+    if code == 'Y':
+        return b'Y' + bytes(((fields[0] == '1') | (fields[1] == '1') << 1,))
+    # R, M and #
+    return code.encode() + LENGTH.pack(int(fields))
+
+
+def encode(message):
+    '''
+    Frames a text protocol message, a line of space separated clauses.
+    '''
+    payload = b''.join(b'T' + INT32.pack(round(float(clause[1:]) * 1000)) if clause[0] == 'T'
+                       else encode_clause(clause) for clause in message.split())
+    return LENGTH.pack(len(payload)) + payload
+
+
+def decode(payload):
+    '''
+    Converts a pokerbot's response payload into the text clauses it stands for.
+
+    Anything which cannot be decoded ends the response as a clause of its hex bytes,
+    which the engine then reports as misformatted.
+    '''
+    clauses = []
+    position = 0
+    while position < len(payload):
+        code = chr(payload[position])
+        if code in 'FCKN':
+            clauses.append(code)
+            position += 1
+        elif code in 'RM#' and position + LENGTH.size < len(payload):
+            clauses.append(code + str(LENGTH.unpack_from(payload, position + 1)[0]))
+            position += 1 + LENGTH.size
+        else:
+            clauses.append('?' + payload[position:].hex())
+            break
+    return ' '.join(clauses)
+
+
+def read(stream):
+    '''
+    Reads one framed payload from a binary stream.
+
+    Raises ConnectionResetError if the stream ends first.
+    '''
+    header = stream.read(LENGTH.size)
+    if len(header) < LENGTH.size:
+        raise ConnectionResetError
+    length = LENGTH.unpack(header)[0]
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise ConnectionResetError
+    return payload